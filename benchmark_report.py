@@ -0,0 +1,400 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : benchmark_report.py
+'''
+import sys, os, logging, argparse, json, time, platform, subprocess, tracemalloc, contextlib
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    resource = None   # Not available on Windows so the peak RSS is not recorded there
+
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------#
+# Runs the phases of create_report.py against local stand-ins for the Code Insight
+# database and compares the timings, memory and output sizes with the previous run, i.e.
+#
+#     python3 benchmark_report.py --scale small,medium
+#
+# Each scale point is a synthetic database (see synthetic_db.py) that is created once in
+# the benchmark directory and reused.  A recording made with SPDX_DB_RECORD or any other
+# SQLite database can be added with --replay/--sqlite.  Each scale point runs in its own
+# process since report_data_db_runner.py picks the database runner when it is imported.
+#----------------------------------------------------------------------#
+
+BASE_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# User can set these variables directly in code or on the command line.
+# A phase is a regression when it is this fraction slower/larger than the baseline
+user_time_threshold = 0.25
+user_memory_threshold = 0.25
+user_size_threshold = 0.05
+# Ignore time differences below this many seconds since small phases are mostly noise
+user_min_seconds = 0.5
+
+SCALE_POINTS = {
+    "small" : {"projects" : 5, "fanout" : 3, "inventory" : 500, "files" : 20000, "evidence" : 60000},
+    "medium" : {"projects" : 20, "fanout" : 5, "inventory" : 5000, "files" : 200000, "evidence" : 800000},
+    "large" : {"projects" : 50, "fanout" : 10, "inventory" : 20000, "files" : 2000000, "evidence" : 10000000},
+}
+
+# Every report section is included so all of the phases have work to do
+DEFAULT_REPORT_OPTIONS = {
+    "includeChildProjects" : True,
+    "includeNonRuntimeInventory" : False,
+    "includeFileDetails" : True,
+    "includeUnassociatedFiles" : True,
+    "createOtherFilesPackage" : False,
+    "includeCopyrightsData" : True,
+}
+
+parser = argparse.ArgumentParser(description="Benchmark the SPDX report against local database stand-ins")
+parser.add_argument("--scale", default="small,medium", help="Comma separated synthetic scale points to run (%s)" %", ".join(SCALE_POINTS))
+parser.add_argument("--sqlite", action="append", default=[], help="Additional SQLite database to run against (repeatable)")
+parser.add_argument("--replay", action="append", default=[], help="Query recording made with SPDX_DB_RECORD to run against (repeatable)")
+parser.add_argument("-pid", "--projectID", default="1", help="Project ID to report on (default 1, the top level synthetic project)")
+parser.add_argument("-reportOpts", "--reportOptions", help="JSON object of report options overriding the defaults, i.e. {\"includeCopyrightsData\": false}")
+parser.add_argument("--workdir", default=os.path.join(BASE_DIR, "benchmark"), help="Directory for the synthetic databases, report artifacts and logs")
+parser.add_argument("--output", default=os.path.join(BASE_DIR, "_spdx_report_benchmark.json"), help="File the results of this run are written to")
+parser.add_argument("--baseline", default=os.path.join(BASE_DIR, "_spdx_report_benchmark_baseline.json"), help="Results of a previous run to compare against")
+parser.add_argument("--update-baseline", action="store_true", help="Replace the baseline with this run even if there are regressions")
+parser.add_argument("--time-threshold", type=float, default=user_time_threshold, help="Allowed fractional increase in phase time")
+parser.add_argument("--memory-threshold", type=float, default=user_memory_threshold, help="Allowed fractional increase in peak memory")
+parser.add_argument("--size-threshold", type=float, default=user_size_threshold, help="Allowed fractional change in output size")
+parser.add_argument("--min-seconds", type=float, default=user_min_seconds, help="Ignore time increases smaller than this many seconds")
+parser.add_argument("--no-tracemalloc", action="store_true", help="Skip tracing Python allocations (faster but no per phase memory)")
+# Used by the benchmark itself to run a single scale point in a child process
+parser.add_argument("--run-point", help=argparse.SUPPRESS)
+parser.add_argument("--result-file", help=argparse.SUPPRESS)
+
+
+#----------------------------------------------------------------------#
+def main():
+    args = parser.parse_args()
+
+    reportOptions = dict(DEFAULT_REPORT_OPTIONS)
+    if args.reportOptions:
+        reportOptions.update(json.loads(args.reportOptions))
+
+    if args.run_point:
+        run_scale_point(args.run_point, args.projectID, reportOptions, args.result_file, not args.no_tracemalloc)
+        return
+
+    if not os.path.exists(args.workdir):
+        os.makedirs(args.workdir)
+
+    logging.basicConfig(format='%(asctime)s,%(msecs)-3d  %(levelname)-8s [%(filename)-30s:%(lineno)-4d]  %(message)s', datefmt='%Y-%m-%d:%H:%M:%S', filename=os.path.join(args.workdir, "_spdx_report_benchmark.log"), filemode='w', level=logging.INFO)
+
+    standIns = []
+    for scaleName in [x.strip() for x in args.scale.split(",") if x.strip()]:
+        if scaleName not in SCALE_POINTS:
+            sys.exit("Unknown scale point %s.  Valid scale points are %s" %(scaleName, ", ".join(SCALE_POINTS)))
+        standIns.append((scaleName, "SPDX_DB_SQLITE", get_synthetic_database(args.workdir, scaleName), SCALE_POINTS[scaleName]))
+    for dbFile in args.sqlite:
+        standIns.append(("sqlite-" + os.path.basename(dbFile), "SPDX_DB_SQLITE", os.path.abspath(dbFile), None))
+    for recordFile in args.replay:
+        standIns.append(("replay-" + os.path.basename(recordFile), "SPDX_DB_REPLAY", os.path.abspath(recordFile), None))
+
+    results = {}
+    results["createdOn"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+    results["python"] = platform.python_version()
+    results["platform"] = platform.platform()
+    results["projectID"] = args.projectID
+    results["reportOptions"] = reportOptions
+    results["tracemalloc"] = not args.no_tracemalloc
+    results["scalePoints"] = {}
+
+    for scaleName, envName, dbFile, dbParameters in standIns:
+        print("Running scale point %s against %s" %(scaleName, dbFile))
+        scaleResult = run_child_process(args, scaleName, envName, dbFile)
+        scaleResult["database"] = dbParameters if dbParameters else dbFile
+        results["scalePoints"][scaleName] = scaleResult
+        print_scale_point(scaleName, scaleResult)
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as baselineFile:
+            baseline = json.load(baselineFile)
+        regressions = compare_results(baseline, results, args)
+        print("Compared with baseline from %s" %baseline.get("createdOn"))
+        for regression in regressions:
+            print("    REGRESSION: %s" %regression)
+            logger.warning("Regression: %s" %regression)
+        if not regressions:
+            print("    No regressions found")
+    else:
+        print("No baseline found at %s" %args.baseline)
+
+    results["regressions"] = regressions
+    write_json(args.output, results)
+    print("Results written to %s" %args.output)
+
+    if not regressions or args.update_baseline:
+        write_json(args.baseline, results)
+        print("Baseline updated: %s" %args.baseline)
+
+    if regressions:
+        sys.exit(1)
+
+
+#----------------------------------------------------------------------#
+def get_synthetic_database(workdir, scaleName):
+    import synthetic_db
+
+    dbFile = os.path.join(workdir, "synthetic_%s.db" %scaleName)
+    parametersFile = dbFile + ".json"
+    dbParameters = SCALE_POINTS[scaleName]
+
+    # Reuse the database from an earlier run unless the scale point has been changed since
+    if os.path.exists(dbFile) and os.path.exists(parametersFile):
+        with open(parametersFile, "r") as parametersPtr:
+            if json.load(parametersPtr) == dbParameters:
+                return dbFile
+
+    print("Creating synthetic database for scale point %s: %s" %(scaleName, dbParameters))
+    synthetic_db.create_database(dbFile, **dbParameters)
+    write_json(parametersFile, dbParameters)
+
+    return dbFile
+
+
+#----------------------------------------------------------------------#
+def run_child_process(args, scaleName, envName, dbFile):
+
+    resultFile = os.path.join(args.workdir, "_result_%s.json" %scaleName)
+    if os.path.exists(resultFile):
+        os.remove(resultFile)
+
+    # Only the one stand-in, and nothing cached or recorded from another run
+    env = dict(os.environ)
+    for name in ("SPDX_DB_SQLITE", "SPDX_DB_REPLAY", "SPDX_DB_RECORD", "SPDX_QUERY_CACHE"):
+        env.pop(name, None)
+    env[envName] = dbFile
+
+    command = [sys.executable, os.path.realpath(__file__), "--run-point", scaleName, "--result-file", resultFile, "-pid", args.projectID]
+    if args.reportOptions:
+        command += ["-reportOpts", args.reportOptions]
+    if args.no_tracemalloc:
+        command.append("--no-tracemalloc")
+
+    logFileName = os.path.join(args.workdir, "_output_%s.txt" %scaleName)
+    startTime = time.perf_counter()
+    with open(logFileName, "w") as logFile:
+        returnCode = subprocess.call(command, env=env, cwd=args.workdir, stdout=logFile, stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - startTime
+
+    if returnCode != 0 or not os.path.exists(resultFile):
+        logger.error("Scale point %s failed with return code %s.  See %s" %(scaleName, returnCode, logFileName))
+        sys.exit("Scale point %s failed.  See %s" %(scaleName, logFileName))
+
+    with open(resultFile, "r") as resultPtr:
+        scaleResult = json.load(resultPtr)
+    os.remove(resultFile)
+
+    scaleResult["processSeconds"] = round(elapsed, 3)
+
+    return scaleResult
+
+
+#----------------------------------------------------------------------#
+def run_scale_point(scaleName, projectID, reportOptions, resultFile, trace):
+
+    logging.basicConfig(format='%(asctime)s,%(msecs)-3d  %(levelname)-8s [%(filename)-30s:%(lineno)-4d]  %(message)s', datefmt='%Y-%m-%d:%H:%M:%S', filename="_spdx_report_%s.log" %scaleName, filemode='w', level=logging.INFO)
+
+    # Imported here so report_data_db_runner.py sees the stand-in set up by the parent process
+    import _version
+    import report_data
+    import report_data_db_runner
+    import report_data_files
+    import report_artifacts_json
+    import report_artifacts_tagvalue
+    import report_archive
+
+    phases = PhaseRecorder(trace)
+
+    # The file details and evidence are collected per project from within the data gathering
+    report_data_files.get_scanned_file_details = phases.wrap("fileDetails", report_data_files.get_scanned_file_details, lambda result: len(result[1]))
+    report_data_files.get_file_evidence = phases.wrap("evidence", report_data_files.get_file_evidence, lambda result: len(result[0]))
+
+    if trace:
+        tracemalloc.start()
+
+    # Same report data as create_report.py sets up
+    fileNameTimeStamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    reportData = {}
+    reportData["projectID"] = projectID
+    reportData["reportName"] = "SPDX Report"
+    reportData["reportVersion"] = _version.__version__
+    reportData["reportOptions"] = reportOptions
+    reportData["releaseVersion"] = "N/A"
+    reportData["fileNameTimeStamp"] = fileNameTimeStamp
+    reportData["reportTimeStamp"] = datetime.strptime(fileNameTimeStamp, "%Y%m%d-%H%M%S").strftime("%B %d, %Y at %H:%M:%S")
+    reportData["spdxTimeStamp"] = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    with phases.phase("gatherData") as phase:
+        reportData = report_data.gather_data_for_report(projectID, reportData)
+        reportDetails = reportData["reportDetails"]
+        phase["outputItems"] = len(reportDetails["packages"]) + len(reportDetails.get("files", [])) + len(reportDetails["relationships"])
+
+    reportData["reportFileNameBase"] = "benchmark-%s-%s" %(scaleName, fileNameTimeStamp)
+
+    reports = {}
+    with phases.phase("tagValueRender") as phase:
+        tagvalueFile = report_artifacts_tagvalue.generate_tagvalue_report(reportData)
+        phase["outputBytes"] = os.path.getsize(tagvalueFile)
+
+    with phases.phase("jsonRender") as phase:
+        jsonFile = report_artifacts_json.generate_json_report(reportData)
+        phase["outputBytes"] = os.path.getsize(jsonFile)
+
+    reports["viewable"] = jsonFile
+    reports["allFormats"] = [jsonFile, tagvalueFile]
+
+    with phases.phase("archive") as phase:
+        uploadZipfile = report_archive.create_report_zipfile(reports, reportData["reportFileNameBase"])
+        phase["outputBytes"] = os.path.getsize(uploadZipfile)
+    os.remove(uploadZipfile)
+
+    scaleResult = {}
+    scaleResult["phases"] = phases.results
+    scaleResult["totalSeconds"] = round(sum(phases.results[name]["seconds"] for name in ("gatherData", "tagValueRender", "jsonRender", "archive")), 3)
+    scaleResult["maxRSSBytes"] = get_max_rss()
+    scaleResult["queryMetrics"] = report_data_db_runner.query_metrics.summary()
+
+    getattr(report_data_db_runner.db_runner, "close", lambda: None)()
+
+    write_json(resultFile, scaleResult)
+
+
+#----------------------------------------------------------------------#
+class PhaseRecorder(object):
+    '''
+    Time, peak memory and output size for each phase of the report. Phases can be nested
+    (the file details are collected during the data gathering) and run more than once.
+    '''
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.results = {}
+        self.running = []   # [traced memory at the start, peak so far] for each running phase
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        result = self.results.setdefault(name, {"calls" : 0, "seconds" : 0.0})
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.running:
+                self.running[-1][1] = max(self.running[-1][1], peak)
+            # Without reset_peak (before Python 3.9) the peak is for the run so far
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            self.running.append([current, peak])
+
+        startTime = time.perf_counter()
+        try:
+            yield result
+        finally:
+            result["calls"] += 1
+            result["seconds"] = round(result["seconds"] + time.perf_counter() - startTime, 3)
+            if self.trace:
+                phaseStart, phasePeak = self.running.pop()
+                phasePeak = max(phasePeak, tracemalloc.get_traced_memory()[1])
+                if self.running:
+                    self.running[-1][1] = max(self.running[-1][1], phasePeak)
+                result["pythonPeakBytes"] = max(result.get("pythonPeakBytes", 0), phasePeak - phaseStart)
+            result["maxRSSBytes"] = get_max_rss()
+
+    def wrap(self, name, function, outputItems):
+        def timed_function(*args, **kwargs):
+            with self.phase(name) as result:
+                functionResult = function(*args, **kwargs)
+                result["outputItems"] = result.get("outputItems", 0) + outputItems(functionResult)
+            return functionResult
+        return timed_function
+
+
+#----------------------------------------------------------------------#
+def get_max_rss():
+    # Peak resident set size of this process so far
+    if resource is None:
+        return None
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and bytes on macOS
+    return maxRSS if sys.platform == "darwin" else maxRSS * 1024
+
+
+#----------------------------------------------------------------------#
+def compare_results(baseline, results, args):
+    regressions = []
+
+    if baseline.get("reportOptions") != results["reportOptions"] or baseline.get("tracemalloc") != results["tracemalloc"]:
+        print("    Baseline was run with different report options or tracing, skipping comparison")
+        return regressions
+
+    for scaleName, scaleResult in results["scalePoints"].items():
+        baselineScale = baseline.get("scalePoints", {}).get(scaleName)
+        if baselineScale is None:
+            continue
+        if baselineScale.get("database") != scaleResult["database"]:
+            print("    Scale point %s has changed since the baseline, skipping comparison" %scaleName)
+            continue
+
+        increase = get_increase(baselineScale.get("maxRSSBytes"), scaleResult["maxRSSBytes"])
+        if increase is not None and increase > args.memory_threshold:
+            regressions.append("%s peak RSS %s -> %s bytes (+%.0f%%)" %(scaleName, baselineScale["maxRSSBytes"], scaleResult["maxRSSBytes"], increase * 100))
+
+        for phaseName, phaseResult in scaleResult["phases"].items():
+            baselinePhase = baselineScale["phases"].get(phaseName)
+            if baselinePhase is None:
+                continue
+            label = "%s %s" %(scaleName, phaseName)
+
+            increase = get_increase(baselinePhase["seconds"], phaseResult["seconds"])
+            if increase is not None and increase > args.time_threshold and phaseResult["seconds"] - baselinePhase["seconds"] >= args.min_seconds:
+                regressions.append("%s time %.3fs -> %.3fs (+%.0f%%)" %(label, baselinePhase["seconds"], phaseResult["seconds"], increase * 100))
+
+            increase = get_increase(baselinePhase.get("pythonPeakBytes"), phaseResult.get("pythonPeakBytes"))
+            if increase is not None and increase > args.memory_threshold:
+                regressions.append("%s Python peak memory %s -> %s bytes (+%.0f%%)" %(label, baselinePhase["pythonPeakBytes"], phaseResult["pythonPeakBytes"], increase * 100))
+
+            # Output that shrinks is as suspicious as output that grows
+            for sizeName in ("outputBytes", "outputItems"):
+                increase = get_increase(baselinePhase.get(sizeName), phaseResult.get(sizeName))
+                if increase is not None and abs(increase) > args.size_threshold:
+                    regressions.append("%s %s %s -> %s (%+.0f%%)" %(label, sizeName, baselinePhase[sizeName], phaseResult[sizeName], increase * 100))
+
+    return regressions
+
+
+#----------------------------------------------------------------------#
+def get_increase(previous, current):
+    if previous is None or current is None or previous <= 0:
+        return None
+    return (current - previous) / float(previous)
+
+
+#----------------------------------------------------------------------#
+def print_scale_point(scaleName, scaleResult):
+    print("    %-16s %6s %10s %14s %14s %12s" %("phase", "calls", "seconds", "python peak", "max RSS", "output"))
+    for phaseName, phaseResult in scaleResult["phases"].items():
+        output = phaseResult.get("outputBytes", phaseResult.get("outputItems", ""))
+        print("    %-16s %6s %10.3f %14s %14s %12s" %(phaseName, phaseResult["calls"], phaseResult["seconds"], phaseResult.get("pythonPeakBytes", ""), phaseResult["maxRSSBytes"] or "", output))
+    print("    Total %.3f seconds for %s queries" %(scaleResult["totalSeconds"], sum(query["count"] for query in scaleResult["queryMetrics"].values())))
+
+
+#----------------------------------------------------------------------#
+def write_json(fileName, data):
+    with open(fileName, "w") as filePtr:
+        json.dump(data, filePtr, indent=4)
+
+
+#----------------------------------------------------------------------#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : create_cds_archive.py
+'''
+import sys, os, logging
+
+import report_data_db_runner
+
+logfileName = os.path.dirname(os.path.realpath(__file__)) + "/_spdx_report_cds.log"
+
+logging.basicConfig(format='%(asctime)s,%(msecs)-3d  %(levelname)-8s [%(filename)-30s:%(lineno)-4d]  %(message)s', datefmt='%Y-%m-%d:%H:%M:%S', filename=logfileName, filemode='w',level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------#
+# One time step to create an AppCDS (class data sharing) archive for DbConnection.jar so later
+# report runs start Java faster.  Run it again after Java or Code Insight has been upgraded, and
+# once for each JVM profile in use, i.e.
+#
+#     python3 create_cds_archive.py
+#     SPDX_JVM_PROFILE=fast-startup python3 create_cds_archive.py
+#----------------------------------------------------------------------#
+def main():
+
+	print("Creating CDS archive for DbConnection.jar with JVM profile: %s" %report_data_db_runner.JVM_PROFILE)
+	print("    Logfile: %s" %(logfileName))
+
+	archiveFile = report_data_db_runner.create_cds_archive()
+	if archiveFile is None:
+		print("    Unable to create the CDS archive (requires Java 13 or later).  See the logfile for details")
+		sys.exit(1)
+
+	print("    CDS archive created: %s" %archiveFile)
+
+#----------------------------------------------------------------------#
+if __name__ == "__main__":
+	main()
@@ -9,16 +9,22 @@ Modified By : sarthak
 Modified On: Mon 07 2025
 File : create_report.py
 '''
+import time
+startupStartTime = time.perf_counter()  # Before the imports so they are part of the startup timing
+
 import shutil
 import sys, os, logging, argparse, json, re
 from datetime import datetime
 
 import _version
 import report_data
+import report_data_db_runner
 import report_artifacts
 import report_errors
-import upload_reports
 import report_archive
+# upload_reports (and with it requests) is only imported when the report is uploaded
+
+importsCompletedTime = time.perf_counter()
 
 
 ###################################################################################
@@ -32,6 +38,7 @@ else:
 propertiesFile = "../server_properties.json"  # Created by installer or manually
 propertiesFile = logfileName = os.path.dirname(os.path.realpath(__file__)) + "/" +  propertiesFile
 logfileName = os.path.dirname(os.path.realpath(__file__)) + "/_spdx_report.log"
+queryMetricsFileName = os.path.dirname(os.path.realpath(__file__)) + "/_spdx_report_query_metrics.json"
 
 ###################################################################################
 #  Set up logging handler to allow for different levels of logging to be capture
@@ -61,6 +68,7 @@ parser.add_argument("-rid", "--reportID", help="Report ID(Optional)")
 parser.add_argument("-authToken", "--authToken", help="Code Insight Authorization Token(Optional)")
 parser.add_argument("-baseURL", "--baseURL", help="Code Insight Core Server Protocol/Domain Name/Port(Optional).  i.e. http://localhost:8888 or https://sca.codeinsight.com:8443")
 parser.add_argument("-reportOpts", "--reportOptions", help="Options for report content(Optional)")
+parser.add_argument("-timing", "--startupTiming", action="store_true", help="Print how long the imports, option validation and database runner startup took(Optional)")
 
 #----------------------------------------------------------------------#
 def main():
@@ -72,30 +80,10 @@ def main():
 	print("Creating %s - %s" %(reportName, reportVersion))
 	print("    Logfile: %s" %(logfileName))
 
-    #####################################################################################################
-
-	if os.path.exists(propertiesFile):
-		try:
-			file_ptr = open(propertiesFile, "r")
-			configData = json.load(file_ptr)
-			baseURL = configData["core.server.url"]
-			file_ptr.close()
-			logger.info("Using baseURL from properties file: %s" %propertiesFile)
-		except:
-			logger.error("Unable to open properties file: %s" %propertiesFile)
-
-		# Is there a self signed certificate to consider?
-		try:
-			certificatePath = configData["core.server.certificate"]
-			os.environ["REQUESTS_CA_BUNDLE"] = certificatePath
-			os.environ["SSL_CERT_FILE"] = certificatePath
-			logger.info("Self signed certificate added to env")
-		except:
-			logger.info("No self signed certificate in properties file")
+	# The query metrics are written at exit, whether the report completes or not
+	report_data_db_runner.query_metrics_file = queryMetricsFileName
 
-	else:
-		baseURL = "http://localhost:8888"   # Required if the core.server.properties files is not used
-		logger.info("Using baseURL from create_report.py")
+    #####################################################################################################
 
 	# See what if any arguments were provided
 	args = parser.parse_args()
@@ -126,11 +114,41 @@ def main():
 			reportOptions = '{"includeChildProjects":"True","includeNonRuntimeInventory":"False","includeFileDetails":"True","includeUnassociatedFiles":"False","createOtherFilesPackage":"False","includeCopyrightsData":"False"}'
 	logger.info(f"Using default report options: {reportOptions}")
 
+	reportOptions = json.loads(reportOptions)
+	reportOptions = verifyOptions(reportOptions) 
+	optionsVerifiedTime = time.perf_counter()
+
+	# Java takes a while to start and connect so get it going while the rest of the setup is done.
+	# Not needed for the error report
+	if "errorMsg" not in reportOptions.keys():
+		report_data_db_runner.db_runner.start_in_background()
+
+	if os.path.exists(propertiesFile):
+		try:
+			file_ptr = open(propertiesFile, "r")
+			configData = json.load(file_ptr)
+			baseURL = configData["core.server.url"]
+			file_ptr.close()
+			logger.info("Using baseURL from properties file: %s" %propertiesFile)
+		except:
+			logger.error("Unable to open properties file: %s" %propertiesFile)
+
+		# Is there a self signed certificate to consider?
+		try:
+			certificatePath = configData["core.server.certificate"]
+			os.environ["REQUESTS_CA_BUNDLE"] = certificatePath
+			os.environ["SSL_CERT_FILE"] = certificatePath
+			logger.info("Self signed certificate added to env")
+		except:
+			logger.info("No self signed certificate in properties file")
+
+	else:
+		baseURL = "http://localhost:8888"   # Required if the core.server.properties files is not used
+		logger.info("Using baseURL from create_report.py")
+
 	fileNameTimeStamp = datetime.now().strftime("%Y%m%d-%H%M%S")
 	reportTimeStamp = datetime.strptime(fileNameTimeStamp, "%Y%m%d-%H%M%S").strftime("%B %d, %Y at %H:%M:%S")
 	spdxTimeStamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
-	reportOptions = json.loads(reportOptions)
-	reportOptions = verifyOptions(reportOptions) 
 
 	logger.debug("Custom Report Provided Arguments:")	
 	logger.debug("    projectID:  %s" %projectID)	
@@ -189,6 +207,7 @@ def main():
 	uploadZipfile = report_archive.create_report_zipfile(reports, reportFileNameBase)
 	print("    Upload zip file creation completed")
 	if authToken is not None:
+		import upload_reports
 		upload_reports.upload_project_report_data(baseURL, projectID, reportID, authToken, uploadZipfile)
 		print("    Report uploaded to Code Insight")
 
@@ -259,9 +278,33 @@ def main():
 		else:
 			logger.warning(f"Base zip file {base_zip_file} does not exist, skipping move")
 
+	# Time spent per database query, to help track down slow report runs. Written on exit
+	print("    Query metrics: %s" %queryMetricsFileName)
+
 	logger.info("Completed creating %s" %reportName)
 	print("Completed creating %s" %reportName)
 
+	if args.startupTiming:
+		print_startup_timing(optionsVerifiedTime)
+
+
+#----------------------------------------------------------------------#
+def print_startup_timing(optionsVerifiedTime):
+	# Times are from the start of this script.  The database runner starts in the background once the
+	# options have been verified and the first query only waits for whatever startup time is left
+	timings = []
+	timings.append(("Imports", importsCompletedTime - startupStartTime))
+	timings.append(("Options verified", optionsVerifiedTime - startupStartTime))
+	timings.append(("Database runner startup", report_data_db_runner.db_runner.start_seconds))
+	timings.append(("First query wait", report_data_db_runner.db_runner.wait_seconds))
+	timings.append(("Total", time.perf_counter() - startupStartTime))
+
+	print("    Startup timing:")
+	for name, seconds in timings:
+		timing = "%.3fs" %seconds if seconds is not None else "not started"
+		logger.info("Startup timing - %s: %s" %(name, timing))
+		print("        %-25s %s" %(name, timing))
+
 
 #----------------------------------------------------------------------# 
 def verifyOptions(reportOptions):
@@ -0,0 +1,136 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : db_runner_broker.py
+'''
+import sys, os, logging, argparse, json, signal, socket, socketserver
+
+import report_data_db_runner
+
+logfileName = os.path.dirname(os.path.realpath(__file__)) + "/_spdx_db_broker.log"
+queryMetricsFileName = os.path.dirname(os.path.realpath(__file__)) + "/_spdx_db_broker_query_metrics.json"
+
+logging.basicConfig(format='%(asctime)s,%(msecs)-3d  %(levelname)-8s [%(filename)-30s:%(lineno)-4d]  %(message)s', datefmt='%Y-%m-%d:%H:%M:%S', filename=logfileName, filemode='w',level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------#
+# Long lived process that owns a pool of DbConnection.jar workers and runs the queries of every
+# report process on them, so a release that creates dozens of reports at once doesn't start a JVM
+# and database connection for each one.  Reports connect to it over a Unix socket whenever it is
+# running and start their own workers when it is not, i.e.
+#
+#     python3 db_runner_broker.py --workers 8
+#
+# The broker speaks the same protocol as DbConnection.jar: one SQL line in, one JSON line out.
+# Reports put the query name ahead of the SQL ("#name<tab>SQL") so the broker's query metrics
+# are kept per report function.
+#----------------------------------------------------------------------#
+
+parser = argparse.ArgumentParser(description="Share DbConnection.jar workers between report processes")
+parser.add_argument("--socket", default=report_data_db_runner.DB_BROKER_SOCKET, help="Unix socket to listen on (default %(default)s)")
+parser.add_argument("--workers", type=int, default=max(4, report_data_db_runner.DB_WORKER_COUNT), help="Number of DbConnection.jar workers (default %(default)s)")
+
+
+#----------------------------------------------------------------------#
+class BrokerRequestHandler(socketserver.StreamRequestHandler):
+	# One connection per report worker, served until the report closes it
+	wbufsize = 65536
+
+	def handle(self):
+		for line in self.rfile:
+			sqlQuery = line.decode("utf-8").strip()
+			if not sqlQuery:
+				continue
+			if sqlQuery == "exit":
+				break
+			queryName = None
+			if sqlQuery.startswith(report_data_db_runner.BROKER_QUERY_NAME_PREFIX):
+				# The metrics are kept under the name of the report function that sent the query
+				queryName, _, sqlQuery = sqlQuery[len(report_data_db_runner.BROKER_QUERY_NAME_PREFIX):].partition("\t")
+			if sqlQuery.upper().startswith("SET "):
+				# The workers' sessions are shared between reports so they are not changed by them
+				self.wfile.write(b"[]\n")
+			else:
+				self.write_result(sqlQuery, queryName or "broker")
+			self.wfile.flush()
+
+	def write_result(self, sqlQuery, queryName):
+		# Pass the rows on as they come from the worker rather than building the whole response
+		rows = self.server.pool.iter_query(sqlQuery, queryName)
+		rowCount = 0
+		errorResult = None
+		try:
+			while True:
+				try:
+					row = next(rows)
+				except StopIteration as finished:
+					errorResult = finished.value
+					break
+				self.wfile.write((b"[" if rowCount == 0 else b",") + json.dumps(row, separators=(",", ":")).encode("utf-8"))
+				rowCount += 1
+		finally:
+			rows.close()
+
+		if rowCount:
+			self.wfile.write(b"]\n")
+		else:
+			self.wfile.write(json.dumps(errorResult if errorResult is not None else []).encode("utf-8") + b"\n")
+
+
+#----------------------------------------------------------------------#
+class BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+
+#----------------------------------------------------------------------#
+def main():
+
+	args = parser.parse_args()
+
+	if not hasattr(socket, "AF_UNIX"):
+		sys.exit("Unix sockets are not available on this platform")
+
+	print("Starting DB runner broker with %s workers on %s" %(args.workers, args.socket))
+	print("    Logfile: %s" %(logfileName))
+
+	if os.path.exists(args.socket):
+		if report_data_db_runner.is_db_broker_running(args.socket):
+			sys.exit("A DB runner broker is already running on %s" %args.socket)
+		os.remove(args.socket)  # Left behind by a broker that has stopped
+
+	report_data_db_runner.check_java_environment()
+	pool = report_data_db_runner.DbQueryRunnerPool(lambda: report_data_db_runner.InteractiveDbQueryRunner(report_data_db_runner.JAR_PATH, report_data_db_runner.JAVA_PATH), args.workers)
+
+	# Only the user running the broker can connect, the socket is created without group or other access
+	oldUmask = os.umask(0o177)
+	try:
+		server = BrokerServer(args.socket, BrokerRequestHandler)
+	finally:
+		os.umask(oldUmask)
+	server.pool = pool
+
+	# Shut down cleanly when stopped by a service manager as well as with Ctrl+C
+	signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+	logger.info("Listening on %s with %s workers" %(args.socket, len(pool.workers)))
+	print("    Listening for report connections")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		if os.path.exists(args.socket):
+			os.remove(args.socket)
+		pool.close()
+		report_data_db_runner.query_metrics.write_summary(queryMetricsFileName)
+		logger.info("DB runner broker stopped")
+		print("    DB runner broker stopped")
+
+#----------------------------------------------------------------------#
+if __name__ == "__main__":
+	main()
@@ -17,6 +17,10 @@ import report_data_files
 
 logger = logging.getLogger(__name__)
 
+# A download URL or VCS locator as SPDX allows for downloadLocation, i.e. https://host/path or
+# git+https://host/repo@tag#subpath, and the git+git@host:repo form
+downloadLocationPattern = re.compile(r"^(?:(?:git|hg|svn|bzr)\+)?[a-z][a-z0-9+.-]*://[^\s/]+(?:/\S*)?$|^git\+git@[\w.-]+:\S+$", re.IGNORECASE)
+
 #-------------------------------------------------------------------#
 def gather_data_for_report(projectID, reportData):
     logger.info("Entering gather_data_for_report")
@@ -31,6 +35,7 @@ def gather_data_for_report(projectID, reportData):
     filesNotInInventory = []
     filePathsNotInInventoryToID = {}
     projectCopyrights = []
+    componentDeclaredLicenses = {} # Declared license expression per component for this run
 
     reportOptions = reportData["reportOptions"]
     releaseVersion = "N/A"
@@ -53,6 +58,9 @@ def gather_data_for_report(projectID, reportData):
         projectList.append(projectID)
     topLevelProjectName = project_Name
 
+    # Reuse the query results of an earlier run if enabled and the projects haven't changed
+    report_data_db.open_query_cache(projectID, projectList)
+
     SPDXVersion = "SPDX-2.3"
     documentSPDXID = "SPDXRef-DOCUMENT"
     documentNamespace  = "http://spdx.org/spdxdocs/" + documentName + "-" + str(uuid.uuid1())
@@ -86,10 +94,12 @@ def gather_data_for_report(projectID, reportData):
     if packageRelationship not in relationships:
         relationships.append(packageRelationship)
 
+    projectNames = report_data_db.get_project_names(projectList)
+
     #  Gather the details for each project and summerize the data
     for project in projectList:
         projectID = project
-        projectName = report_data_db.get_projects_data(projectID)
+        projectName = projectNames[projectID]
 
         print("        Collect data for project: %s" %projectName)
 
@@ -98,7 +108,7 @@ def gather_data_for_report(projectID, reportData):
             # Collect file level details for files associated to this project
             print("            Collect file level details.")
             logger.info("            Collect file level details.")
-            filePathtoID, projectFileDetails, hasExtractedLicensingInfos = report_data_files.manage_file_details(projectID, hasExtractedLicensingInfos, includeUnassociatedFiles, includeCopyrightsData)
+            filePathtoID, projectFileDetails, inventoryFiles, hasExtractedLicensingInfos = report_data_files.manage_file_details(projectID, hasExtractedLicensingInfos, includeUnassociatedFiles, includeCopyrightsData)
             # Create a full list of filename to ID mappings for non inventory items
             if includeUnassociatedFiles:
                 filePathsNotInInventoryToID.update(filePathtoID["notInInventory"])
@@ -108,16 +118,21 @@ def gather_data_for_report(projectID, reportData):
 
         print("            Collect inventory details.")
         logger.info("            Collect inventory details")
-        inventoryItems = report_data_db.get_inventory_data(projectID)
+        # Along with the License Only and WIP inventories, to check the inventory type
+        inventoryItems, inventoriesNotInRepo = report_data_db.get_project_inventory(projectID)
         if inventoryItems is None:
             inventoryItems = []
         print("            Inventory has been collected.")
         logger.info("            Inventory has been collected.")      
         
-        # To check inventory type between License Only or WIP
-        inventoriesNotInRepo = report_data_db.get_inventories_not_in_repo(projectID)    # To handle WIP and License Only inventories
         inventoryItems += inventoriesNotInRepo
 
+        # Look up the possible licenses for all components in this project up front
+        report_data_db.load_component_possible_licenses(inventoryItem.get("component_id") for inventoryItem in inventoryItems)
+
+        # Collect the inventory level custom fields for the whole project at once
+        inventoryCustomFields = report_data_db.get_inventory_custom_field_values(projectID, ["Package Supplier", "Download Location"])
+
         for inventoryItem in inventoryItems:
             supplier = None # Set a default value to compare with
             inventoryType = inventoryItem["type"]
@@ -152,11 +167,11 @@ def gather_data_for_report(projectID, reportData):
 
             inventoryID = inventoryItem["inventoryID"]
 
-            # See if there is a custom filed at the inventory level for the "Package Supplier"
+            # See if there are custom fields at the inventory level for the "Package Supplier" and "Download Location"
+            customFieldValues = inventoryCustomFields.get(inventoryID, {})
 
-            packageSupplier = report_data_db.get_custom_field_value(inventoryID, "Package Supplier")
-            if packageSupplier is None:
-                packageSupplier = "N/A"
+            packageSupplier = customFieldValues.get("Package Supplier", "N/A")
+            downloadLocation = validate_download_location(customFieldValues.get("Download Location"), inventoryID)
             
 
             if inventoryType != "Component":
@@ -210,7 +225,14 @@ def gather_data_for_report(projectID, reportData):
     
             ##########################################
             # Manage Declared Licenses - These are the "possible" license based on data collection
-            declaredLicenses, hasExtractedLicensingInfos = manage_package_declared_licenses(inventoryItem, hasExtractedLicensingInfos)
+            # The same component can show up many times so reuse the expression once it is known
+            componentID = inventoryItem.get("component_id")
+            if componentID is not None and componentID in componentDeclaredLicenses:
+                declaredLicenses = componentDeclaredLicenses[componentID]
+            else:
+                declaredLicenses, hasExtractedLicensingInfos = manage_package_declared_licenses(inventoryItem, hasExtractedLicensingInfos)
+                if componentID is not None:
+                    componentDeclaredLicenses[componentID] = declaredLicenses
 
             ##########################################
             # Manage Concluded license
@@ -226,14 +248,14 @@ def gather_data_for_report(projectID, reportData):
             if externalRefs:
                 packageDetails["externalRefs"] = externalRefs
             packageDetails["homepage"] = homepage
-            packageDetails["downloadLocation"] = "NOASSERTION"  # TODO - use a inventory custom field to store this?
+            packageDetails["downloadLocation"] = downloadLocation
             packageDetails["copyrightText"] = (process_copyrights(inventoryItem["copyright"]) if includeCopyrightsData else "NOASSERTION")
             packageDetails["licenseDeclared"] = declaredLicenses
             packageDetails["licenseConcluded"] = concludedLicense
             packageDetails["supplier"] = supplier
 
-            # Manage file details related to this package
-            filePaths = report_data_db.get_inventory_item_file_paths(inventoryID, projectID)
+            # Manage file details related to this package (already indexed from the scanned files)
+            packageFiles = inventoryFiles.get(inventoryID, {}) if includeFileDetails else {}
             
             # Manange the relationship for this pacakge to the root item
             packageRelationship = {}
@@ -246,7 +268,7 @@ def gather_data_for_report(projectID, reportData):
 
 
             # Are there any files assocaited to this inventory item?
-            if len(filePaths) == 0 or not includeFileDetails: 
+            if len(packageFiles) == 0 or not includeFileDetails: 
                 packageDetails["filesAnalyzed"] = False
             else:
                 packageDetails["filesAnalyzed"] = True
@@ -255,20 +277,8 @@ def gather_data_for_report(projectID, reportData):
 
                 licenseInfoFromFiles = []
                 fileHashes = []
-                for filePath in filePaths:
-                    if filePath["PATH_"] in filePathtoID["inInventory"]:
-                        uniqueFileID = filePathtoID["inInventory"][filePath["PATH_"]]["uniqueFileID"]
-                        fileHashes.append(filePathtoID["inInventory"][filePath["PATH_"]]["fileSHA1"])
-                    elif filePath["PATH_"] in filePathtoID["notInInventory"]:
-                        uniqueFileID = filePathtoID["notInInventory"][filePath["PATH_"]]["uniqueFileID"]
-                        logger.critical("File path associated to inventory but not according to file details response!!")
-                        logger.critical("    File ID: %s   File Path: %s" %(uniqueFileID, filePath["PATH_"]))
-
-                        fileHashes.append(filePathtoID["notInInventory"][filePath["PATH_"]]["fileSHA1"])
-                    else:
-                        logger.critical("File path does not seem to be in or out of inventory!!")
-                        logger.critical("    File Path: %s" %(filePath["PATH_"]))
-                        continue
+                for uniqueFileID, fileSHA1 in packageFiles.items():
+                    fileHashes.append(fileSHA1)
                     
                     fileDetail = projectFileDetails[uniqueFileID]
                     fileSPDXID = fileDetail["SPDXID"]
@@ -385,6 +395,8 @@ def gather_data_for_report(projectID, reportData):
     reportData["projectList"] = projectList
     #reportData["packageFiles"] = packageFiles
 
+    report_data_db.save_query_cache()
+
     return reportData
 
 #----------------------------------------------
@@ -585,7 +597,7 @@ def manage_unassociated_files(filesNotInInventory, filePathtoID, rootSPDXID, cre
     packageDetails["SPDXID"] = packageSPDXID
     packageDetails["name"] = unassociatedFilesPackageName
     packageDetails["homepage"] = "NOASSERTION"
-    packageDetails["downloadLocation"] = "NOASSERTION"  # TODO - use a inventory custom field to store this?
+    packageDetails["downloadLocation"] = "NOASSERTION"  # Not an inventory item so there is no Download Location custom field
     packageDetails["copyrightText"] = (process_copyrights(unassociatedFilesCopyrights) if includeCopyrightsData else "NOASSERTION")
     packageDetails["licenseDeclared"] = "NOASSERTION"
     packageDetails["licenseConcluded"] = "NOASSERTION"
@@ -596,6 +608,20 @@ def manage_unassociated_files(filesNotInInventory, filePathtoID, rootSPDXID, cre
 
     return packageDetails, relationships
 
+#-------------------------------------------------------
+def validate_download_location(downloadLocation, inventoryID):
+    # The "Download Location" custom field is free text but SPDX only takes a download URL or
+    # VCS locator, NONE or NOASSERTION so anything else would make the document invalid
+    if downloadLocation is None or str(downloadLocation).strip() == "":
+        return "NOASSERTION"
+
+    downloadLocation = str(downloadLocation).strip()
+    if downloadLocation in ["NONE", "NOASSERTION"] or re.match(downloadLocationPattern, downloadLocation):
+        return downloadLocation
+
+    logger.warning("Inventory item %s has a Download Location of '%s' which is not a URL, NONE or NOASSERTION - using NOASSERTION" %(inventoryID, downloadLocation))
+    return "NOASSERTION"
+
 #-------------------------------------------------------
 def create_supplier_string(forge, componentName):
 
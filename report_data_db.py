@@ -9,164 +9,192 @@ Modified On: Mon 07 2025
 File : report_data_db.py
 """
 import sys
-import threading
-import subprocess
 import logging
 import os
-import configparser
-import json
+import time
 from packaging.version import parse as parse_version
 
+import report_data_db_cache
+import report_data_db_runner
+from report_data_db_runner import db_runner, get_db_vendor, get_query_name
+
 logger = logging.getLogger(__name__)
 
+# How get_project_evidence collects each batch of file evidence. "aggregate" returns one row per file
+# with its matches of each evidence type joined into a list by the database (MySQL and SQL Server),
+# "union" runs all evidence types as one combined query with a row per match, "separate" runs a query
+# per evidence type for databases whose tmpdir can't handle the combined query. Each mode falls back
+# to the next if it fails. Can also be set with the SPDX_EVIDENCE_QUERY_MODE environment variable
+user_evidence_query_mode = ""
+# Bounds and targets for the adaptive evidence batch size used by get_project_evidence. Each batch
+# is resized from the rows and time taken by the previous one to aim for both targets
+user_evidence_batch_floor = 100
+user_evidence_batch_ceiling = 5000
+user_evidence_batch_target_rows = 20000
+user_evidence_batch_target_seconds = 5.0
+# Number of files per ID range when streaming the scanned files of a project
+user_scanned_files_batch_size = 5000
+
+evidence_mode_env = os.environ.get('SPDX_EVIDENCE_QUERY_MODE')
+EVIDENCE_QUERY_MODE = (user_evidence_query_mode or evidence_mode_env or "aggregate").lower()
+EVIDENCE_RECORD_ORDER = ["BASE", "LICENSE", "EMAILURL", "COPYRIGHT", "SEARCHSTRING", "REMOTE"]
+# Column order of the file evidence records and of the scanned file rows in columnar form
+EVIDENCE_COLUMNS = ["ID", "PATH", "ALIAS", "LICENSE", "EMAILURL", "COPYRIGHT", "SEARCHSTRING", "DIGEST", "MATCHES", "REMOTE_ID"]
+SCANNED_FILE_COLUMNS = ["fileId", "filePath", "fileMD5", "fileSHA1", "inInventory"]
+# Joins the matches of a file in the aggregated evidence query, a character not found in evidence text
+EVIDENCE_LIST_SEPARATOR = "\x1f"
+
+
+class ColumnarResult:
+    """
+    A large result in compact form: the column names once and each row as a tuple of its values
+    in column order, rather than a dict per row that repeats every column name. The value of a
+    column is row[result.index[column]].
+    """
+    def __init__(self, columns, rows=None):
+        self.columns = list(columns)
+        self.index = {column: position for position, column in enumerate(self.columns)}
+        self.rows = [] if rows is None else rows
 
-# User can set this variable directly in code
-user_java_path = ""
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# Determine the correct Java executable name
-java_exec = "java.exe" if os.name == "nt" else "java"
-DEFAULT_JAVA_PATH = os.path.abspath(os.path.join(BASE_DIR, '..', '..', 'jre', 'bin', java_exec))
-# Check JAVA_HOME and construct the java path
-java_home = os.environ.get('JAVA_HOME')
-if user_java_path != "":
-    JAVA_PATH = user_java_path
-elif java_home:
-    JAVA_PATH = os.path.join(java_home, 'bin', java_exec)
-else:
-    JAVA_PATH = DEFAULT_JAVA_PATH
-
-if not os.path.exists(JAVA_PATH):
-    error_msg = (
-        f"Java executable not found at: {JAVA_PATH}\n"
-        "Please ensure Java is installed and accessible. You can:\n"
-        "1. Set the JAVA_HOME environment variable to your Java installation directory\n"
-        "2. Manually set the 'user_java_path' variable in this file:\n"
-        f"   {os.path.abspath(__file__)}\n"
-        f"   Example: user_java_path = r'C:\\Program Files\\Java\\jdk-11\\bin\\{java_exec}'"
-    )
-    logger.error(error_msg)
-    sys.exit(error_msg)
-
-print(f"Using Java path: {JAVA_PATH}")  # Debugging line to check the Java path
-JAR_PATH = os.path.join(BASE_DIR, '..', '..', 'samples', 'customreport_helper', 'DbConnection.jar')
-properties_file = os.path.join(BASE_DIR, '..', '..', 'config', 'core', 'core.db.properties')
-
-if not os.path.exists(JAR_PATH):
-    error_msg = (
-        "DbConnection.jar is missing at: "
-        f"{os.path.abspath(JAR_PATH)}. "
-        "This means your Code Insight server is older than 2025 R3. "
-        "Please upgrade to 2025 R3 or later, or get DbConnection.jar file from support "
-        "and place it in <Install Location>\\samples\\customreport_helper."
-    )
-    logger.error(error_msg)
-    sys.exit(error_msg)
+    def __len__(self):
+        return len(self.rows)
 
-class InteractiveDbQueryRunner:
-    def __init__(self, jar_path, java_path=JAVA_PATH):
-        try:
-            # Get absolute path to properties file
-            abs_properties_path = os.path.abspath(properties_file)
-            logger.info(f"Starting Java process with: {java_path} -jar {jar_path} {abs_properties_path}")
-            
-            self.proc = subprocess.Popen(
-                [java_path, "-jar", jar_path, abs_properties_path],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True,
-                bufsize=1
-            )
-            logger.info(f"Java process started with PID: {self.proc.pid}")
-            
-            # Check if process started successfully
-            import time
-            time.sleep(0.1)  # Give it a moment to start
-            if self.proc.poll() is not None:
-                stderr_output = self.proc.stderr.read() if self.proc.stderr else "No stderr available"
-                raise RuntimeError(f"Java process terminated immediately. Exit code: {self.proc.returncode}, stderr: {stderr_output}")
-                
-        except Exception as e:
-            logger.error(f"Failed to start Java process: {e}")
-            raise
-        
-        self.lock = threading.Lock()
-        
-        # Try to set autocommit on
-        try:
-            self.run_query("SET autocommit = true;")
-            logger.info("Set database autocommit to true")
-        except Exception as e:
-            logger.warning(f"Could not set autocommit mode: {e}")
-
-    def run_query(self, sql_query):
-        with self.lock:
-            if self.proc.poll() is not None:
-                raise RuntimeError("Java process is not running")
-            self.proc.stdin.write(sql_query + "\n")
-            self.proc.stdin.flush()
-            output = ""
-            while True:
-                line = self.proc.stdout.readline()
-                if not line:
-                    break
-                output += line
-                if line.strip().endswith("]") or line.strip().endswith("}"):
-                    break
-            try:
-                return json.loads(output)
-            except json.JSONDecodeError:
-                return []
+    def __iter__(self):
+        return iter(self.rows)
 
-    def close(self):
-        if self.proc and self.proc.poll() is None:
-            try:
-                if self.proc.stdin:
-                    self.proc.stdin.write("exit\n")
-                    self.proc.stdin.flush()
-            except Exception as e:
-                logger.warning(f"Error sending exit to Java process: {e}")
-            try:
-                self.proc.terminate()
-            except Exception as e:
-                logger.warning(f"Error terminating Java process: {e}")
-            self.proc = None
-db_runner = InteractiveDbQueryRunner(JAR_PATH, JAVA_PATH)
-
-
-def get_db_vendor():
-    global db_vendor # Declare db_vendor as global variable
-    is_property_file_exists = check_properties_file_exists()
-    if is_property_file_exists:
-        logger.info("Reading core.db.properties file")
-        with open(properties_file, 'r') as file:
-            # Add a dummy section header to make it compatible with configparser
-            lines = ['[DEFAULT]\n']
-            for line in file:
-                # Skip comments starting with #
-                if not line.strip().startswith('#'):
-                    lines.append(line)
-    
-        config = configparser.ConfigParser()
-        config.read_string(''.join(lines))
+    def dicts(self):
+        """The rows as dicts, the form the queries normally return."""
+        return [dict(zip(self.columns, row)) for row in self.rows]
 
-        # Read database configuration from the selected section
-        db_vendor = config['DEFAULT']['db.vendor']
-        if db_vendor is not None:
-            return db_vendor.lower()
 
-def check_properties_file_exists():
+def run_columnar_query(sql_query, query_name=None, spool=False):
+    """run_query with the rows returned as a ColumnarResult. An error response is returned as it is."""
+    rows = db_runner.iter_query(sql_query, query_name or get_query_name(), spool=spool)
+    result = None
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration as finished:
+            if finished.value is not None:
+                return finished.value
+            return result if result is not None else ColumnarResult([])
+        if result is None:
+            result = ColumnarResult(row)
+        # Each row dict is dropped as soon as its values have been taken
+        result.rows.append(tuple(map(row.get, result.columns)))
+
+
+class EvidenceBatchSizer:
+    """
+    Picks the number of files for each evidence batch. The rows returned per file vary a lot
+    between projects (and within a project) so the size of the next batch is scaled from the
+    rows and latency of the last one, bounded by the floor and ceiling.
+
+    The sizes depend on timings, so they are written to a query recording and a replay takes
+    them from the recording rather than working them out again. That way the replay asks for
+    the same ID ranges as the recorded run.
+    """
+    def __init__(self, initial_size, floor=user_evidence_batch_floor, ceiling=user_evidence_batch_ceiling,
+                 target_rows=user_evidence_batch_target_rows, target_seconds=user_evidence_batch_target_seconds, project_id=None):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.target_rows = target_rows
+        self.target_seconds = target_seconds
+        self.size = self._bound(initial_size)
+        self.project_id = project_id
+        self.replayed_sizes = db_runner.recorded_batch_sizes(project_id) if report_data_db_runner.DB_REPLAY_FILE else None
+
+    def _bound(self, size):
+        return min(self.ceiling, max(self.floor, int(size)))
+
+    def record(self, file_count, row_count, elapsed):
+        """Resize from a completed batch of file_count files. Returns the next batch size."""
+        if self.replayed_sizes is not None:
+            if self.replayed_sizes:
+                self.size = self.replayed_sizes.popleft()
+            logger.info(f"Evidence batch of {file_count} files returned {row_count} rows - next batch size {self.size} (from the recording)")
+            return self.size
+        ratios = []
+        if row_count > 0:
+            ratios.append(self.target_rows / row_count)
+        if elapsed > 0:
+            ratios.append(self.target_seconds / elapsed)
+        if ratios and file_count > 0:
+            # Scale by whichever target is furthest off, at most halving or doubling per batch
+            ratio = min(2.0, max(0.5, min(ratios)))
+            self.size = self._bound(file_count * ratio)
+        logger.info(f"Evidence batch of {file_count} files returned {row_count} rows in {elapsed:.2f}s - next batch size {self.size}")
+        if report_data_db_runner.query_recorder:
+            report_data_db_runner.query_recorder.record_batch_size(self.project_id, self.size)
+        return self.size
+
+
+inventory_custom_field_names = None
+missing_custom_field_labels = set()
+component_possible_licenses = {}
+
+
+def open_query_cache(project_id, project_ids):
+    """
+    Start using the on disk query cache for a report on project_id (covering project_ids) if it
+    has been enabled. The project data stamp is read once here to decide if the cache is current.
+    """
+    if not report_data_db_cache.QUERY_CACHE_ENABLED:
+        return
+    stamp = get_project_data_stamp(project_ids)
+    if stamp is None:
+        logger.warning("Unable to read the project data stamp - query cache disabled for this run")
+        return
     try:
-        with open(properties_file, 'r') as file:
-            return True
-    except FileNotFoundError:
-        print(f"Properties file {properties_file} not found.")
-        return False
+        cache_dir = os.path.join(report_data_db_cache.QUERY_CACHE_DIR, f"project_{project_id}")
+        # The runners look the queries up in it from here on
+        report_data_db_runner.query_cache = report_data_db_cache.QueryResultCache(cache_dir, stamp)
+    except OSError as e:
+        logger.warning(f"Unable to set up the query cache: {e} - query cache disabled for this run")
+
+def save_query_cache():
+    if report_data_db_runner.query_cache is not None:
+        report_data_db_runner.query_cache.close()
+        report_data_db_runner.query_cache = None
+
+def get_project_data_stamp(project_ids):
+    """
+    Row counts, highest IDs and a checksum of the inventory for the projects, and of the license
+    table. Any scan, inventory or license change moves at least one of the values. None if the
+    query failed.
+    """
+    id_list = ','.join(str(id) for id in project_ids)
+    inventory_columns = "ID_, NAME_, REPOSITORY_ITEM_ID_, LICENSE_ID_, USAGE_TEXT_, PRIORITY_ID_, DISTRIBUTION_TYPE_, COPYRIGHT_TEXT_, DEPENDENCY_SCOPE_, NOTICE_TEXT_, DESCRIPTION_, PUBLISHED_"
+    license_columns = "ID_, NAME_, SHORT_NAME_, SPDX_LICENSE_IDENTIFIER_, URL_"
+    if get_db_vendor() == "mysql":
+        inventory_checksum = f"SUM(CRC32(CONCAT_WS('|', {inventory_columns})))"
+        license_checksum = f"SUM(CRC32(CONCAT_WS('|', {license_columns})))"
+    else:
+        inventory_checksum = f"CHECKSUM_AGG(CHECKSUM({inventory_columns}))"
+        license_checksum = f"CHECKSUM_AGG(CHECKSUM({license_columns}))"
+    sql = (f"SELECT 'SCANNED_FILES' AS stampPart, COUNT(*) AS rowCount, MAX(ID_) AS maxId, SUM(NONSCF_RESULT_ID_) AS checksum FROM PSE_SCANNED_FILES WHERE PROJECT_ID_ IN ({id_list})"
+           f" UNION ALL SELECT 'REMOTE_FILES', COUNT(*), MAX(ID_), NULL FROM PSE_REMOTE_SCANNED_FILES WHERE PROJECT_ID_ IN ({id_list})"
+           f" UNION ALL SELECT 'INVENTORY_FILES', COUNT(*), MAX(GF.FILE_ID_), SUM(GF.GROUP_ID_) FROM PSE_INVENTORY_GROUP_FILES GF JOIN PSE_INVENTORY_GROUPS IG ON IG.ID_ = GF.GROUP_ID_ WHERE IG.PROJECT_ID_ IN ({id_list})"
+           f" UNION ALL SELECT 'INVENTORY', COUNT(*), MAX(ID_), {inventory_checksum} FROM PSE_INVENTORY_GROUPS WHERE PROJECT_ID_ IN ({id_list})"
+           f" UNION ALL SELECT 'LICENSES', COUNT(*), MAX(ID_), {license_checksum} FROM PDL_LICENSE;")
+    result = db_runner.run_query(sql, "get_project_data_stamp")
+    if not isinstance(result, list) or not result:
+        logger.warning(f"Unexpected result from project data stamp query: {result}")
+        return None
+    return {"projects": list(project_ids), "parts": result}
 
 def get_projects_data(project_id):
-    sql = f"SELECT NAME_ AS topLevelProjectName FROM PAS_PROJECT WHERE ID_ = {project_id};"
-    result = db_runner.run_query(sql)
+    return _project_name(project_id, db_runner.run_query(_project_name_sql(project_id)))
+
+def get_project_names(project_ids):
+    """{project ID: name} for several projects, the lookups pipelined rather than run one after another."""
+    futures = [(project_id, db_runner.submit(_project_name_sql(project_id), "get_projects_data")) for project_id in project_ids]
+    return {project_id: _project_name(project_id, future.result()) for project_id, future in futures}
+
+def _project_name_sql(project_id):
+    return f"SELECT NAME_ AS topLevelProjectName FROM PAS_PROJECT WHERE ID_ = {project_id};"
+
+def _project_name(project_id, result):
     if result and isinstance(result, list) and len(result) > 0 and 'topLevelProjectName' in result[0]:
         return result[0]['topLevelProjectName']
     else:
@@ -202,11 +230,23 @@ def get_patch_comp_version(component_id, version_name):
         return None
     return str(max(higher_versions, key=parse_version))
 
+def get_project_inventory(project_id):
+    """
+    The inventory items of a project and its License Only and WIP items (see
+    get_inventories_not_in_repo). The two queries are pipelined to the runner.
+    """
+    inventory_items = db_runner.submit(_inventory_data_sql(project_id), "get_inventory_data")
+    inventories_not_in_repo = db_runner.submit(_inventories_not_in_repo_sql(project_id), "get_inventories_not_in_repo")
+    return inventory_items.result(), inventories_not_in_repo.result()
+
 def get_inventory_data(project_id):
+    return db_runner.run_query(_inventory_data_sql(project_id))
+
+def _inventory_data_sql(project_id):
     # LEFT JOIN both version tables so that custom versions (PDL_COMPONENT_VERSION_CUSTOM)
     # are resolved via COALESCE instead of returning NULL for componentVersionName.
     sql = f"""SELECT REPO_TAB.ITEM_TYPE_ AS inventoryType, 'Component' AS type, REPO_TAB.COMPONENT_ID_ AS component_id, REPO_TAB.COMPONENT_VERSION_ID_ AS component_version_id, FORGE.NAME_ AS forge, INV_GRP.ID_ AS inventoryID, INV_GRP.NAME_ AS inventoryItemName, INV_GRP.USAGE_TEXT_ AS usageText, INV_GRP.PARENT_GROUP_ID_ AS parentGroupId, INV_GRP.PRIORITY_ID_ AS priority, INV_GRP.AUDITOR_REVIEW_NOTES_ AS auditNotes, INV_GRP.DISTRIBUTION_TYPE_ AS disType, INV_GRP.COPYRIGHT_TEXT_ AS copyright, INV_GRP.DEPENDENCY_SCOPE_ AS dependencyScope, INV_GRP.AS_FOUND_TEXT_ AS asFoundLicenseText, INV_GRP.NOTICE_TEXT_ AS noticeText, COMP.NAME_ AS componentName, COALESCE(COMP_VER.VERSION_NAME_, CUST_COMP_VER.VERSION_NAME_) AS componentVersionName, COMP.ID_ AS componentId, COMP.URL_ AS componentUrl, INV_GRP.DESCRIPTION_ AS componentDescription, LIC.SPDX_LICENSE_IDENTIFIER_ AS selectedLicenseSPDXIdentifier, LIC.NAME_ AS selectedLicenseName, LIC.SHORT_NAME_ AS shortName, LIC.URL_ AS selectedLicenseUrl FROM PSE_INVENTORY_GROUPS INV_GRP JOIN PAS_REPOSITORY_ITEM REPO_TAB ON INV_GRP.REPOSITORY_ITEM_ID_ = REPO_TAB.ID_ JOIN PDL_COMPONENT COMP ON REPO_TAB.COMPONENT_ID_ = COMP.ID_ JOIN PDL_FORGE FORGE ON FORGE.ID_ = COMP.FORGE_ID_ LEFT JOIN PDL_COMPONENT_VERSION COMP_VER ON REPO_TAB.COMPONENT_VERSION_ID_ = COMP_VER.ID_ LEFT JOIN PDL_COMPONENT_VERSION_CUSTOM CUST_COMP_VER ON REPO_TAB.COMPONENT_VERSION_ID_ = CUST_COMP_VER.ID_ JOIN PDL_LICENSE LIC ON REPO_TAB.LICENSE_ID_ = LIC.ID_ WHERE INV_GRP.PROJECT_ID_ = {project_id} and INV_GRP.PUBLISHED_ =1;"""
-    return db_runner.run_query(sql)
+    return sql
 
 def get_inventory_data_custom(project_id):
     sql = f"""SELECT REPO_TAB.ITEM_TYPE_ AS inventoryType, 'Component' AS type, REPO_TAB.COMPONENT_ID_ AS component_id, REPO_TAB.COMPONENT_VERSION_ID_ AS component_version_id, FORGE.NAME_ AS forge, INV_GRP.ID_ AS inventoryID, INV_GRP.NAME_ AS inventoryItemName, INV_GRP.USAGE_TEXT_ AS usageText, INV_GRP.PARENT_GROUP_ID_ AS parentGroupId, INV_GRP.PRIORITY_ID_ AS priority, INV_GRP.AUDITOR_REVIEW_NOTES_ AS auditNotes, INV_GRP.DISTRIBUTION_TYPE_ AS disType, INV_GRP.COPYRIGHT_TEXT_ AS copyright, INV_GRP.DEPENDENCY_SCOPE_ AS dependencyScope, INV_GRP.AS_FOUND_TEXT_ AS asFoundLicenseText, INV_GRP.NOTICE_TEXT_ AS noticeText, COMP.NAME_ AS componentName, CUST_COMP_VER.VERSION_NAME_ AS componentVersionName, COMP.ID_ AS componentId, COMP.URL_ AS componentUrl, INV_GRP.DESCRIPTION_ AS componentDescription, LIC.SPDX_LICENSE_IDENTIFIER_ AS selectedLicenseSPDXIdentifier, LIC.NAME_ AS selectedLicenseName, LIC.SHORT_NAME_ AS shortName, LIC.URL_ AS selectedLicenseUrl FROM PSE_INVENTORY_GROUPS INV_GRP JOIN PAS_REPOSITORY_ITEM REPO_TAB ON INV_GRP.REPOSITORY_ITEM_ID_ = REPO_TAB.ID_ JOIN PDL_COMPONENT COMP ON REPO_TAB.COMPONENT_ID_ = COMP.ID_ JOIN PDL_FORGE FORGE ON FORGE.ID_ = COMP.FORGE_ID_ JOIN PDL_COMPONENT_VERSION_CUSTOM CUST_COMP_VER ON REPO_TAB.COMPONENT_VERSION_ID_ = CUST_COMP_VER.ID_ JOIN PDL_LICENSE LIC ON REPO_TAB.LICENSE_ID_ = LIC.ID_ WHERE INV_GRP.PROJECT_ID_ = {project_id} and INV_GRP.PUBLISHED_ =1;"""    
@@ -245,25 +285,87 @@ def get_component_version_vex_vulnerabilities(project_id, component_version_id):
     return db_runner.run_query(sql)
 
 def get_child_projects(project_id):
+    project_ids, _ = get_project_hierarchy(project_id)
+    return project_ids
+
+def get_project_hierarchy(project_id):
+    """
+    The project and all of its subprojects in breadth first order along with the (parent, child)
+    edges between them. The hierarchy comes back from a single recursive query where the database
+    supports it, otherwise it is collected one level at a time.
+    """
+    logger.info("Entering get_project_hierarchy")
+    edges = get_project_hierarchy_edges(project_id)
+    if edges is None:
+        logger.info("Recursive hierarchy query not available - collecting subprojects one level at a time")
+        edges = get_project_hierarchy_edges_by_level(project_id)
+
+    # Walk the edges breadth first so the projects are in the same order as a level by level walk.
+    # The IDs are matched as strings since the top level project ID comes from the command line
+    sub_projects = {}
+    for parent_id, sub_id in edges:
+        sub_projects.setdefault(str(parent_id), [])
+        if sub_id not in sub_projects[str(parent_id)]:
+            sub_projects[str(parent_id)].append(sub_id)
+
     project_ids = [project_id]
-    subproject_ids_to_process = [project_id]
-    logger.info("Entering get_child_projects (recursive)")
-    while subproject_ids_to_process:
-        current_project_id = subproject_ids_to_process.pop(0)
-        sql = f"SELECT SUBPROJECT_ID_ as subProjectId FROM PAS_PROJECT_HIERARCHY WHERE PROJECT_ID_ = {current_project_id};"
-        result = db_runner.run_query(sql)
-        sub_ids = []
-        if isinstance(result, list) and result:
-            sub_ids = [row['subProjectId'] for row in result if 'subProjectId' in row and row['subProjectId'] is not None]
-        elif result:
-            logger.warning(f"Unexpected result format in get_child_projects for project {current_project_id}: {result}")
-        if not sub_ids:
-            logger.info(f"No subprojects found for project {current_project_id}")
-        for sub_id in sub_ids:
-            if sub_id not in project_ids:
+    seen_project_ids = {str(project_id)}
+    hierarchy_edges = []
+    for current_project_id in project_ids:  # project_ids grows as subprojects are found
+        for sub_id in sub_projects.get(str(current_project_id), []):
+            hierarchy_edges.append((current_project_id, sub_id))
+            if str(sub_id) not in seen_project_ids:
+                seen_project_ids.add(str(sub_id))
                 project_ids.append(sub_id)
-                subproject_ids_to_process.append(sub_id)
-    return project_ids
+
+    logger.info(f"Project {project_id} has {len(project_ids) - 1} subprojects")
+    return project_ids, hierarchy_edges
+
+def get_project_hierarchy_edges(project_id):
+    """All (parent, child) edges below project_id from one recursive CTE, or None if that failed."""
+    if get_db_vendor() == "mysql":
+        # UNION rather than UNION ALL drops edges that were already found, which stops the recursion on cycles
+        sql = (f"WITH RECURSIVE HIERARCHY (PROJECT_ID_, SUBPROJECT_ID_) AS ("
+               f"SELECT PROJECT_ID_, SUBPROJECT_ID_ FROM PAS_PROJECT_HIERARCHY WHERE PROJECT_ID_ = {project_id} "
+               f"UNION SELECT PH.PROJECT_ID_, PH.SUBPROJECT_ID_ FROM PAS_PROJECT_HIERARCHY PH JOIN HIERARCHY H ON PH.PROJECT_ID_ = H.SUBPROJECT_ID_) "
+               f"SELECT PROJECT_ID_ AS projectId, SUBPROJECT_ID_ AS subProjectId FROM HIERARCHY;")
+    else:
+        # SQL Server only allows UNION ALL in a recursive CTE so carry the path of each row and stop
+        # before a project that is already on it. The path bounds the depth so lift the default limit of 100
+        sql = (f"WITH HIERARCHY (PROJECT_ID_, SUBPROJECT_ID_, PATH_) AS ("
+               f"SELECT PROJECT_ID_, SUBPROJECT_ID_, CAST(CONCAT('/', PROJECT_ID_, '/', SUBPROJECT_ID_, '/') AS VARCHAR(4000)) FROM PAS_PROJECT_HIERARCHY WHERE PROJECT_ID_ = {project_id} "
+               f"UNION ALL SELECT PH.PROJECT_ID_, PH.SUBPROJECT_ID_, CAST(CONCAT(H.PATH_, PH.SUBPROJECT_ID_, '/') AS VARCHAR(4000)) FROM PAS_PROJECT_HIERARCHY PH JOIN HIERARCHY H ON PH.PROJECT_ID_ = H.SUBPROJECT_ID_ "
+               f"WHERE H.PATH_ NOT LIKE CONCAT('%/', PH.SUBPROJECT_ID_, '/%')) "
+               f"SELECT PROJECT_ID_ AS projectId, SUBPROJECT_ID_ AS subProjectId FROM HIERARCHY OPTION (MAXRECURSION 0);")
+    result = db_runner.run_query(sql)
+    if not isinstance(result, list):
+        logger.warning(f"Unexpected result from recursive hierarchy query for project {project_id}: {result}")
+        return None
+    return [(row['projectId'], row['subProjectId']) for row in result if row['subProjectId'] is not None]
+
+def get_project_hierarchy_edges_by_level(project_id):
+    """All (parent, child) edges below project_id with one query per level of the hierarchy."""
+    edges = []
+    seen_project_ids = {str(project_id)}
+    current_level = [project_id]
+    while current_level:
+        id_list = ','.join(str(id) for id in current_level)
+        sql = f"SELECT PROJECT_ID_ AS projectId, SUBPROJECT_ID_ AS subProjectId FROM PAS_PROJECT_HIERARCHY WHERE PROJECT_ID_ IN ({id_list});"
+        result = db_runner.run_query(sql)
+        if not isinstance(result, list):
+            logger.warning(f"Unexpected result format in get_project_hierarchy_edges_by_level for projects {id_list}: {result}")
+            break
+        next_level = []
+        for row in result:
+            sub_id = row['subProjectId']
+            if sub_id is None:
+                continue
+            edges.append((row['projectId'], sub_id))
+            if str(sub_id) not in seen_project_ids:
+                seen_project_ids.add(str(sub_id))
+                next_level.append(sub_id)
+        current_level = next_level
+    return edges
 
 def get_inventory_files(project_id, inventory_id):
     sql = f"SELECT SCAN_FILE.PATH_ AS filePath, SCAN_FILE.MD5_ AS md5, SCAN_FILE.SHA1_ AS sha1 FROM PSE_INVENTORY_GROUP_FILES GRP_FILES JOIN PSE_SCANNED_FILES SCAN_FILE ON SCAN_FILE.ID_ = GRP_FILES.FILE_ID_  where PROJECT_ID_={project_id} and GRP_FILES.GROUP_ID_={inventory_id};"
@@ -271,12 +373,10 @@ def get_inventory_files(project_id, inventory_id):
 
 def get_custom_field_value(inventory_id, field_label="Archive Property"):
     # Step 1: Get the custom field column name for the given label
-    sql_meta = f"SELECT FIELD_NAME_ FROM PAS_INVENTORY_FLEX_FIELDS_METADATA WHERE FIELD_LABEL_ = '{field_label}';"
-    meta_result = db_runner.run_query(sql_meta)
-    if not meta_result or not meta_result[0].get('FIELD_NAME_'):
-        logger.warning(f"No custom field metadata found for '{field_label}'")
+    field_name = get_inventory_custom_field_names().get(field_label)
+    if not field_name:
+        warn_missing_custom_field(field_label)
         return "N/A"
-    field_name = meta_result[0]['FIELD_NAME_']
     # Step 2: Build and execute the value query using the column name
     sql_value = f"SELECT {field_name} AS CustomFieldValue FROM PAS_INVENTORY_FLEX_FIELDS WHERE INVENTORY_ID_={inventory_id};"
     result = db_runner.run_query(sql_value)
@@ -286,28 +386,84 @@ def get_custom_field_value(inventory_id, field_label="Archive Property"):
         logger.warning(f"No custom field value found for inventory ID: {inventory_id} and label: {field_label}")
         return "N/A"
 
+def get_inventory_custom_field_names():
+    # The field metadata is the same for every inventory item so only look it up once per run
+    global inventory_custom_field_names
+    if inventory_custom_field_names is None:
+        logger.info("Entering get_inventory_custom_field_names")
+        sql = "SELECT FIELD_LABEL_, FIELD_NAME_ FROM PAS_INVENTORY_FLEX_FIELDS_METADATA;"
+        result = db_runner.run_query(sql)
+        field_names = {}
+        if isinstance(result, list):
+            for row in result:
+                if row.get('FIELD_LABEL_') and row.get('FIELD_NAME_'):
+                    field_names.setdefault(row['FIELD_LABEL_'], row['FIELD_NAME_'])
+        inventory_custom_field_names = field_names
+    return inventory_custom_field_names
+
+def warn_missing_custom_field(field_label):
+    # The metadata is only read once so a missing field is only reported once per run, not per project or item
+    if field_label not in missing_custom_field_labels:
+        missing_custom_field_labels.add(field_label)
+        logger.warning(f"No custom field metadata found for '{field_label}'")
+
+def get_inventory_custom_field_values(project_id, field_labels):
+    """
+    Collect the given inventory custom fields for every inventory item of a project with a
+    single query. Returns {inventoryID: {label: value}} and leaves out empty values.
+    """
+    logger.info("Entering get_inventory_custom_field_values")
+    field_names = get_inventory_custom_field_names()
+    fields = []
+    for field_label in field_labels:
+        if field_label in field_names:
+            fields.append((field_label, field_names[field_label]))
+        else:
+            warn_missing_custom_field(field_label)
+    if not fields:
+        return {}
+
+    # Alias the columns by position since the labels are free text
+    columns = ", ".join(f"FLEX.{field_name} AS field{index}" for index, (field_label, field_name) in enumerate(fields))
+    sql = f"SELECT FLEX.INVENTORY_ID_ AS inventoryID, {columns} FROM PAS_INVENTORY_FLEX_FIELDS FLEX JOIN PSE_INVENTORY_GROUPS INV_GRP ON INV_GRP.ID_ = FLEX.INVENTORY_ID_ WHERE INV_GRP.PROJECT_ID_ = {project_id};"
+    custom_field_values = {}
+    for row in db_runner.iter_query(sql):
+        values = {}
+        for index, (field_label, field_name) in enumerate(fields):
+            if row.get(f"field{index}"):
+                values[field_label] = row[f"field{index}"]
+        if values:
+            custom_field_values[row['inventoryID']] = values
+    return custom_field_values
+
 def get_project_application_details(project_id):
     logger.debug("Entering get_project_application_details.")
 
-    def _get_project_custom_field(field_label):
-        """Return the value of a project-level custom field, or None if not set."""
-        sql_meta = f"SELECT FIELD_NAME_ FROM PAS_PROJECT_CUSTOM_FIELDS_METADATA WHERE FIELD_LABEL_ = '{field_label}';"
-        meta_result = db_runner.run_query(sql_meta)
+    # The project level custom fields, their lookups pipelined since none depends on another
+    field_labels = ['Application Name', 'Application Version', 'Application Publisher']
+    project_name = db_runner.submit(_project_name_sql(project_id), "get_projects_data")
+    meta_results = [db_runner.submit("SELECT FIELD_NAME_ FROM PAS_PROJECT_CUSTOM_FIELDS_METADATA WHERE FIELD_LABEL_ = ?;", params=[field_label]) for field_label in field_labels]
+    value_results = {}
+    for field_label, meta_result in zip(field_labels, meta_results):
+        meta_result = meta_result.result()
         if not meta_result or not isinstance(meta_result, list) or len(meta_result) == 0 or not meta_result[0].get('FIELD_NAME_'):
             logger.warning(f"No project custom field metadata found for '{field_label}'")
-            return None
+            continue
         field_name = meta_result[0]['FIELD_NAME_']
         sql_value = f"SELECT {field_name} AS fieldValue FROM PAS_PROJECT_CUSTOM_FIELDS WHERE PROJECT_ID_ = {project_id};"
-        result = db_runner.run_query(sql_value)
+        value_results[field_label] = db_runner.submit(sql_value)
+
+    field_values = {}
+    for field_label, result in value_results.items():
+        result = result.result()
         if result and isinstance(result, list) and len(result) > 0 and result[0].get('fieldValue'):
-            return result[0]['fieldValue']
-        return None
+            field_values[field_label] = result[0]['fieldValue']
 
-    projectName = get_projects_data(project_id)
+    projectName = _project_name(project_id, project_name.result())
 
-    applicationName = _get_project_custom_field('Application Name')
-    applicationVersion = _get_project_custom_field('Application Version')
-    applicationPublisher = _get_project_custom_field('Application Publisher')
+    applicationName = field_values.get('Application Name')
+    applicationVersion = field_values.get('Application Version')
+    applicationPublisher = field_values.get('Application Publisher')
 
     if applicationName is None:
         applicationName = projectName
@@ -336,27 +492,88 @@ def get_project_application_details(project_id):
 
 def get_server_scanned_files(projectID, includeUnassociatedFiles):
     logger.info("Entering get_server_scanned_files")
+    result = db_runner.run_query(_server_scanned_files_sql(projectID, includeUnassociatedFiles), spool=True)
+    return result
+
+def iter_server_scanned_files(projectID, includeUnassociatedFiles, columnar=False):
+    """The scanned files as dicts, or as tuples of SCANNED_FILE_COLUMNS if columnar."""
+    logger.info("Entering iter_server_scanned_files")
+    for id_range in iter_id_ranges("PSE_SCANNED_FILES", projectID, user_scanned_files_batch_size):
+        rows = db_runner.iter_query(_server_scanned_files_sql(projectID, includeUnassociatedFiles, id_range), spool=True)
+        yield from (map(scanned_file_values, rows) if columnar else rows)
+
+def _server_scanned_files_sql(projectID, includeUnassociatedFiles, id_range=None):
+    range_filter = "" if id_range is None else " AND " + id_range_filter("SCAN_FILE.ID_", id_range)
     if includeUnassociatedFiles:
-        server_scanned_files_query = f"SELECT SCAN_FILE.ID_ AS fileId, SCAN_FILE.PATH_ AS filePath, SCAN_FILE.MD5_ AS fileMD5, SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ inInventory FROM PSE_SCANNED_FILES SCAN_FILE LEFT JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID};"
+        server_scanned_files_query = f"SELECT SCAN_FILE.ID_ AS fileId, SCAN_FILE.PATH_ AS filePath, SCAN_FILE.MD5_ AS fileMD5, SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ inInventory FROM PSE_SCANNED_FILES SCAN_FILE LEFT JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID}{range_filter};"
     else:
-        server_scanned_files_query = f"SELECT SCAN_FILE.ID_ AS fileId, SCAN_FILE.PATH_ AS filePath, SCAN_FILE.MD5_ AS fileMD5, SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ inInventory FROM PSE_SCANNED_FILES SCAN_FILE JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID};"
-    result = db_runner.run_query(server_scanned_files_query)
-    return result
+        server_scanned_files_query = f"SELECT SCAN_FILE.ID_ AS fileId, SCAN_FILE.PATH_ AS filePath, SCAN_FILE.MD5_ AS fileMD5, SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ inInventory FROM PSE_SCANNED_FILES SCAN_FILE JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID}{range_filter};"
+    return server_scanned_files_query
 
 def get_remote_scanned_files(projectID, includeUnassociatedFiles):
     logger.info("Entering get_remote_scanned_files")
-    if includeUnassociatedFiles:
-        remote_scanned_files_query = f"SELECT REMOTE_SCAN_FILE.ID_ AS fileId, REMOTE_SCAN_FILE.PATH_ AS filePath, REMOTE_SCAN_FILE.MD5_ AS fileMD5, REMOTE_SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ AS inInventory FROM PSE_REMOTE_SCANNED_FILES REMOTE_SCAN_FILE LEFT JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON REMOTE_SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID};"
-    else:
-        remote_scanned_files_query = f"SELECT REMOTE_SCAN_FILE.ID_ AS fileId, REMOTE_SCAN_FILE.PATH_ AS filePath, REMOTE_SCAN_FILE.MD5_ AS fileMD5, REMOTE_SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ AS inInventory FROM PSE_REMOTE_SCANNED_FILES REMOTE_SCAN_FILE JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON REMOTE_SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID};"
-    result = db_runner.run_query(remote_scanned_files_query)
+    result = db_runner.run_query(_remote_scanned_files_sql(projectID, includeUnassociatedFiles), spool=True)
     logger.info(result)
     return result
 
-def get_project_evidence(projectID):
+def iter_remote_scanned_files(projectID, includeUnassociatedFiles, columnar=False):
+    """The remote scanned files as dicts, or as tuples of SCANNED_FILE_COLUMNS if columnar."""
+    logger.info("Entering iter_remote_scanned_files")
+    for id_range in iter_id_ranges("PSE_REMOTE_SCANNED_FILES", projectID, user_scanned_files_batch_size):
+        rows = db_runner.iter_query(_remote_scanned_files_sql(projectID, includeUnassociatedFiles, id_range), spool=True)
+        yield from (map(scanned_file_values, rows) if columnar else rows)
+
+def scanned_file_values(row):
+    return tuple(map(row.get, SCANNED_FILE_COLUMNS))
+
+def _remote_scanned_files_sql(projectID, includeUnassociatedFiles, id_range=None):
+    range_filter = "" if id_range is None else " AND " + id_range_filter("REMOTE_SCAN_FILE.ID_", id_range)
+    if includeUnassociatedFiles:
+        remote_scanned_files_query = f"SELECT REMOTE_SCAN_FILE.ID_ AS fileId, REMOTE_SCAN_FILE.PATH_ AS filePath, REMOTE_SCAN_FILE.MD5_ AS fileMD5, REMOTE_SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ AS inInventory FROM PSE_REMOTE_SCANNED_FILES REMOTE_SCAN_FILE LEFT JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON REMOTE_SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID}{range_filter};"
+    else:
+        remote_scanned_files_query = f"SELECT REMOTE_SCAN_FILE.ID_ AS fileId, REMOTE_SCAN_FILE.PATH_ AS filePath, REMOTE_SCAN_FILE.MD5_ AS fileMD5, REMOTE_SCAN_FILE.SHA1_ AS fileSHA1, GRP_FILES.GROUP_ID_ AS inInventory FROM PSE_REMOTE_SCANNED_FILES REMOTE_SCAN_FILE JOIN PSE_INVENTORY_GROUP_FILES GRP_FILES ON REMOTE_SCAN_FILE.ID_ = GRP_FILES.FILE_ID_ WHERE PROJECT_ID_ = {projectID}{range_filter};"
+    return remote_scanned_files_query
+
+def iter_id_ranges(table_name, project_id, batch_size):
+    """
+    Keyset batches over the rows of a project in table_name, yielded as (lower_id, upper_id)
+    pairs for id_range_filter. Only the boundary of each batch is fetched so memory use does not
+    grow with the project. batch_size can be a number or a function giving the next batch size.
+    """
+    lower_id = None
+    while True:
+        size = batch_size() if callable(batch_size) else batch_size
+        upper_id = get_id_range_upper_bound(table_name, project_id, lower_id, size)
+        if upper_id is None:
+            return
+        yield lower_id, upper_id
+        lower_id = upper_id
+
+def get_id_range_upper_bound(table_name, project_id, lower_id, batch_size):
+    lower_filter = "" if lower_id is None else f" AND ID_ > {lower_id}"
+    if get_db_vendor() == "mysql":
+        sql = f"SELECT MAX(ID_) AS upperId FROM (SELECT ID_ FROM {table_name} WHERE PROJECT_ID_ = {project_id}{lower_filter} ORDER BY ID_ LIMIT {batch_size}) RANGE_IDS;"
+    else:
+        sql = f"SELECT MAX(ID_) AS upperId FROM (SELECT TOP {batch_size} ID_ FROM {table_name} WHERE PROJECT_ID_ = {project_id}{lower_filter} ORDER BY ID_) RANGE_IDS;"
+    result = db_runner.run_query(sql)
+    if not isinstance(result, list):
+        raise RuntimeError(f"Unable to get the next ID range of {table_name}: {result}")
+    if not result or result[0]['upperId'] is None:
+        return None
+    return int(result[0]['upperId'])
+
+def id_range_filter(column, id_range):
+    lower_id, upper_id = id_range
+    if lower_id is None:
+        return f"{column} <= {upper_id}"
+    return f"{column} > {lower_id} AND {column} <= {upper_id}"
+
+def get_project_evidence(projectID, columnar=False):
     """
     High-performance version that uses batched processing of the original query
-    to handle large datasets while avoiding MariaDB tmpdir issues.
+    to handle large datasets while avoiding MariaDB tmpdir issues. The records are
+    dicts, or with columnar a ColumnarResult of EVIDENCE_COLUMNS. Records from the
+    aggregated query hold a tuple of all of a file's matches of each evidence type.
     """
     logger.info(f"Starting high-performance get_project_evidence for project ID: {projectID}")
     
@@ -368,183 +585,268 @@ def get_project_evidence(projectID):
         
         logger.info(f"Project has {file_count} scanned files")
         
-        # Use batching for all projects - works efficiently for both small and large datasets
-        # For smaller projects (<=2000 files), use larger batch size for efficiency
-        # For larger projects, use smaller batches to avoid memory/tmpdir issues
-        if file_count <= 2000:
-            batch_size = file_count  # Process all files in one batch for small projects
-            logger.info(f"Small project - processing all {file_count} files in single batch")
-        else:
-            batch_size = 1000  # Use smaller batches for large projects
-            logger.info(f"Large project - using batch size of {batch_size}")
-        all_evidence = []
+        # Small projects start with all files in a single batch, larger ones start at 1000 files.
+        # From there the batch size adapts to how much evidence each batch returns
+        initial_batch_size = file_count if file_count <= 2000 else 1000
+        batch_sizer = EvidenceBatchSizer(initial_batch_size, project_id=projectID)
+        logger.info(f"Initial evidence batch size {batch_sizer.size} (floor {batch_sizer.floor}, ceiling {batch_sizer.ceiling})")
+        all_evidence = ColumnarResult(EVIDENCE_COLUMNS)
         
-        # Get file IDs in batches to process
-        id_batch_sql = f"SELECT ID_ FROM PSE_SCANNED_FILES WHERE PROJECT_ID_ = {projectID} ORDER BY ID_"
-        file_ids_result = db_runner.run_query(id_batch_sql)
-        
-        if not file_ids_result:
+        if not file_count:
             logger.warning("No scanned files found")
-            return []
-            
-        file_ids = [row['ID_'] for row in file_ids_result]
-        total_batches = (len(file_ids) + batch_size - 1) // batch_size
-        
-        logger.info(f"Processing {len(file_ids)} files in {total_batches} batches of {batch_size}")
+            return all_evidence if columnar else []
         
-        vendor = get_db_vendor()
+        query_mode = EVIDENCE_QUERY_MODE
+        logger.info(f"Evidence query mode: {query_mode}")
         
-        for i in range(0, len(file_ids), batch_size):
-            batch_ids = file_ids[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
+        # Walk the files in ID ranges so no ID list is needed, each range holds the next batch_sizer.size files
+        batch_num = 0
+        for id_range in iter_id_ranges("PSE_SCANNED_FILES", projectID, lambda: batch_sizer.size):
+            batch_size = batch_sizer.size
+            batch_num += 1
             
-            logger.info(f"Processing batch {batch_num}/{total_batches} ({len(batch_ids)} files)")
+            logger.info(f"Processing batch {batch_num} (up to {batch_size} files, IDs {id_range[0]} to {id_range[1]})")
+            batch_start = time.monotonic()
             
-            # Create IN clause for this batch
-            id_list = ','.join(str(id) for id in batch_ids)
-            
-            # Process each evidence type separately to avoid Cartesian product
-            batch_evidence = []
-            
-            # 1. Get base files with paths and aliases
-            base_files_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND SF.ID_ IN ({id_list})"
-            base_files = db_runner.run_query(base_files_sql)
-            
-            if base_files:
-                # Create base records for all files
-                for file_record in base_files:
-                    batch_evidence.append({
-                        'ID': str(file_record['ID']),
-                        'PATH': file_record['PATH'],
-                        'ALIAS': file_record['ALIAS'],
-                        'LICENSE': None,
-                        'EMAILURL': None,
-                        'COPYRIGHT': None,
-                        'SEARCHSTRING': None,
-                        'DIGEST': None,
-                        'MATCHES': None,
-                        'REMOTE_ID': None
-                    })
-                
-                # 2. Get license evidence and create separate records
-                license_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, PD.NAME_ AS LICENSE, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_LICENSE_MATCH LM ON SRN.ID_ = LM.RESULT_ID_ LEFT JOIN PDL_LICENSE PD ON LM.LICENSE_ID_ = PD.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND SF.ID_ IN ({id_list}) AND PD.NAME_ IS NOT NULL"
-                license_results = db_runner.run_query(license_sql)
-                
-                if license_results:
-                    for record in license_results:
-                        batch_evidence.append({
-                            'ID': str(record['ID']),
-                            'PATH': record['PATH'],
-                            'ALIAS': record['ALIAS'],
-                            'LICENSE': record['LICENSE'],
-                            'EMAILURL': None,
-                            'COPYRIGHT': None,
-                            'SEARCHSTRING': None,
-                            'DIGEST': None,
-                            'MATCHES': None,
-                            'REMOTE_ID': None
-                        })
-                
-                # 3. Get email/URL evidence and create separate records
-                email_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, ET.TEXT_ AS EMAILURL, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_EMAILURL_MATCH EM ON SRN.ID_ = EM.RESULT_ID_ LEFT JOIN PSE_EMAILURL_TEXT ET ON EM.TEXT_ID_ = ET.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND SF.ID_ IN ({id_list}) AND ET.TEXT_ IS NOT NULL"
-                email_results = db_runner.run_query(email_sql)
-                
-                if email_results:
-                    for record in email_results:
-                        batch_evidence.append({
-                            'ID': str(record['ID']),
-                            'PATH': record['PATH'],
-                            'ALIAS': record['ALIAS'],
-                            'LICENSE': None,
-                            'EMAILURL': record['EMAILURL'],
-                            'COPYRIGHT': None,
-                            'SEARCHSTRING': None,
-                            'DIGEST': None,
-                            'MATCHES': None,
-                            'REMOTE_ID': None
-                        })
-                
-                # 4. Get copyright evidence and create separate records
-                copyright_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, CTXT.TEXT_ AS COPYRIGHT, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_COPYRIGHT_MATCH CM ON SRN.ID_ = CM.RESULT_ID_ LEFT JOIN PSE_COPYRIGHT_TEXT CTXT ON CM.TEXT_ID_ = CTXT.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND SF.ID_ IN ({id_list}) AND CTXT.TEXT_ IS NOT NULL"
-                copyright_results = db_runner.run_query(copyright_sql)
-                
-                if copyright_results:
-                    for record in copyright_results:
-                        batch_evidence.append({
-                            'ID': str(record['ID']),
-                            'PATH': record['PATH'],
-                            'ALIAS': record['ALIAS'],
-                            'LICENSE': None,
-                            'EMAILURL': None,
-                            'COPYRIGHT': record['COPYRIGHT'],
-                            'SEARCHSTRING': None,
-                            'DIGEST': None,
-                            'MATCHES': None,
-                            'REMOTE_ID': None
-                        })
-                
-                # 5. Get search string evidence and create separate records
-                search_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, ST.SEARCH_STRING_ AS SEARCHSTRING, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_SEARCH_STRING_MATCH SM ON SRN.ID_ = SM.RESULT_ID_ LEFT JOIN PSE_SEARCH_STRING ST ON SM.SEARCH_STRING_ID_ = ST.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND SF.ID_ IN ({id_list}) AND ST.SEARCH_STRING_ IS NOT NULL"
-                search_results = db_runner.run_query(search_sql)
-                
-                if search_results:
-                    for record in search_results:
-                        batch_evidence.append({
-                            'ID': str(record['ID']),
-                            'PATH': record['PATH'],
-                            'ALIAS': record['ALIAS'],
-                            'LICENSE': None,
-                            'EMAILURL': None,
-                            'COPYRIGHT': None,
-                            'SEARCHSTRING': record['SEARCHSTRING'],
-                            'DIGEST': None,
-                            'MATCHES': None,
-                            'REMOTE_ID': None
-                        })
-                
-                # 6. Get remote scanned files
-                remote_sql = f"SELECT RSF.ID_ AS ID, RSF.PATH_ AS PATH FROM PSE_REMOTE_SCANNED_FILES RSF WHERE RSF.PROJECT_ID_ = {projectID} AND RSF.ID_ IN ({id_list})"
-                remote_results = db_runner.run_query(remote_sql)
-                
-                if remote_results:
-                    for record in remote_results:
-                        batch_evidence.append({
-                            'ID': str(record['ID']),
-                            'PATH': record['PATH'],
-                            'ALIAS': None,
-                            'LICENSE': None,
-                            'EMAILURL': None,
-                            'COPYRIGHT': None,
-                            'SEARCHSTRING': None,
-                            'DIGEST': None,
-                            'MATCHES': None,
-                            'REMOTE_ID': str(record['ID'])
-                        })
-                
-                all_evidence.extend(batch_evidence)
+            batch_evidence = None
+            if query_mode == "aggregate":
+                batch_evidence = get_evidence_batch_aggregated(projectID, id_range)
+                if batch_evidence is None:
+                    logger.warning("Aggregated evidence query failed - using the combined query for the remaining batches")
+                    query_mode = "union"
+            if batch_evidence is None and query_mode == "union":
+                batch_evidence = get_evidence_batch_combined(projectID, id_range)
+                if batch_evidence is None:
+                    logger.warning("Combined evidence query failed - using one query per evidence type for the remaining batches")
+                    query_mode = "separate"
+            if batch_evidence is None:
+                batch_evidence = get_evidence_batch_by_type(projectID, id_range)
+            batch_sizer.record(batch_size, evidence_row_count(batch_evidence), time.monotonic() - batch_start)
+
+            if batch_evidence:
+                all_evidence.rows.extend(batch_evidence)
                 logger.info(f"Batch {batch_num} returned {len(batch_evidence)} evidence records")
             else:
                 logger.info(f"Batch {batch_num} returned no files")
         
         logger.info(f"Successfully completed batched get_project_evidence. Returning {len(all_evidence)} records")
-        return all_evidence
+        return all_evidence if columnar else all_evidence.dicts()
     
     except Exception as e:
         logger.error(f"Error in get_project_evidence: {str(e)}")
         logger.error(f"Exception type: {type(e).__name__}")
-        # Return empty list rather than crashing
-        return []
+        # An empty result would leave the report's files without their evidence keys, fail the report here instead
+        raise RuntimeError(f"Unable to collect the file evidence for project {projectID}: {e}") from e
+
+def get_evidence_batch_by_type(projectID, id_range):
+    """
+    Evidence for a batch of files with a separate query per evidence type. This is the fallback
+    for databases that can't handle the combined query.
+    """
+    file_filter = id_range_filter("SF.ID_", id_range)
+    # Remote files are matched on the IDs of the server scanned files in the range
+    remote_filter = f"RSF.ID_ IN (SELECT SF.ID_ FROM PSE_SCANNED_FILES SF WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter})"
+    batch_evidence = []
+    
+    # Process each evidence type separately to avoid Cartesian product. The queries are
+    # independent of each other so they are fanned out across the DB worker pool
+    # 1. Base files with paths and aliases
+    base_files_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter}"
+    # 2. License evidence
+    license_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, PD.NAME_ AS LICENSE, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_LICENSE_MATCH LM ON SRN.ID_ = LM.RESULT_ID_ LEFT JOIN PDL_LICENSE PD ON LM.LICENSE_ID_ = PD.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND PD.NAME_ IS NOT NULL"
+    # 3. Email/URL evidence
+    email_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, ET.TEXT_ AS EMAILURL, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_EMAILURL_MATCH EM ON SRN.ID_ = EM.RESULT_ID_ LEFT JOIN PSE_EMAILURL_TEXT ET ON EM.TEXT_ID_ = ET.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND ET.TEXT_ IS NOT NULL"
+    # 4. Copyright evidence
+    copyright_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, CTXT.TEXT_ AS COPYRIGHT, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_COPYRIGHT_MATCH CM ON SRN.ID_ = CM.RESULT_ID_ LEFT JOIN PSE_COPYRIGHT_TEXT CTXT ON CM.TEXT_ID_ = CTXT.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND CTXT.TEXT_ IS NOT NULL"
+    # 5. Search string evidence
+    search_sql = f"SELECT SF.ID_ AS ID, SF.PATH_ AS PATH, ST.SEARCH_STRING_ AS SEARCHSTRING, SER.ALIAS_ AS ALIAS FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_SEARCH_STRING_MATCH SM ON SRN.ID_ = SM.RESULT_ID_ LEFT JOIN PSE_SEARCH_STRING ST ON SM.SEARCH_STRING_ID_ = ST.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND ST.SEARCH_STRING_ IS NOT NULL"
+    # 6. Remote scanned files
+    remote_sql = f"SELECT RSF.ID_ AS ID, RSF.PATH_ AS PATH FROM PSE_REMOTE_SCANNED_FILES RSF WHERE RSF.PROJECT_ID_ = {projectID} AND {remote_filter}"
+    results = db_runner.run_many([base_files_sql, license_sql, email_sql, copyright_sql, search_sql, remote_sql], spool=True)
+    # This is the last fallback so there is nothing left to try if one of the queries failed
+    for result in results:
+        if not isinstance(result, list):
+            raise RuntimeError(f"Evidence query failed for files {id_range_filter('ID_', id_range)}: {result}")
+    base_files, license_results, email_results, copyright_results, search_results, remote_results = results
+
+    if base_files:
+        # Base records for all files first, then the records of each evidence type
+        batch_evidence.extend(evidence_record(record['ID'], record['PATH'], record['ALIAS']) for record in base_files)
+        for evidence_type, results in (("LICENSE", license_results), ("EMAILURL", email_results), ("COPYRIGHT", copyright_results), ("SEARCHSTRING", search_results)):
+            if results:
+                batch_evidence.extend(evidence_record(record['ID'], record['PATH'], record['ALIAS'], evidence_type, record[evidence_type]) for record in results)
+        if remote_results:
+            batch_evidence.extend(evidence_record(record['ID'], record['PATH'], None, "REMOTE") for record in remote_results)
+    return batch_evidence
+
+def evidence_row_count(records):
+    """
+    The rows the records would take with a row per match, as the union and separate modes return
+    them. An aggregated record holds all of a file's matches in one row, so its matches are counted
+    to keep the batch sizer's target rows measuring the evidence whatever the query mode.
+    """
+    match_columns = [EVIDENCE_COLUMNS.index(evidence_type) for evidence_type in ("LICENSE", "EMAILURL", "COPYRIGHT", "SEARCHSTRING")]
+    row_count = 0
+    for record in records:
+        row_count += 1
+        for column in match_columns:
+            if isinstance(record[column], tuple):
+                row_count += len(record[column])
+    return row_count
+
+def evidence_record(file_id, path, alias, evidence_type="BASE", evidence=None):
+    """
+    A tuple of EVIDENCE_COLUMNS for a file, holding its evidence of the given type. The strings
+    are interned since a file's ID and path come with every row of its evidence, and the same
+    license names and copyrights are found in many files.
+    """
+    file_id = sys.intern(str(file_id))
+    record = [file_id, intern_value(path), intern_value(alias), None, None, None, None, None, None, None]
+    if evidence_type == "REMOTE":
+        record[EVIDENCE_COLUMNS.index("REMOTE_ID")] = file_id
+    elif evidence_type != "BASE":
+        record[EVIDENCE_COLUMNS.index(evidence_type)] = intern_value(evidence)
+    return tuple(record)
+
+def intern_value(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def get_evidence_batch_combined(projectID, id_range):
+    """
+    Evidence for a batch of files in a single round trip. The evidence types are combined with a
+    UNION ALL and every row is tagged with the type it came from. The records are tuples of
+    EVIDENCE_COLUMNS, as from get_evidence_batch_by_type. Returns None if the database did not
+    give back a usable result so the caller can fall back to get_evidence_batch_by_type.
+    """
+    file_filter = id_range_filter("SF.ID_", id_range)
+    # Remote files are matched on the IDs of the server scanned files in the range
+    remote_filter = f"RSF.ID_ IN (SELECT SF.ID_ FROM PSE_SCANNED_FILES SF WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter})"
+    evidence_sql = (
+        f"SELECT 'BASE' AS EVIDENCE_TYPE, SF.ID_ AS ID, SF.PATH_ AS PATH, SER.ALIAS_ AS ALIAS, CAST(NULL AS CHAR(1)) AS EVIDENCE FROM PSE_SCANNED_FILES SF LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter}"
+        f" UNION ALL SELECT 'LICENSE', SF.ID_, SF.PATH_, SER.ALIAS_, PD.NAME_ FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_LICENSE_MATCH LM ON SRN.ID_ = LM.RESULT_ID_ LEFT JOIN PDL_LICENSE PD ON LM.LICENSE_ID_ = PD.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND PD.NAME_ IS NOT NULL"
+        f" UNION ALL SELECT 'EMAILURL', SF.ID_, SF.PATH_, SER.ALIAS_, ET.TEXT_ FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_EMAILURL_MATCH EM ON SRN.ID_ = EM.RESULT_ID_ LEFT JOIN PSE_EMAILURL_TEXT ET ON EM.TEXT_ID_ = ET.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND ET.TEXT_ IS NOT NULL"
+        f" UNION ALL SELECT 'COPYRIGHT', SF.ID_, SF.PATH_, SER.ALIAS_, CTXT.TEXT_ FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_COPYRIGHT_MATCH CM ON SRN.ID_ = CM.RESULT_ID_ LEFT JOIN PSE_COPYRIGHT_TEXT CTXT ON CM.TEXT_ID_ = CTXT.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND CTXT.TEXT_ IS NOT NULL"
+        f" UNION ALL SELECT 'SEARCHSTRING', SF.ID_, SF.PATH_, SER.ALIAS_, ST.SEARCH_STRING_ FROM PSE_SCANNED_FILES SF LEFT JOIN PSE_SCAN_RESULT_NONSCF SRN ON SRN.ID_ = SF.NONSCF_RESULT_ID_ LEFT JOIN PSE_SEARCH_STRING_MATCH SM ON SRN.ID_ = SM.RESULT_ID_ LEFT JOIN PSE_SEARCH_STRING ST ON SM.SEARCH_STRING_ID_ = ST.ID_ LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter} AND ST.SEARCH_STRING_ IS NOT NULL"
+        f" UNION ALL SELECT 'REMOTE', RSF.ID_, RSF.PATH_, NULL, NULL FROM PSE_REMOTE_SCANNED_FILES RSF WHERE RSF.PROJECT_ID_ = {projectID} AND {remote_filter}"
+    )
+    result = run_columnar_query(evidence_sql, spool=True)
+    if not isinstance(result, ColumnarResult):
+        logger.warning(f"Unexpected result from combined evidence query: {result}")
+        return None
+
+    # Keep the record order of the per type queries, base files first and then each evidence type
+    records = {evidence_type: [] for evidence_type in EVIDENCE_RECORD_ORDER}
+    if result.rows:
+        evidence_type_column, id_column, path_column, alias_column, evidence_column = (result.index[column] for column in ("EVIDENCE_TYPE", "ID", "PATH", "ALIAS", "EVIDENCE"))
+    for row in result:
+        evidence_type = row[evidence_type_column]
+        records[evidence_type].append(evidence_record(row[id_column], row[path_column], row[alias_column], evidence_type, row[evidence_column]))
+
+    # Every batch holds files so no base rows means the query did not really run
+    if not records["BASE"]:
+        return None
+    return [record for evidence_type in EVIDENCE_RECORD_ORDER for record in records[evidence_type]]
+
+def evidence_list_sql(column):
+    """
+    SQL that joins the values of column into one EVIDENCE_LIST_SEPARATOR delimited string for the
+    database vendor. The order of the values isn't defined, the report sorts each file's matches.
+    """
+    if get_db_vendor() == "mysql":
+        return f"GROUP_CONCAT({column} SEPARATOR '{EVIDENCE_LIST_SEPARATOR}')"
+    else:
+        # STRING_AGG results are limited to 8000 bytes unless the values are of a MAX type
+        return f"STRING_AGG(CAST({column} AS NVARCHAR(MAX)), '{EVIDENCE_LIST_SEPARATOR}')"
+
+def get_evidence_batch_aggregated(projectID, id_range):
+    """
+    Evidence for a batch of files with one row per file. The license, email/URL, copyright and
+    search string matches of each file are joined into a list by the database (see
+    evidence_list_sql) rather than sent as a row each.
+    The records are tuples of EVIDENCE_COLUMNS with a tuple of matches in each evidence column,
+    None where the file has none. Returns None if the database did not give back a usable result
+    so the caller can fall back to get_evidence_batch_combined.
+    """
+    file_filter = id_range_filter("SF.ID_", id_range)
+    # Remote files are matched on the IDs of the server scanned files in the range
+    remote_filter = f"RSF.ID_ IN (SELECT SF.ID_ FROM PSE_SCANNED_FILES SF WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter})"
+    # Each list is a subquery on the file's scan result so the evidence types don't multiply each other's rows
+    evidence_sql = (
+        f"SELECT 'BASE' AS EVIDENCE_TYPE, SF.ID_ AS ID, SF.PATH_ AS PATH, SER.ALIAS_ AS ALIAS"
+        f", (SELECT {evidence_list_sql('PD.NAME_')} FROM PSE_SCAN_RESULT_NONSCF SRN JOIN PSE_LICENSE_MATCH LM ON SRN.ID_ = LM.RESULT_ID_ JOIN PDL_LICENSE PD ON LM.LICENSE_ID_ = PD.ID_ WHERE SRN.ID_ = SF.NONSCF_RESULT_ID_) AS LICENSE"
+        f", (SELECT {evidence_list_sql('ET.TEXT_')} FROM PSE_SCAN_RESULT_NONSCF SRN JOIN PSE_EMAILURL_MATCH EM ON SRN.ID_ = EM.RESULT_ID_ JOIN PSE_EMAILURL_TEXT ET ON EM.TEXT_ID_ = ET.ID_ WHERE SRN.ID_ = SF.NONSCF_RESULT_ID_) AS EMAILURL"
+        f", (SELECT {evidence_list_sql('CTXT.TEXT_')} FROM PSE_SCAN_RESULT_NONSCF SRN JOIN PSE_COPYRIGHT_MATCH CM ON SRN.ID_ = CM.RESULT_ID_ JOIN PSE_COPYRIGHT_TEXT CTXT ON CM.TEXT_ID_ = CTXT.ID_ WHERE SRN.ID_ = SF.NONSCF_RESULT_ID_) AS COPYRIGHT"
+        f", (SELECT {evidence_list_sql('ST.SEARCH_STRING_')} FROM PSE_SCAN_RESULT_NONSCF SRN JOIN PSE_SEARCH_STRING_MATCH SM ON SRN.ID_ = SM.RESULT_ID_ JOIN PSE_SEARCH_STRING ST ON SM.SEARCH_STRING_ID_ = ST.ID_ WHERE SRN.ID_ = SF.NONSCF_RESULT_ID_) AS SEARCHSTRING"
+        f" FROM PSE_SCANNED_FILES SF LEFT JOIN PAS_PROJECT_SCAN_ROOTS SR ON SF.ROOT_ID_ = SR.ID_ LEFT JOIN PAS_SCAN_SERVERS SER ON SER.ID_ = SR.SERVER_ID_ WHERE SF.PROJECT_ID_ = {projectID} AND {file_filter}"
+        f" UNION ALL SELECT 'REMOTE', RSF.ID_, RSF.PATH_, NULL, NULL, NULL, NULL, NULL FROM PSE_REMOTE_SCANNED_FILES RSF WHERE RSF.PROJECT_ID_ = {projectID} AND {remote_filter}"
+    )
+    result = run_columnar_query(evidence_sql, spool=True)
+    if not isinstance(result, ColumnarResult):
+        logger.warning(f"Unexpected result from aggregated evidence query: {result}")
+        return None
+
+    base_records = []
+    remote_records = []
+    if result.rows:
+        evidence_type_column, id_column, path_column, alias_column = (result.index[column] for column in ("EVIDENCE_TYPE", "ID", "PATH", "ALIAS"))
+        list_columns = [(EVIDENCE_COLUMNS.index(evidence_type), result.index[evidence_type]) for evidence_type in ("LICENSE", "EMAILURL", "COPYRIGHT", "SEARCHSTRING")]
+    for row in result:
+        if row[evidence_type_column] == "REMOTE":
+            remote_records.append(evidence_record(row[id_column], row[path_column], None, "REMOTE"))
+            continue
+        record = list(evidence_record(row[id_column], row[path_column], row[alias_column]))
+        for record_column, list_column in list_columns:
+            if row[list_column] is not None:
+                record[record_column] = tuple(map(sys.intern, row[list_column].split(EVIDENCE_LIST_SEPARATOR)))
+        base_records.append(tuple(record))
+
+    # Every batch holds files so no base rows means the query did not really run
+    if not base_records:
+        return None
+    return base_records + remote_records
 
 def get_inventories_not_in_repo(projectID):
     logger.info("Entering get_inventories_not_in_repo")
+    return db_runner.run_query(_inventories_not_in_repo_sql(projectID))
+
+def _inventories_not_in_repo_sql(projectID):
     sql = f"SELECT INV_GRP.ID_ AS inventoryID, 'LicenseOnly' AS type, INV_GRP.NAME_ AS inventoryItemName, INV_GRP.USAGE_TEXT_ AS usageText, INV_GRP.PARENT_GROUP_ID_ AS parentGroupId, INV_GRP.PRIORITY_ID_ AS priority, INV_GRP.AUDITOR_REVIEW_NOTES_ AS auditNotes, INV_GRP.DISTRIBUTION_TYPE_ AS disType, INV_GRP.COPYRIGHT_TEXT_ AS copyright, INV_GRP.DEPENDENCY_SCOPE_ AS dependencyScope, INV_GRP.AS_FOUND_TEXT_ AS asFoundLicenseText, INV_GRP.NOTICE_TEXT_ AS noticeText, LIC.SPDX_LICENSE_IDENTIFIER_ AS selectedLicenseSPDXIdentifier, LIC.NAME_ AS selectedLicenseName, LIC.SHORT_NAME_ AS shortName, LIC.URL_ AS selectedLicenseUrl FROM PSE_INVENTORY_GROUPS INV_GRP JOIN PDL_LICENSE LIC ON INV_GRP.LICENSE_ID_ = LIC.ID_ where PROJECT_ID_ ={projectID} and REPOSITORY_ITEM_ID_ is null;"   
-    return db_runner.run_query(sql)
+    return sql
 
 def get_component_possible_Licenses(componentID):
+    # Served from the in-run map when the component was part of a bulk load
+    if componentID in component_possible_licenses:
+        return component_possible_licenses[componentID]
     logger.info("Entering get_component_possible_Licenses")
     sql = f"SELECT COMPONENT_ID_ AS componentId, LIC.NAME_ AS licenseName, LIC.SHORT_NAME_ AS shortName, LIC.SPDX_LICENSE_IDENTIFIER_ AS spdxIdentifier FROM PDL_COMPONENT_LICENSE COMPLIC join PDL_LICENSE LIC on LIC.ID_ = COMPLIC.LICENSE_ID_ where COMPONENT_ID_ = {componentID};"
     return db_runner.run_query(sql)
 
+def load_component_possible_licenses(component_ids, batch_size=1000):
+    """
+    Fetch the possible licenses for many components with a few IN list queries and keep them in
+    an in-run map so get_component_possible_Licenses doesn't query each component separately.
+    """
+    logger.info("Entering load_component_possible_licenses")
+    component_ids = sorted({int(component_id) for component_id in component_ids if component_id is not None} - set(component_possible_licenses))
+    if not component_ids:
+        return
+
+    sql_queries = []
+    for i in range(0, len(component_ids), batch_size):
+        id_list = ','.join(str(component_id) for component_id in component_ids[i:i + batch_size])
+        sql_queries.append(f"SELECT COMPONENT_ID_ AS componentId, LIC.NAME_ AS licenseName, LIC.SHORT_NAME_ AS shortName, LIC.SPDX_LICENSE_IDENTIFIER_ AS spdxIdentifier FROM PDL_COMPONENT_LICENSE COMPLIC join PDL_LICENSE LIC on LIC.ID_ = COMPLIC.LICENSE_ID_ where COMPONENT_ID_ IN ({id_list});")
+
+    possible_licenses = {component_id: [] for component_id in component_ids}
+    for result in db_runner.run_many(sql_queries):
+        if not isinstance(result, list):
+            # Leave these components to the per component lookup
+            logger.warning(f"Unexpected result format in load_component_possible_licenses: {result}")
+            return
+        for row in result:
+            possible_licenses.setdefault(row['componentId'], []).append(row)
+    component_possible_licenses.update(possible_licenses)
+    logger.info(f"Loaded possible licenses for {len(component_ids)} components")
+
 def get_inventory_item_file_paths(inventory_id, project_id):
     logger.info("Entering get_inventory_item_file_paths")
     sql = f"SELECT DISTINCT SF.PATH_ FROM PSE_SCANNED_FILES SF INNER JOIN PSE_INVENTORY_GROUP_FILES IGF ON SF.ID_ = IGF.FILE_ID_ WHERE SF.PROJECT_ID_ = {project_id} AND IGF.GROUP_ID_ = {inventory_id} AND IGF.FILE_ID_ IS NOT NULL"
@@ -0,0 +1,292 @@
+"""
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : report_data_db_cache.py
+"""
+import collections
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from report_data_db_runner import bind_parameters, completed_future, get_db_vendor, get_query_name, is_read_only_query, query_metrics
+
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------#
+# Query results kept outside of the database: the on disk cache of a report project's results
+# (SPDX_QUERY_CACHE), and the recording of a run's queries (SPDX_DB_RECORD) with the runner that
+# plays it back (SPDX_DB_REPLAY).
+#----------------------------------------------------------------------#
+
+# Keep query results on disk between runs for the same project. User can set this variable directly
+# in code or with the SPDX_QUERY_CACHE environment variable. The cache is thrown away when the scans,
+# inventory or licenses change, and in any case after user_query_cache_max_age_hours so data library
+# updates to components are refreshed. Custom field, vulnerability and VEX queries are never cached
+user_query_cache = False
+user_query_cache_max_age_hours = 24
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUERY_CACHE_ENABLED = user_query_cache or os.environ.get('SPDX_QUERY_CACHE', '').lower() in ("1", "true", "yes")
+QUERY_CACHE_DIR = os.path.join(BASE_DIR, "query_cache")
+# Tables read by the report that get_project_data_stamp doesn't cover. Queries on them always go to the
+# database since a change to them (a new vulnerability or VEX analysis, a custom field edited in the UI,
+# a data library update to a component's licenses) wouldn't be noticed by the cache
+QUERY_CACHE_UNSTAMPED_TABLES = re.compile(r"\b(?:PAS_INVENTORY_FLEX_FIELDS|PAS_PROJECT_CUSTOM_FIELDS|PAS_VEX_ANALYSIS|PDL_VULNERABILITY|PDL_COMP_VER_VULNERABILITY"
+                                          r"|PSE_SUPPRESSED_VULNERABILITY|PDL_COMPONENT_LICENSE|PDL_COMP_VER_LICENSE|PDL_CUSTOM_COMP_VER_LICENSE)", re.IGNORECASE)
+
+
+class QueryResultCache:
+    """
+    On disk cache of query results for one report project, a directory with a gzipped JSON lines
+    file of rows per query. The results are kept along with a stamp of the project data (see
+    get_project_data_stamp) and are discarded when the stamp changes or the cache is older than
+    user_query_cache_max_age_hours. Rows are streamed to and from the files so the cache never
+    holds a whole result in memory.
+    """
+    def __init__(self, dir_path, stamp):
+        self.dir_path = dir_path
+        self.stamp = stamp
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0
+        self.load()
+
+    def load(self):
+        stamp_path = os.path.join(self.dir_path, "stamp.json")
+        try:
+            with open(stamp_path, "r", encoding="utf-8") as stamp_file:
+                header = json.load(stamp_file)
+            if header.get("stamp") != self.stamp:
+                logger.info("Project data has changed since the query cache was written - not using it")
+            elif time.time() - header.get("createdOn", 0) > user_query_cache_max_age_hours * 3600:
+                logger.info(f"Query cache is older than {user_query_cache_max_age_hours} hours - not using it")
+            else:
+                logger.info(f"Using the query cache in {self.dir_path}")
+                return
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unable to read query cache stamp {stamp_path}: {e}")
+
+        # Start again with an empty cache for the current stamp
+        os.makedirs(self.dir_path, exist_ok=True)
+        for file_name in os.listdir(self.dir_path):
+            os.remove(os.path.join(self.dir_path, file_name))
+        with open(stamp_path, "w", encoding="utf-8") as stamp_file:
+            json.dump({"stamp": self.stamp, "createdOn": time.time()}, stamp_file)
+
+    def is_cacheable(self, sql_query):
+        """True if the result of the query can be kept in the cache, see is_cacheable_query."""
+        return is_cacheable_query(sql_query)
+
+    def entry_path(self, query_name, sql_query):
+        return os.path.join(self.dir_path, query_name + "_" + hashlib.sha1(sql_query.encode("utf-8")).hexdigest() + ".jsonl.gz")
+
+    def iter_rows(self, query_name, sql_query):
+        """An iterator over the cached rows of the query, None if it isn't cached."""
+        try:
+            entry_file = gzip.open(self.entry_path(query_name, sql_query), "rt", encoding="utf-8")
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return self._read_rows(entry_file)
+
+    @staticmethod
+    def _read_rows(entry_file):
+        with entry_file:
+            for line in entry_file:
+                yield json.loads(line)
+
+    def get(self, query_name, sql_query):
+        rows = self.iter_rows(query_name, sql_query)
+        return None if rows is None else list(rows)
+
+    def writer(self, query_name, sql_query):
+        return QueryCacheWriter(self, self.entry_path(query_name, sql_query))
+
+    def put(self, query_name, sql_query, rows):
+        writer = self.writer(query_name, sql_query)
+        for row in rows:
+            writer.add(row)
+        writer.commit()
+
+    def close(self):
+        logger.info(f"Query cache: {self.hits} hits, {self.misses} misses, {self.saved} results saved to {self.dir_path}")
+
+
+class QueryCacheWriter:
+    """
+    Streams the rows of one query to a temporary file in the cache directory. commit moves the
+    file into place once the result is complete, discard throws it away (a no-op after commit).
+    """
+    def __init__(self, cache, entry_path):
+        self.cache = cache
+        self.entry_path = entry_path
+        self.entry_file = None
+        self.temp_path = None
+        try:
+            temp_fd, self.temp_path = tempfile.mkstemp(suffix=".tmp", dir=cache.dir_path)
+            os.close(temp_fd)
+            self.entry_file = gzip.open(self.temp_path, "wt", encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Unable to write query cache entry {entry_path}: {e}")
+            self.discard()
+
+    def add(self, row):
+        if self.entry_file is None:
+            return
+        try:
+            self.entry_file.write(json.dumps(row, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.warning(f"Unable to write query cache entry {self.entry_path}: {e}")
+            self.discard()
+
+    def commit(self):
+        if self.entry_file is None:
+            return
+        try:
+            self.entry_file.close()
+            self.entry_file = None
+            os.replace(self.temp_path, self.entry_path)
+        except OSError as e:
+            logger.warning(f"Unable to save query cache entry {self.entry_path}: {e}")
+            self.discard()
+            return
+        with self.cache.lock:
+            self.cache.saved += 1
+
+    def discard(self):
+        if self.entry_file is not None:
+            try:
+                self.entry_file.close()
+            except OSError:
+                pass
+            self.entry_file = None
+        if self.temp_path and os.path.exists(self.temp_path):
+            try:
+                os.remove(self.temp_path)
+            except OSError:
+                pass
+
+def is_cacheable_query(sql_query):
+    """True for a SELECT that only reads tables covered by the project data stamp."""
+    return is_read_only_query(sql_query) and not QUERY_CACHE_UNSTAMPED_TABLES.search(sql_query)
+
+
+class QueryRecorder:
+    """
+    Writes each query sent to DbConnection.jar and the response it got back to a gzipped JSON
+    lines file that ReplayDbQueryRunner can play back, along with the evidence batch sizes that
+    decided those queries. The DB vendor is added when the recording is closed.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.record_file = gzip.open(file_path, "wt", encoding="utf-8")
+        self.query_count = 0
+        logger.info(f"Recording database queries to {file_path}")
+
+    def record(self, sql_query, result):
+        line = json.dumps({"sql": sql_query, "result": result}, separators=(",", ":"))
+        with self.lock:
+            if self.record_file is not None:
+                self.record_file.write(line + "\n")
+                self.query_count += 1
+
+    def record_batch_size(self, project_id, batch_size):
+        """Record an evidence batch size picked by EvidenceBatchSizer so a replay can pick the same one."""
+        line = json.dumps({"evidenceBatchSize": batch_size, "projectId": str(project_id)})
+        with self.lock:
+            if self.record_file is not None:
+                self.record_file.write(line + "\n")
+
+    def close(self):
+        with self.lock:
+            if self.record_file is None:
+                return
+            try:
+                self.record_file.write(json.dumps({"dbVendor": get_db_vendor()}) + "\n")
+            finally:
+                self.record_file.close()
+                self.record_file = None
+        logger.info(f"Recorded {self.query_count} queries to {self.file_path}")
+
+
+class QueryNotRecordedError(RuntimeError):
+    """A replayed report ran a query that isn't in the recording."""
+
+
+class ReplayDbQueryRunner:
+    """
+    Stand in for DbQueryRunnerPool that answers queries from a QueryRecorder file instead of
+    the database. A query that was run several times is answered with its recorded results in
+    order, the last one being repeated. A query missing from the recording raises
+    QueryNotRecordedError since the replay no longer matches the recorded run.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.results = {}
+        self.batch_sizes = {}
+        self.db_vendor = None
+        with gzip.open(file_path, "rt", encoding="utf-8") as record_file:
+            for line in record_file:
+                entry = json.loads(line)
+                if "sql" in entry:
+                    self.results.setdefault(entry["sql"], []).append(entry["result"])
+                elif "evidenceBatchSize" in entry:
+                    self.batch_sizes.setdefault(entry["projectId"], collections.deque()).append(entry["evidenceBatchSize"])
+                elif "dbVendor" in entry:
+                    self.db_vendor = entry["dbVendor"]
+        logger.info(f"Replaying {len(self.results)} recorded queries from {file_path}")
+
+    def recorded_batch_sizes(self, project_id):
+        """The evidence batch sizes recorded for the project, taken from the front as they are used."""
+        return self.batch_sizes.setdefault(str(project_id), collections.deque())
+
+    def _recorded_result(self, sql_query):
+        with self.lock:
+            results = self.results.get(sql_query)
+            if not results:
+                raise QueryNotRecordedError(f"Query not found in recording {self.file_path}: {sql_query}")
+            return results.pop(0) if len(results) > 1 else results[0]
+
+    def run_query(self, sql_query, query_name=None, spool=False, params=None):
+        query_name = query_name or get_query_name()
+        start_time = time.monotonic()
+        # Recorded with the parameters in place
+        result = self._recorded_result(bind_parameters(sql_query, params))
+        query_metrics.record(query_name, time.monotonic() - start_time, len(result) if isinstance(result, list) else 0, 0)
+        return result
+
+    def iter_query(self, sql_query, query_name=None, spool=False, params=None):
+        result = self.run_query(sql_query, query_name or get_query_name(), params=params)
+        if not isinstance(result, list):
+            # A recorded error response, handed back the same way as a worker does
+            return result
+        for row in result:
+            yield row
+
+    def run_many(self, sql_queries, query_name=None, spool=False):
+        query_name = query_name or get_query_name()
+        return [self.run_query(sql_query, query_name) for sql_query in sql_queries]
+
+    def submit(self, sql_query, query_name=None, params=None):
+        return completed_future(self.run_query, sql_query, query_name or get_query_name(), False, params)
+
+    def close(self):
+        pass
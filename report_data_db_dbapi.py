@@ -0,0 +1,261 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : report_data_db_dbapi.py
+'''
+import datetime
+import decimal
+import logging
+import os
+import re
+import threading
+import time
+
+import report_data_db_runner
+
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------#
+# The "dbapi" database backend (SPDX_DB_BACKEND=dbapi). Each worker of the DbQueryRunnerPool holds
+# its own connection made with a Python DB-API driver instead of a DbConnection.jar process, so
+# there is no JVM to start and rows are fetched from a cursor rather than parsed from JSON.
+#
+# The connection details are read from core.db.properties. Any of them can be given (or replaced,
+# for instance when the password in the file is encrypted) with the SPDX_DB_HOST, SPDX_DB_PORT,
+# SPDX_DB_NAME, SPDX_DB_USER and SPDX_DB_PASSWORD environment variables.
+#----------------------------------------------------------------------#
+
+# ODBC driver used for SQL Server (SPDX_ODBC_DRIVER environment variable)
+user_odbc_driver = ""
+ODBC_DRIVER = user_odbc_driver or os.environ.get('SPDX_ODBC_DRIVER', '') or "ODBC Driver 18 for SQL Server"
+
+MYSQL_PORT = 3306
+SQLSERVER_PORT = 1433
+# Property names used for each connection setting, the first one present is used
+CONNECTION_PROPERTIES = {
+    "host": ("db.hostname", "db.host", "db.server"),
+    "port": ("db.port",),
+    "database": ("db.name", "db.dbname", "db.database", "db.schema"),
+    "user": ("db.username", "db.user"),
+    "password": ("db.password",),
+}
+CONNECTION_ENVIRONMENT = {"host": "SPDX_DB_HOST", "port": "SPDX_DB_PORT", "database": "SPDX_DB_NAME", "user": "SPDX_DB_USER", "password": "SPDX_DB_PASSWORD"}
+JDBC_URL = re.compile(r"jdbc:(?:mysql|mariadb|sqlserver)://([^:/;?\\]+)(?:\\[^:/;?]*)?(?::(\d+))?(?:/([^?;]+))?", re.IGNORECASE)
+JDBC_DATABASE_NAME = re.compile(r";\s*database(?:Name)?\s*=\s*([^;]+)", re.IGNORECASE)
+
+# MySQL syntax the report uses that SQLite doesn't have. GROUP_CONCAT(value SEPARATOR 'x') is written
+# as SQLite's GROUP_CONCAT(value, 'x')
+SQLITE_REWRITES = [(re.compile(r"GROUP_CONCAT\(([\w.]+) SEPARATOR ('(?:[^']|'')*')\)"), r"GROUP_CONCAT(\1, \2)")]
+
+# MySQL DATE_FORMAT specifiers that mean something else (or nothing) to strftime
+MYSQL_DATE_FORMATS = {"%i": "%M", "%s": "%S", "%M": "%B", "%W": "%A", "%h": "%I", "%r": "%I:%M:%S %p", "%T": "%H:%M:%S"}
+
+# Values DbConnection.jar would have written to JSON as they are
+PLAIN_TYPES = {str, int, float, type(None)}
+
+
+class DbApiQueryConnection:
+    """
+    A pool worker with its own DB-API connection. Rows are streamed from the cursor fetch_size at
+    a time and returned as dicts, the same as DbConnection.jar's, and a database error is returned
+    as an {"error": ...} response. Parameters are bound by the driver.
+    """
+    fetch_size = 1000
+
+    def __init__(self, connect, db_vendor, rewrites=()):
+        self.lock = threading.Lock()
+        self.connection, self.driver = connect()
+        self.db_vendor = db_vendor
+        self.rewrites = rewrites
+        # sqlite3 and pyodbc take ? placeholders as the report writes them, pymysql takes %s
+        self.format_placeholders = self.driver.paramstyle in ("format", "pyformat")
+
+    def iter_query(self, sql_query, query_name=None, spool=False, params=None):
+        query_name = query_name or report_data_db_runner.get_query_name()
+        if sql_query.lstrip().upper().startswith("SET "):
+            # The session is set up when connecting
+            return
+        with self.lock:
+            start_time = time.monotonic()
+            row_count = 0
+            recorded_rows = [] if report_data_db_runner.query_recorder else None
+            cursor = self.connection.cursor()
+            try:
+                statement = sql_query.strip().rstrip(";")
+                for pattern, replacement in self.rewrites:
+                    statement = pattern.sub(replacement, statement)
+                if params is None:
+                    cursor.execute(statement)
+                else:
+                    cursor.execute(self._placeholders(statement), tuple(params))
+                columns = [column[0] for column in cursor.description or []]
+                while True:
+                    rows = cursor.fetchmany(self.fetch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        if not PLAIN_TYPES.issuperset(map(type, row)):
+                            row = [json_value(value) for value in row]
+                        row = dict(zip(columns, row))
+                        row_count += 1
+                        if recorded_rows is not None:
+                            recorded_rows.append(row)
+                        yield row
+                if recorded_rows is not None:
+                    report_data_db_runner.query_recorder.record(report_data_db_runner.bind_parameters(sql_query, params), recorded_rows)
+            except self.driver.Error as e:
+                # Same shape as an error response from DbConnection.jar
+                logger.warning(f"Database error for {query_name}: {e}")
+                return {"error": str(e)}
+            finally:
+                cursor.close()
+                report_data_db_runner.query_metrics.record(query_name, time.monotonic() - start_time, row_count, 0)
+
+    def _placeholders(self, sql_query):
+        """The query with ? placeholders (outside of string literals) written as %s for the driver."""
+        if not self.format_placeholders:
+            return sql_query
+        parts = report_data_db_runner.SQL_STRING_LITERAL.split(sql_query)
+        for index in range(len(parts)):
+            parts[index] = parts[index].replace("%", "%%")
+            if index % 2 == 0:
+                parts[index] = parts[index].replace("?", "%s")
+        return "".join(parts)
+
+    def run_query(self, sql_query, query_name=None, spool=False, params=None):
+        query_name = query_name or report_data_db_runner.get_query_name()
+        return report_data_db_runner.collect_rows(self.iter_query(sql_query, query_name, params=params))
+
+    def run_many(self, sql_queries, query_name=None, spool=False):
+        query_name = query_name or report_data_db_runner.get_query_name()
+        return [self.run_query(sql_query, query_name) for sql_query in sql_queries]
+
+    def submit(self, sql_query, query_name=None, params=None):
+        return report_data_db_runner.completed_future(self.run_query, sql_query, query_name or report_data_db_runner.get_query_name(), False, params)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def json_value(value):
+    """The value as DbConnection.jar would have given it in its JSON response."""
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", "replace")
+    return value
+
+
+def mysql_date_format(value, date_format):
+    """MySQL's DATE_FORMAT for a date stored by SQLite as ISO 8601 text. None if it isn't a date."""
+    if value is None:
+        return None
+    try:
+        date = datetime.datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return date.strftime(re.sub(r"%.", lambda specifier: MYSQL_DATE_FORMATS.get(specifier.group(0), specifier.group(0)), date_format))
+
+
+def get_connection_settings():
+    """Vendor, host, port, database, user and password from core.db.properties and the environment."""
+    properties = report_data_db_runner.read_db_properties() or {}
+    settings = {setting: next((properties[name] for name in names if properties.get(name)), None) for setting, names in CONNECTION_PROPERTIES.items()}
+    if not properties.get("db.vendor"):
+        # The driver can't be guessed, the queries are written differently for each database
+        raise RuntimeError(f"db.vendor not found in {report_data_db_runner.properties_file} - the dbapi database backend needs it to pick the database driver")
+    settings["vendor"] = properties["db.vendor"].lower()
+
+    # A JDBC URL holds the host, port and database name
+    jdbc_url = next((value for value in properties.values() if value.lower().startswith("jdbc:")), None)
+    if jdbc_url:
+        match = JDBC_URL.match(jdbc_url)
+        if match:
+            settings["host"] = settings["host"] or match.group(1)
+            settings["port"] = settings["port"] or match.group(2)
+            settings["database"] = settings["database"] or match.group(3)
+        database_name = JDBC_DATABASE_NAME.search(jdbc_url)
+        if database_name and not settings["database"]:
+            settings["database"] = database_name.group(1)
+
+    for setting, variable in CONNECTION_ENVIRONMENT.items():
+        if os.environ.get(variable):
+            settings[setting] = os.environ[variable]
+
+    settings["port"] = int(settings["port"] or (MYSQL_PORT if settings["vendor"] == "mysql" else SQLSERVER_PORT))
+    missing = [setting for setting in ("host", "database", "user") if not settings[setting]]
+    if missing:
+        raise RuntimeError(f"Database {', '.join(missing)} not found in {report_data_db_runner.properties_file} - set {', '.join(CONNECTION_ENVIRONMENT[setting] for setting in missing)}")
+    return settings
+
+
+def mysql_connector(settings):
+    try:
+        import pymysql
+        import pymysql.cursors
+    except ImportError:
+        raise RuntimeError("The dbapi database backend needs the pymysql package for MySQL/MariaDB (pip install pymysql)")
+
+    def connect():
+        # An unbuffered cursor so fetchmany streams the rows rather than reading them all first
+        connection = pymysql.connect(host=settings["host"], port=settings["port"], user=settings["user"], password=settings["password"] or "",
+                                     database=settings["database"], charset="utf8mb4", autocommit=True, cursorclass=pymysql.cursors.SSCursor,
+                                     init_command=report_data_db_runner.MYSQL_SESSION_SQL)
+        return connection, pymysql
+    return connect
+
+
+def sqlserver_connector(settings):
+    try:
+        import pyodbc
+    except ImportError:
+        raise RuntimeError("The dbapi database backend needs the pyodbc package for SQL Server (pip install pyodbc)")
+
+    def connect():
+        connection_string = (f"DRIVER={{{ODBC_DRIVER}}};SERVER={settings['host']},{settings['port']};DATABASE={settings['database']};"
+                             f"UID={settings['user']};PWD={{{(settings['password'] or '').replace('}', '}}')}}};TrustServerCertificate=yes")
+        return pyodbc.connect(connection_string, autocommit=True), pyodbc
+    return connect
+
+
+def sqlite_connector(file_path):
+    import sqlite3, zlib
+
+    def connect():
+        connection = sqlite3.connect(file_path, check_same_thread=False)
+        # The SQL is written for MySQL so the few MySQL functions it uses are added to the connection
+        connection.create_function("CRC32", 1, lambda value: zlib.crc32(str(value).encode("utf-8")))
+        connection.create_function("CONCAT_WS", -1, lambda separator, *values: separator.join(str(value) for value in values if value is not None))
+        connection.create_function("DATE_FORMAT", 2, mysql_date_format)
+        return connection, sqlite3
+    return connect
+
+
+def create_dbapi_runner():
+    settings = get_connection_settings()
+    # As everywhere else in the report, a vendor other than mysql is SQL Server
+    if settings["vendor"] == "mysql":
+        connect = mysql_connector(settings)
+    else:
+        connect = sqlserver_connector(settings)
+    logger.info(f"Connecting to the {settings['vendor']} database {settings['database']} on {settings['host']}:{settings['port']}")
+    return report_data_db_runner.DbQueryRunnerPool(lambda: DbApiQueryConnection(connect, settings["vendor"]), report_data_db_runner.DB_WORKER_COUNT)
+
+
+def create_sqlite_runner(file_path):
+    """
+    Workers connected to a local SQLite database, normally one created by synthetic_db.py, in
+    place of the Code Insight database. Meant for scale testing only.
+    """
+    if not os.path.exists(file_path):
+        raise RuntimeError(f"SQLite database not found: {file_path}")
+    logger.info(f"Running queries against SQLite database {file_path}")
+    # The report's MySQL flavour of SQL is used against SQLite
+    return report_data_db_runner.DbQueryRunnerPool(lambda: DbApiQueryConnection(sqlite_connector(file_path), "mysql", SQLITE_REWRITES), report_data_db_runner.DB_WORKER_COUNT)
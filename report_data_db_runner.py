@@ -0,0 +1,1370 @@
+"""
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : report_data_db_runner.py
+"""
+import sys
+import atexit
+import codecs
+import collections
+import itertools
+import threading
+import subprocess
+import logging
+import os
+import configparser
+import io
+import json
+import locale
+import math
+import mmap
+import queue
+import re
+import socket
+import tempfile
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------#
+# Runs the SQL of the report_data_db query functions: the DbConnection.jar workers and the pool
+# that shares them out, the connection to db_runner_broker.py, the watchdog that restarts a
+# stalled worker and the query metrics. The on disk cache, recording and replay of query results
+# are in report_data_db_cache.py, the DB-API backend in report_data_db_dbapi.py.
+#----------------------------------------------------------------------#
+
+# User can set this variable directly in code
+user_java_path = ""
+# Number of DbConnection.jar workers used to run queries. User can set this variable directly
+# in code or with the SPDX_DB_WORKERS environment variable (default is a single worker)
+user_db_worker_count = 0
+# Record every query and its result to a file (SPDX_DB_RECORD environment variable), or replay such a
+# recording instead of starting Java (SPDX_DB_REPLAY) so a report run can be reproduced offline
+user_db_record_file = ""
+user_db_replay_file = ""
+# Run the queries against a local SQLite database such as one built by synthetic_db.py instead of
+# the Code Insight database (SPDX_DB_SQLITE environment variable). Meant for scale testing only
+user_db_sqlite_file = ""
+# JVM options used to start DbConnection.jar. Pick one of JVM_PROFILES (SPDX_JVM_PROFILE environment
+# variable) and add any other options (SPDX_JVM_OPTIONS, separated by spaces). If an AppCDS archive
+# for the profile has been created with create_cds_archive.py it is used as well
+user_jvm_profile = ""
+user_jvm_options = []
+# Unix socket of db_runner_broker.py. When a broker is listening there the queries are sent to it
+# instead of starting DbConnection.jar (SPDX_DB_BROKER_SOCKET environment variable)
+user_db_broker_socket = ""
+# Inactivity timeout: the seconds to wait for the next part of a query response before the Java
+# process is killed and restarted. The wait starts again with each part, so a long result that keeps
+# arriving is never cut off. User can set this variable directly in code or with the
+# SPDX_QUERY_INACTIVITY_TIMEOUT environment variable (default 1800, 0 turns the watchdog off). A
+# SELECT that failed this way is run again up to user_query_retries times, anything else fails the report
+user_query_inactivity_timeout_seconds = 1800
+user_query_retries = 2
+# Queries given to db_runner.submit are written to the Java process up to this many ahead of the
+# response being read (SPDX_PIPELINE_WINDOW environment variable, 1 sends them one at a time)
+user_pipeline_window = 0
+# Copy the large results (scanned files and evidence) to a temporary file as they arrive from the
+# Java process and parse the rows from the file through mmap (SPDX_SPOOL_RESULTS=1 environment
+# variable). The process is free for its next query while the rows are parsed. The files are
+# created in the system temporary directory unless user_spool_dir (SPDX_SPOOL_DIR) is set
+user_spool_large_results = False
+user_spool_dir = ""
+# How the report connects to the database (SPDX_DB_BACKEND environment variable). "jvm" runs the
+# queries through DbConnection.jar (or db_runner_broker.py), "dbapi" connects from Python with a
+# DB-API driver: pymysql for MySQL/MariaDB or pyodbc for SQL Server, see report_data_db_dbapi.py
+user_db_backend = ""
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_RECORD_FILE = user_db_record_file or os.environ.get('SPDX_DB_RECORD', '')
+DB_REPLAY_FILE = user_db_replay_file or os.environ.get('SPDX_DB_REPLAY', '')
+DB_SQLITE_FILE = user_db_sqlite_file or os.environ.get('SPDX_DB_SQLITE', '')
+DB_BACKEND = (user_db_backend or os.environ.get('SPDX_DB_BACKEND', '') or "jvm").lower()
+# Determine the correct Java executable name
+java_exec = "java.exe" if os.name == "nt" else "java"
+DEFAULT_JAVA_PATH = os.path.abspath(os.path.join(BASE_DIR, '..', '..', 'jre', 'bin', java_exec))
+# Check JAVA_HOME and construct the java path
+java_home = os.environ.get('JAVA_HOME')
+if user_java_path != "":
+    JAVA_PATH = user_java_path
+elif java_home:
+    JAVA_PATH = os.path.join(java_home, 'bin', java_exec)
+else:
+    JAVA_PATH = DEFAULT_JAVA_PATH
+
+JVM_PROFILES = {
+    "default": [],  # The JVM's own defaults
+    # Small reports are mostly JVM startup so skip the C2 compiler and use the lightest GC
+    "fast-startup": ["-XX:TieredStopAtLevel=1", "-XX:+UseSerialGC", "-Xss512k"],
+    # Large result sets, more heap up front and a throughput GC
+    "large-report": ["-Xms512m", "-Xmx4g", "-XX:+UseParallelGC"],
+}
+JVM_PROFILE = (user_jvm_profile or os.environ.get('SPDX_JVM_PROFILE', '') or "default").lower()
+if JVM_PROFILE not in JVM_PROFILES:
+    logger.warning(f"Unknown JVM profile {JVM_PROFILE} - using the default profile. Valid profiles are {', '.join(JVM_PROFILES)}")
+    JVM_PROFILE = "default"
+JVM_OPTIONS = user_jvm_options or os.environ.get('SPDX_JVM_OPTIONS', '').split()
+# Class data sharing archives are specific to the JVM options they were created with so keep one per profile
+CDS_ARCHIVE_FILE = os.path.join(BASE_DIR, f"DbConnection-{JVM_PROFILE}.jsa")
+# Queries run while creating the CDS archive so the classes used to answer them are included
+CDS_TRAINING_QUERIES = ["SET autocommit = true;", "SELECT COUNT(*) AS projectCount FROM PAS_PROJECT;"]
+
+DB_BROKER_SOCKET = user_db_broker_socket or os.environ.get('SPDX_DB_BROKER_SOCKET', '') or os.path.join(BASE_DIR, "_spdx_db_broker.sock")
+
+# Neither Java nor DbConnection.jar are needed to replay a recorded run or to use a local database
+LOCAL_DB_RUNNER = bool(DB_REPLAY_FILE or DB_SQLITE_FILE)
+# Quoted string literals in a query, '' being an escaped quote. Splitting a query on this leaves the
+# literals at the odd indexes so ? placeholders are only looked for in the even ones
+SQL_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+# Starts a broker query line that carries the query name ahead of the SQL, "#name<tab>SQL"
+BROKER_QUERY_NAME_PREFIX = "#"
+
+# MySQL cuts GROUP_CONCAT results off at 1KB by default, too short for the licenses of some files
+MYSQL_SESSION_SQL = "SET SESSION group_concat_max_len = 16777216;"
+
+db_worker_env = os.environ.get('SPDX_DB_WORKERS')
+if user_db_worker_count > 0:
+    DB_WORKER_COUNT = user_db_worker_count
+elif db_worker_env:
+    DB_WORKER_COUNT = max(1, int(db_worker_env))
+else:
+    DB_WORKER_COUNT = 1
+
+query_inactivity_timeout_env = os.environ.get('SPDX_QUERY_INACTIVITY_TIMEOUT', '').strip()
+if query_inactivity_timeout_env:
+    QUERY_INACTIVITY_TIMEOUT_SECONDS = max(0.0, float(query_inactivity_timeout_env))
+else:
+    QUERY_INACTIVITY_TIMEOUT_SECONDS = max(0.0, float(user_query_inactivity_timeout_seconds))
+QUERY_RETRIES = user_query_retries
+PIPELINE_WINDOW = max(1, user_pipeline_window or int(os.environ.get('SPDX_PIPELINE_WINDOW', '') or 8))
+# Limit on the SQL written ahead so neither side of the pipe can fill up and block the other
+PIPELINE_MAX_BYTES = 32768
+SPOOL_LARGE_RESULTS = user_spool_large_results or os.environ.get('SPDX_SPOOL_RESULTS', '').lower() in ("1", "true", "yes")
+SPOOL_DIR = user_spool_dir or os.environ.get('SPDX_SPOOL_DIR', '') or None
+SPOOL_CHUNK_SIZE = 1 << 20
+# DbConnection.jar writes in the platform's default encoding, the pipes are decoded with the same
+PIPE_ENCODING = locale.getpreferredencoding(False)
+
+# Lines of Java's stderr kept per process, the last STDERR_ERROR_LINES are added to runner errors
+STDERR_BUFFER_LINES = 500
+STDERR_ERROR_LINES = 20
+
+JAR_PATH = os.path.join(BASE_DIR, '..', '..', 'samples', 'customreport_helper', 'DbConnection.jar')
+properties_file = os.path.join(BASE_DIR, '..', '..', 'config', 'core', 'core.db.properties')
+
+def check_java_environment():
+    """Exit with instructions if Java or DbConnection.jar can't be found. Run before Java is first started."""
+    if not os.path.exists(JAVA_PATH):
+        error_msg = (
+            f"Java executable not found at: {JAVA_PATH}\n"
+            "Please ensure Java is installed and accessible. You can:\n"
+            "1. Set the JAVA_HOME environment variable to your Java installation directory\n"
+            "2. Manually set the 'user_java_path' variable in this file:\n"
+            f"   {os.path.abspath(__file__)}\n"
+            f"   Example: user_java_path = r'C:\\Program Files\\Java\\jdk-11\\bin\\{java_exec}'"
+        )
+        logger.error(error_msg)
+        sys.exit(error_msg)
+
+    print(f"Using Java path: {JAVA_PATH}")  # Debugging line to check the Java path
+
+    if not os.path.exists(JAR_PATH):
+        error_msg = (
+            "DbConnection.jar is missing at: "
+            f"{os.path.abspath(JAR_PATH)}. "
+            "This means your Code Insight server is older than 2025 R3. "
+            "Please upgrade to 2025 R3 or later, or get DbConnection.jar file from support "
+            "and place it in <Install Location>\\samples\\customreport_helper."
+        )
+        logger.error(error_msg)
+        sys.exit(error_msg)
+
+def get_jvm_options(use_cds_archive=True):
+    """The options for the JVM that runs DbConnection.jar from the profile and any extra options."""
+    jvm_options = JVM_PROFILES[JVM_PROFILE] + list(JVM_OPTIONS)
+    if use_cds_archive and os.path.exists(CDS_ARCHIVE_FILE):
+        jvm_options.append(f"-XX:SharedArchiveFile={CDS_ARCHIVE_FILE}")
+    return jvm_options
+
+def create_cds_archive():
+    """
+    Create the AppCDS archive for DbConnection.jar with the current JVM profile (needs Java 13 or
+    later). Java answers CDS_TRAINING_QUERIES and writes the classes it loaded to the archive as
+    it exits, so later launches can map them instead of loading and verifying them again.
+    """
+    check_java_environment()
+    if os.path.exists(CDS_ARCHIVE_FILE):
+        os.remove(CDS_ARCHIVE_FILE)
+
+    command = [JAVA_PATH] + get_jvm_options(use_cds_archive=False) + [f"-XX:ArchiveClassesAtExit={CDS_ARCHIVE_FILE}", "-jar", JAR_PATH, os.path.abspath(properties_file)]
+    logger.info(f"Creating CDS archive with: {' '.join(command)}")
+    try:
+        result = subprocess.run(command, input="\n".join(CDS_TRAINING_QUERIES + ["exit"]) + "\n",
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, timeout=600)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error(f"Unable to run Java to create the CDS archive: {e}")
+        return None
+
+    if not os.path.exists(CDS_ARCHIVE_FILE):
+        logger.error(f"Java did not create the CDS archive. Exit code: {result.returncode}, stderr: {result.stderr}")
+        return None
+    logger.info(f"Created CDS archive {CDS_ARCHIVE_FILE} ({os.path.getsize(CDS_ARCHIVE_FILE)} bytes)")
+    return CDS_ARCHIVE_FILE
+
+class QueryResultReader:
+    """
+    Incremental parser for a single DbConnection.jar response. The jar answers each query with
+    one line of JSON, normally an array of row objects. Rows are decoded as soon as they are
+    complete so a large result is never built up as one string. A response that is not an
+    array (i.e. an error object) is available from value once rows() has been exhausted.
+    """
+    chunk_size = 65536
+    decoder = json.JSONDecoder()
+
+    def __init__(self, stream, encoding=PIPE_ENCODING):
+        self.stream = stream
+        self.text_decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ""
+        self.pos = 0
+        self.line_complete = False
+        self.eof = False
+        self.value = None
+        self.bytes_read = 0
+
+    def _fill(self):
+        # Append the next piece of the response line, False once the line has been read
+        if self.line_complete:
+            return False
+        chunk = self.stream.readline(self.chunk_size)
+        if not chunk:
+            # The process went away part way through the response
+            self.line_complete = self.eof = True
+            return False
+        self.bytes_read += len(chunk)
+        self.line_complete = chunk.endswith(b"\n")
+        # A character split between two reads is held back by the decoder until the next one
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk, self.line_complete)
+        self.pos = 0
+        return True
+
+    def _next_char(self):
+        # Skip whitespace and return the next character of the line, None at the end of it
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def rows(self):
+        char = self._next_char()
+        while char is None and not self.eof:
+            # Blank line ahead of the response
+            self.line_complete = False
+            char = self._next_char()
+        if char is None:
+            self.value = []
+            return
+
+        if char != "[":
+            while self._fill():
+                pass
+            try:
+                self.value = json.loads(self.buffer[self.pos:])
+            except json.JSONDecodeError:
+                self.value = []
+            self.pos = len(self.buffer)
+            return
+        self.pos += 1
+
+        while True:
+            char = self._next_char()
+            if char is None:
+                logger.warning("Query response ended before the result was complete")
+                self.value = []
+                return
+            if char == "]":
+                self.pos += 1
+                self.drain()
+                return
+            if char == ",":
+                self.pos += 1
+                continue
+            try:
+                row, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                row, end = None, None
+            # A row running up to the end of the buffer may still be incomplete
+            if end is None or end >= len(self.buffer):
+                if self._fill():
+                    continue
+                if end is None:
+                    logger.warning("Unable to parse query response")
+                    self.value = []
+                    self.drain()
+                    return
+            self.pos = end
+            yield row
+
+    def drain(self):
+        """Discard whatever is left of the current response."""
+        self.pos = len(self.buffer)
+        while self._fill():
+            self.pos = len(self.buffer)
+
+
+class MappedResultReader(QueryResultReader):
+    """
+    QueryResultReader for a response that was spooled to a file. The file is mapped into memory
+    and decoded a large slice at a time, with each row decoded from the slice as it is reached.
+    """
+    chunk_size = SPOOL_CHUNK_SIZE
+
+    def __init__(self, spool_file, encoding=PIPE_ENCODING):
+        super().__init__(None, encoding)
+        self.spool_file = spool_file
+        self.bytes_read = os.fstat(spool_file.fileno()).st_size
+        # An empty file can't be mapped, it reads as an empty response
+        self.map = mmap.mmap(spool_file.fileno(), 0, access=mmap.ACCESS_READ) if self.bytes_read else None
+        self.offset = 0
+
+    def _fill(self):
+        if self.line_complete or self.offset >= self.bytes_read:
+            self.line_complete = True
+            return False
+        chunk = self.map[self.offset:self.offset + self.chunk_size]
+        self.offset += len(chunk)
+        self.line_complete = self.offset >= self.bytes_read
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk, self.line_complete)
+        self.pos = 0
+        return True
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.spool_file.close()
+
+
+def collect_rows(rows):
+    """The rows from an iter_query generator as a list, or the error response it returned."""
+    result = []
+    while True:
+        try:
+            result.append(next(rows))
+        except StopIteration as finished:
+            return result if finished.value is None else finished.value
+
+
+class QueryMetrics:
+    """
+    Call count, latency, rows and response size of the queries run through the DB runner,
+    grouped by the report_data_db function that issued each query.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = {}
+
+    def record(self, query_name, seconds, row_count, bytes_read):
+        with self.lock:
+            stats = self._stats(query_name)
+            stats["latencies"].append(seconds)
+            stats["rows"] += row_count
+            stats["bytesRead"] += bytes_read
+
+    def record_event(self, query_name, event):
+        """Count something that happened to a query, i.e. a timeout or a retry."""
+        with self.lock:
+            events = self._stats(query_name)["events"]
+            events[event] = events.get(event, 0) + 1
+
+    def _stats(self, query_name):
+        return self.queries.setdefault(query_name, {"latencies": [], "rows": 0, "bytesRead": 0, "events": {}})
+
+    def summary(self):
+        """Statistics per query name, the most expensive queries first."""
+        with self.lock:
+            queries = {name: dict(stats, latencies=sorted(stats["latencies"])) for name, stats in self.queries.items()}
+        summary = {}
+        for name, stats in sorted(queries.items(), key=lambda item: -sum(item[1]["latencies"])):
+            latencies = stats["latencies"]
+            summary[name] = {
+                "count": len(latencies),
+                "totalSeconds": round(sum(latencies), 4),
+                "p50Seconds": round(percentile(latencies, 50), 4),
+                "p95Seconds": round(percentile(latencies, 95), 4),
+                "rows": stats["rows"],
+                "bytesRead": stats["bytesRead"]
+            }
+            summary[name].update(stats["events"])
+        return summary
+
+    def write_summary(self, file_path):
+        summary = self.summary()
+        try:
+            with open(file_path, "w") as metrics_file:
+                json.dump(summary, metrics_file, indent=4)
+            logger.info(f"Query metrics for {len(summary)} queries written to {file_path}")
+        except OSError as e:
+            logger.warning(f"Unable to write query metrics to {file_path}: {e}")
+
+def percentile(sorted_values, percent):
+    # Nearest rank percentile of an already sorted list
+    if not sorted_values:
+        return 0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+# Module of the query functions that queries are named after, see get_query_name
+QUERY_FUNCTIONS_MODULE = "report_data_db"
+# Functions of the runners themselves, skipped when naming a query from the call stack
+RUNNER_FUNCTIONS = {"run_query", "iter_query", "run_many", "submit", "run_columnar_query", "_send_query", "get_query_name"}
+
+def get_query_name():
+    """Name of the report_data_db function that issued the current query, taken from the call stack."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        function_name = frame.f_code.co_name
+        if frame.f_globals.get("__name__") == QUERY_FUNCTIONS_MODULE and function_name not in RUNNER_FUNCTIONS and not function_name.startswith("<"):
+            return function_name
+        frame = frame.f_back
+    return "unknown"
+
+query_metrics = QueryMetrics()
+# Where write_query_metrics puts the summary at exit, set by create_report.py
+query_metrics_file = None
+
+def write_query_metrics():
+    """Write the query metrics summary. Runs at exit so failed and aborted runs get one too."""
+    if query_metrics_file:
+        query_metrics.write_summary(query_metrics_file)
+
+def completed_future(run_query, *args):
+    """A Future for the result of a query that is run straight away, for runners without a pipeline."""
+    future = Future()
+    try:
+        future.set_result(run_query(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def is_read_only_query(sql_query):
+    """True for a SELECT, which can be run again after a failure without any side effects."""
+    return sql_query.lstrip().upper().startswith(("SELECT", "WITH"))
+
+def bind_parameters(sql_query, params):
+    """
+    The query with each ? placeholder outside of a string literal replaced by its parameter
+    written as a SQL literal, for runners that only take plain SQL. A query without params is
+    returned as it is.
+    """
+    if params is None:
+        return sql_query
+    params = list(params)
+    parts = SQL_STRING_LITERAL.split(sql_query)
+    position = 0
+    for index in range(0, len(parts), 2):
+        pieces = parts[index].split("?")
+        if len(pieces) - 1 > len(params) - position:
+            raise ValueError(f"More placeholders than the {len(params)} parameters given for query: {sql_query}")
+        for piece_index in range(1, len(pieces)):
+            pieces[piece_index] = sql_literal(params[position]) + pieces[piece_index]
+            position += 1
+        parts[index] = "".join(pieces)
+    if position != len(params):
+        raise ValueError(f"{len(params)} parameters given for {position} placeholders in query: {sql_query}")
+    return "".join(parts)
+
+def sql_literal(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    text = str(value).replace("'", "''")
+    if get_db_vendor() == "mysql":
+        # MySQL also treats a backslash in a string as an escape
+        text = text.replace("\\", "\\\\")
+    return f"'{text}'"
+
+
+query_recorder = None  # Opened by create_db_runner when SPDX_DB_RECORD is set
+
+
+class DbRunnerError(RuntimeError):
+    """The DB runner process went away (or was killed) before a query was answered."""
+
+
+class QueryTimeoutError(DbRunnerError):
+    """No part of a query response arrived within QUERY_INACTIVITY_TIMEOUT_SECONDS."""
+
+
+class StderrDrain:
+    """
+    Reads the stderr of a Java process on a background thread. Verbose JDBC warnings would
+    otherwise fill the pipe and stall the JVM part way through a report. Each line is logged to
+    the report_data_db_runner.java logger and the most recent are kept to explain runner errors. Warning
+    and error lines are counted against the query that was running in the query metrics.
+    """
+    def __init__(self, stream, pid):
+        self.pid = pid
+        self.lines = collections.deque(maxlen=STDERR_BUFFER_LINES)
+        self.query_name = "session_setup"
+        self.thread = threading.Thread(target=self._run, args=(stream,), name=f"java-stderr-{pid}", daemon=True)
+        self.thread.start()
+
+    def _run(self, stream):
+        try:
+            for line in stream:
+                line = line.rstrip()
+                if not line:
+                    continue
+                self.lines.append(line)
+                level = get_stderr_level(line)
+                java_logger.log(logging.WARNING if level == "javaErrors" else logging.DEBUG, f"[{self.pid}] {line}")
+                if level:
+                    query_metrics.record_event(self.query_name or "java_process", level)
+        except (OSError, ValueError):
+            pass  # The pipe was closed along with the process
+
+    def recent(self, wait_seconds=0):
+        """The last lines written, after giving an exited process time to flush them."""
+        if wait_seconds:
+            self.thread.join(wait_seconds)
+        lines = list(self.lines)[-STDERR_ERROR_LINES:]
+        return "\n".join(lines) if lines else "No stderr output"
+
+java_logger = logging.getLogger(__name__ + ".java")
+
+def get_stderr_level(line):
+    upper = line.upper()
+    if "ERROR" in upper or "SEVERE" in upper or "EXCEPTION" in upper:
+        return "javaErrors"
+    if "WARN" in upper:
+        return "javaWarnings"
+    return None
+
+
+class QueryWatchdog:
+    """
+    Background thread that aborts the query of any runner whose deadline has passed, so a stalled
+    Java process can't block run_query on the pipe forever. Runners arm their deadline only while
+    they are waiting for the next part of a response, so it is an inactivity timeout rather than
+    a limit on the whole query. A timeout of 0 turns the watchdog off.
+    """
+    def __init__(self, timeout_seconds):
+        self.timeout_seconds = timeout_seconds
+        self.interval = min(1.0, timeout_seconds / 4) if timeout_seconds > 0 else None
+        self.runners = weakref.WeakSet()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def watch(self, runner):
+        if self.timeout_seconds <= 0:
+            return
+        with self.lock:
+            self.runners.add(runner)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="db-query-watchdog", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            with self.lock:
+                runners = list(self.runners)
+            for runner in runners:
+                deadline = runner.deadline
+                if deadline is not None and now > deadline:
+                    runner.deadline = None
+                    runner.abort_query()
+
+query_watchdog = QueryWatchdog(QUERY_INACTIVITY_TIMEOUT_SECONDS)
+
+
+class InteractiveDbQueryRunner:
+    def __init__(self, jar_path, java_path=JAVA_PATH):
+        self.jar_path = jar_path
+        self.java_path = java_path
+        self.lock = threading.Lock()
+        self.proc = None
+        self.stderr_drain = None
+        self.deadline = None
+        self.timed_out = False
+        self.pipeline_queue = queue.Queue()
+        self.pipeline_lock = threading.Lock()
+        self.pipeline_thread = None
+        self._start()
+        query_watchdog.watch(self)
+
+    def _start(self):
+        try:
+            # Get absolute path to properties file
+            abs_properties_path = os.path.abspath(properties_file)
+            command = [self.java_path] + get_jvm_options() + ["-jar", self.jar_path, abs_properties_path]
+            logger.info(f"Starting Java process with: {' '.join(command)}")
+
+            start_time = time.monotonic()
+            self.proc = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            logger.info(f"Java process started with PID: {self.proc.pid}")
+            # stdout stays binary so a response can be spooled to a file without decoding it first
+            self.input = io.TextIOWrapper(self.proc.stdin, encoding=PIPE_ENCODING, line_buffering=True)
+            self.output = self.proc.stdout
+            self.encoding = PIPE_ENCODING
+            self.stderr_drain = StderrDrain(io.TextIOWrapper(self.proc.stderr, encoding=PIPE_ENCODING, errors="replace"), self.proc.pid)
+
+            self._handshake(start_time)
+
+        except Exception as e:
+            logger.error(f"Failed to start Java process: {e}")
+            raise
+
+    def _handshake(self, start_time):
+        """
+        Set autocommit on. The jar only answers once it is connected to the database, so the
+        response also means the worker is ready. If Java exits instead its stderr is reported.
+        Runs under the lock held by restart, or in __init__ before the runner is shared.
+        """
+        sql_query = "SET autocommit = true;"
+        reader = QueryResultReader(self.output, self.encoding)
+        try:
+            self._send_query(sql_query)
+            self._arm_deadline()
+            rows = list(reader.rows())
+        except (OSError, RuntimeError):
+            reader.eof = True
+        finally:
+            self.deadline = None
+        if reader.eof:
+            exit_code = self.proc.wait()
+            raise RuntimeError(f"Java process terminated during startup. Exit code: {exit_code}, stderr: {self.stderr_drain.recent(wait_seconds=5)}")
+        elapsed = time.monotonic() - start_time
+        query_metrics.record("session_setup", elapsed, len(rows), reader.bytes_read)
+        if query_recorder:
+            query_recorder.record(sql_query, rows if reader.value is None else reader.value)
+
+        if isinstance(reader.value, dict):
+            logger.warning(f"Could not set autocommit mode: {reader.value}")
+        else:
+            logger.info("Set database autocommit to true")
+        # The jar can't run without core.db.properties so there is no vendor to check without it
+        if os.path.exists(properties_file) and get_db_vendor() == "mysql":
+            self._setup_mysql_session()
+        self.stderr_drain.query_name = None
+        # Compare this between JVM profiles and with or without the CDS archive
+        cds_archive = "with" if os.path.exists(CDS_ARCHIVE_FILE) else "without"
+        logger.info(f"Java process {self.proc.pid} ready after {elapsed:.3f}s (JVM profile {JVM_PROFILE}, {cds_archive} CDS archive)")
+
+    def _setup_mysql_session(self):
+        reader = QueryResultReader(self.output, self.encoding)
+        self._send_query(MYSQL_SESSION_SQL)
+        self._arm_deadline()
+        try:
+            list(reader.rows())
+        finally:
+            self.deadline = None
+        if isinstance(reader.value, dict):
+            logger.warning(f"Could not set group_concat_max_len: {reader.value}")
+
+    def _send_query(self, sql_query, query_name=None):
+        if self.proc is None or self.proc.poll() is not None:
+            raise DbRunnerError(f"Java process is not running{self._recent_stderr()}")
+        try:
+            self.input.write(sql_query + "\n")
+            self.input.flush()
+        except OSError as e:
+            raise DbRunnerError(f"Unable to send query to Java process: {e}{self._recent_stderr()}") from e
+
+    def _recent_stderr(self):
+        if self.stderr_drain is None:
+            return ""
+        return f"\nRecent stderr of Java process {self.stderr_drain.pid}:\n{self.stderr_drain.recent(wait_seconds=1)}"
+
+    def _set_query_name(self, query_name):
+        # Stderr lines are counted against the query that is running
+        if self.stderr_drain is not None:
+            self.stderr_drain.query_name = query_name
+
+    def _stop(self):
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait()
+            except OSError as e:
+                logger.warning(f"Error killing Java process: {e}")
+            self.proc = None
+
+    def restart(self):
+        with self.lock:
+            self._restart()
+
+    def _restart(self):
+        logger.warning("Restarting the Java process")
+        self._stop()
+        self._start()
+
+    def abort_query(self):
+        """Called by the watchdog when a response is overdue. The reader then sees the pipe close."""
+        self.timed_out = True
+        # Read once, the process may not have been started yet or may be stopped meanwhile
+        proc = self.proc
+        if proc is None:
+            logger.error(f"No response from the Java process within {QUERY_INACTIVITY_TIMEOUT_SECONDS}s")
+            return
+        logger.error(f"No response from Java process {proc.pid} within {QUERY_INACTIVITY_TIMEOUT_SECONDS}s - killing it")
+        try:
+            proc.kill()
+        except OSError:
+            pass
+
+    def _arm_deadline(self):
+        if QUERY_INACTIVITY_TIMEOUT_SECONDS > 0:
+            self.deadline = time.monotonic() + QUERY_INACTIVITY_TIMEOUT_SECONDS
+
+    def _watched_rows(self, reader):
+        """The rows of a response. The deadline only runs while waiting on the pipe, not while the caller has a row."""
+        rows = reader.rows()
+        while True:
+            self._arm_deadline()
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            finally:
+                self.deadline = None
+            yield row
+        if self.timed_out:
+            raise QueryTimeoutError(f"No part of the query response within {QUERY_INACTIVITY_TIMEOUT_SECONDS}s{self._recent_stderr()}")
+        if reader.eof:
+            raise DbRunnerError(f"The Java process exited before the query was answered{self._recent_stderr()}")
+
+    def _recover(self, error, sql_query, query_name, attempt, rows_returned):
+        """Restart after a failed query. Returns if the query should be run again, otherwise raises the error."""
+        query_metrics.record_event(query_name, "timeouts" if isinstance(error, QueryTimeoutError) else "failures")
+        logger.error(f"{query_name}: {error}")
+        self.restart()
+        query_metrics.record_event(query_name, "restarts")
+        # Only SELECTs are safe to run again, and not once some of the rows have been handed out
+        if rows_returned or not is_read_only_query(sql_query) or attempt > QUERY_RETRIES:
+            raise error
+        query_metrics.record_event(query_name, "retries")
+        logger.warning(f"{query_name}: running the query again (retry {attempt} of {QUERY_RETRIES})")
+
+    def run_query(self, sql_query, query_name=None, spool=False, params=None):
+        query_name = query_name or get_query_name()
+        # DbConnection.jar only takes plain SQL so parameters are written into the query
+        sql_query = bind_parameters(sql_query, params)
+        if spool and SPOOL_LARGE_RESULTS:
+            return collect_rows(self.iter_query(sql_query, query_name, spool=True))
+        attempt = 1
+        while True:
+            try:
+                return self._run_query(sql_query, query_name)
+            except DbRunnerError as e:
+                self._recover(e, sql_query, query_name, attempt, False)
+            attempt += 1
+
+    def _run_query(self, sql_query, query_name):
+        with self.lock:
+            start_time = time.monotonic()
+            self.timed_out = False
+            self._set_query_name(query_name)
+            reader = QueryResultReader(self.output, self.encoding)
+            rows = []
+            try:
+                self._send_query(sql_query, query_name)
+                rows = list(self._watched_rows(reader))
+            finally:
+                self._set_query_name(None)
+                query_metrics.record(query_name, time.monotonic() - start_time, len(rows), reader.bytes_read)
+            result = rows if reader.value is None else reader.value
+            if query_recorder:
+                query_recorder.record(sql_query, result)
+            return result
+
+    def iter_query(self, sql_query, query_name=None, spool=False, params=None):
+        """
+        Yield the rows of a query as they are parsed from the pipe. A large result can be spooled
+        to a file first (see SPOOL_LARGE_RESULTS), the rows are then parsed from the file.
+        """
+        query_name = query_name or get_query_name()
+        sql_query = bind_parameters(sql_query, params)
+        iter_rows = self._iter_spooled_query if spool and SPOOL_LARGE_RESULTS else self._iter_query
+        attempt = 1
+        while True:
+            progress = {"rows": 0}
+            try:
+                return (yield from iter_rows(sql_query, query_name, progress))
+            except DbRunnerError as e:
+                self._recover(e, sql_query, query_name, attempt, progress["rows"] > 0)
+            attempt += 1
+
+    def _iter_query(self, sql_query, query_name, progress):
+        with self.lock:
+            start_time = time.monotonic()
+            self.timed_out = False
+            self._set_query_name(query_name)
+            reader = QueryResultReader(self.output, self.encoding)
+            recorded_rows = [] if query_recorder else None
+            try:
+                self._send_query(sql_query, query_name)
+                for row in self._watched_rows(reader):
+                    progress["rows"] += 1
+                    if recorded_rows is not None:
+                        recorded_rows.append(row)
+                    yield row
+                if query_recorder:
+                    query_recorder.record(sql_query, recorded_rows if reader.value is None else reader.value)
+                # Anything other than a result set (an error) ends up in value
+                return reader.value
+            finally:
+                # The caller may stop early so make sure the rest of the response is consumed
+                self._arm_deadline()
+                try:
+                    reader.drain()
+                finally:
+                    self.deadline = None
+                self._set_query_name(None)
+                # The time includes the caller's handling of the rows as they are streamed
+                query_metrics.record(query_name, time.monotonic() - start_time, progress["rows"], reader.bytes_read)
+
+    def _iter_spooled_query(self, sql_query, query_name, progress):
+        start_time = time.monotonic()
+        with self.lock:
+            self.timed_out = False
+            self._set_query_name(query_name)
+            try:
+                self._send_query(sql_query, query_name)
+                spool_file = self._spool_response()
+            except DbRunnerError:
+                query_metrics.record(query_name, time.monotonic() - start_time, 0, 0)
+                raise
+            finally:
+                self._set_query_name(None)
+
+        # The lock is released so the process can run the next query while these rows are parsed
+        reader = MappedResultReader(spool_file, self.encoding)
+        recorded_rows = [] if query_recorder else None
+        try:
+            for row in reader.rows():
+                progress["rows"] += 1
+                if recorded_rows is not None:
+                    recorded_rows.append(row)
+                yield row
+            if query_recorder:
+                query_recorder.record(sql_query, recorded_rows if reader.value is None else reader.value)
+            return reader.value
+        finally:
+            reader.close()
+            query_metrics.record(query_name, time.monotonic() - start_time, progress["rows"], reader.bytes_read)
+
+    def _spool_response(self):
+        """Copy the next response line to a temporary file as it arrives, without decoding it."""
+        spool_file = tempfile.TemporaryFile(prefix="_spdx_query_", dir=SPOOL_DIR)
+        try:
+            while True:
+                self._arm_deadline()
+                try:
+                    chunk = self.output.readline(SPOOL_CHUNK_SIZE)
+                finally:
+                    self.deadline = None
+                if not chunk:
+                    if self.timed_out:
+                        raise QueryTimeoutError(f"No part of the query response within {QUERY_INACTIVITY_TIMEOUT_SECONDS}s{self._recent_stderr()}")
+                    raise DbRunnerError(f"The Java process exited before the query was answered{self._recent_stderr()}")
+                if spool_file.tell() == 0 and not chunk.strip():
+                    continue  # Blank line ahead of the response
+                spool_file.write(chunk)
+                if chunk.endswith(b"\n"):
+                    break
+            spool_file.flush()
+            return spool_file
+        except BaseException:
+            spool_file.close()
+            raise
+
+    def submit(self, sql_query, query_name=None, params=None):
+        """
+        Queue a query and return a Future for its result. Queued queries are written to the process
+        up to PIPELINE_WINDOW ahead of reading the response, so a run of small independent lookups
+        doesn't wait for a full round trip each. The responses come back in the order written.
+        """
+        future = Future()
+        self.pipeline_queue.put([future, bind_parameters(sql_query, params), query_name or get_query_name(), 1])
+        with self.pipeline_lock:
+            if self.pipeline_thread is None:
+                self.pipeline_thread = threading.Thread(target=self._run_pipeline, name="db-query-pipeline", daemon=True)
+                self.pipeline_thread.start()
+        return future
+
+    def _run_pipeline(self):
+        while True:
+            entry = self.pipeline_queue.get()
+            if entry is None:
+                break
+            # Other queries on this runner wait until the pipeline has emptied
+            with self.lock:
+                self._pipeline(entry)
+
+    def _pipeline(self, entry):
+        waiting = collections.deque([entry])
+        in_flight = collections.deque()
+        in_flight_bytes = 0
+        while waiting or in_flight:
+            # Write ahead for as long as the window allows, taking any queries submitted meanwhile
+            while len(in_flight) < PIPELINE_WINDOW:
+                if not waiting:
+                    try:
+                        next_entry = self.pipeline_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if next_entry is None:
+                        self.pipeline_queue.put(None)  # Closing, picked up by _run_pipeline
+                        break
+                    waiting.append(next_entry)
+                future, sql_query = waiting[0][0], waiting[0][1]
+                if in_flight and in_flight_bytes + len(sql_query) > PIPELINE_MAX_BYTES:
+                    break
+                entry = waiting.popleft()
+                if not (future.running() or future.set_running_or_notify_cancel()):
+                    continue
+                try:
+                    self._send_query(sql_query, entry[2])
+                except DbRunnerError as e:
+                    self._pipeline_failed(e, list(in_flight) + [entry], waiting)
+                    in_flight.clear()
+                    in_flight_bytes = 0
+                    break
+                entry.append(time.monotonic())
+                in_flight.append(entry)
+                in_flight_bytes += len(sql_query) + 1
+            if not in_flight:
+                continue
+
+            entry = in_flight.popleft()
+            future, sql_query, query_name, attempt, start_time = entry
+            in_flight_bytes -= len(sql_query) + 1
+            self.timed_out = False
+            self._set_query_name(query_name)
+            reader = QueryResultReader(self.output, self.encoding)
+            rows = []
+            try:
+                rows = list(self._watched_rows(reader))
+            except DbRunnerError as e:
+                # The responses to everything written after this query are lost along with it
+                self._pipeline_failed(e, [entry] + list(in_flight), waiting)
+                in_flight.clear()
+                in_flight_bytes = 0
+                continue
+            finally:
+                self._set_query_name(None)
+                query_metrics.record(query_name, time.monotonic() - start_time, len(rows), reader.bytes_read)
+            result = rows if reader.value is None else reader.value
+            if query_recorder:
+                query_recorder.record(sql_query, result)
+            future.set_result(result)
+
+    def _pipeline_failed(self, error, failed_entries, waiting):
+        """Restart after a pipelined query failed and queue the SELECTs that were in flight again."""
+        query_name = failed_entries[0][2]
+        query_metrics.record_event(query_name, "timeouts" if isinstance(error, QueryTimeoutError) else "failures")
+        logger.error(f"{query_name}: {error}")
+        try:
+            self._restart()  # The pipeline already holds the lock
+        except Exception as e:
+            for entry in failed_entries + list(waiting):
+                entry[0].set_exception(e)
+            waiting.clear()
+            return
+        query_metrics.record_event(query_name, "restarts")
+        retries = []
+        for index, entry in enumerate(failed_entries):
+            future, sql_query, entry_name, attempt = entry[:4]
+            if not is_read_only_query(sql_query) or attempt > QUERY_RETRIES:
+                future.set_exception(error)
+                continue
+            query_metrics.record_event(entry_name, "retries")
+            # Only the query that failed uses up a retry, not those that were lost behind it
+            retries.append([future, sql_query, entry_name, attempt + 1 if index == 0 else attempt])
+        if retries:
+            logger.warning(f"Running {len(retries)} pipelined queries again")
+        waiting.extendleft(reversed(retries))
+
+    def close(self):
+        self.deadline = None
+        self.pipeline_queue.put(None)
+        if self.proc and self.proc.poll() is None:
+            try:
+                self.input.write("exit\n")
+                self.input.flush()
+            except Exception as e:
+                logger.warning(f"Error sending exit to Java process: {e}")
+            try:
+                self.proc.terminate()
+            except Exception as e:
+                logger.warning(f"Error terminating Java process: {e}")
+            self.proc = None
+
+
+class DbQueryRunnerPool:
+    """
+    Pool of InteractiveDbQueryRunner workers (or broker or DB-API connections). Each query is given to
+    whichever worker is idle so independent queries (from run_many or from several threads) run concurrently.
+    """
+    def __init__(self, worker_factory, worker_count=DB_WORKER_COUNT):
+        # Start the workers side by side since each one pays the full JVM startup cost
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            startups = [executor.submit(worker_factory) for _ in range(worker_count)]
+        self.workers = []
+        for startup in startups:
+            try:
+                self.workers.append(startup.result())
+            except Exception as e:
+                logger.error(f"Failed to start DB worker: {e}")
+        if not self.workers:
+            raise RuntimeError("Unable to start any DB workers")
+        logger.info(f"Started {len(self.workers)} of {worker_count} DB workers")
+        # Set by workers that know their database without reading core.db.properties
+        self.db_vendor = getattr(self.workers[0], "db_vendor", None)
+
+        self.idle_workers = queue.Queue()
+        for worker in self.workers:
+            self.idle_workers.put(worker)
+        self.executor = ThreadPoolExecutor(max_workers=len(self.workers))
+        self.pipeline_workers = itertools.cycle(self.workers)
+
+    def _cache_for(self, sql_query):
+        """The query cache if it is open and the result of the query can be kept in it, otherwise None."""
+        if query_cache is not None and query_cache.is_cacheable(sql_query):
+            return query_cache
+        return None
+
+    def run_query(self, sql_query, query_name=None, spool=False, params=None):
+        # Name the query here since the call stack of a run_many thread doesn't reach the caller
+        query_name = query_name or get_query_name()
+        cache = self._cache_for(sql_query)
+        if cache:
+            # Cached under the query as it would be run, with its parameters in place
+            cache_sql = bind_parameters(sql_query, params)
+            result = cache.get(query_name, cache_sql)
+            if result is not None:
+                return result
+        worker = self.idle_workers.get()
+        try:
+            result = worker.run_query(sql_query, query_name, spool, params)
+        finally:
+            self.idle_workers.put(worker)
+        if cache and isinstance(result, list):
+            cache.put(query_name, cache_sql, result)
+        return result
+
+    def iter_query(self, sql_query, query_name=None, spool=False, params=None):
+        """Yield rows from an idle worker, which is held until the rows have been consumed."""
+        query_name = query_name or get_query_name()
+        cache = self._cache_for(sql_query)
+        if cache:
+            cache_sql = bind_parameters(sql_query, params)
+            cached_rows = cache.iter_rows(query_name, cache_sql)
+            if cached_rows is not None:
+                yield from cached_rows
+                return
+            # The rows are written to the cache as they are yielded rather than collected first
+            cache_writer = cache.writer(query_name, cache_sql)
+        worker = self.idle_workers.get()
+        rows = worker.iter_query(sql_query, query_name, spool, params)
+        try:
+            while True:
+                try:
+                    row = next(rows)
+                except StopIteration as finished:
+                    # Only a complete result set is cached, finished.value is set for errors
+                    if cache and finished.value is None:
+                        cache_writer.commit()
+                    return finished.value
+                if cache:
+                    cache_writer.add(row)
+                yield row
+        finally:
+            # Release the worker's lock (draining any unread rows) before handing it back
+            rows.close()
+            if cache:
+                # Nothing is kept for a result that wasn't read to the end
+                cache_writer.discard()
+            self.idle_workers.put(worker)
+
+    def submit(self, sql_query, query_name=None, params=None):
+        """Pipeline a query on the next worker in turn. Returns a Future for its result."""
+        query_name = query_name or get_query_name()
+        cache = self._cache_for(sql_query)
+        if cache:
+            cache_sql = bind_parameters(sql_query, params)
+            result = cache.get(query_name, cache_sql)
+            if result is not None:
+                return completed_future(lambda: result)
+        future = next(self.pipeline_workers).submit(sql_query, query_name, params)
+        if cache:
+            def cache_result(future):
+                if future.exception() is None and isinstance(future.result(), list):
+                    cache.put(query_name, cache_sql, future.result())
+            future.add_done_callback(cache_result)
+        return future
+
+    def run_many(self, sql_queries, query_name=None, spool=False):
+        """Fan a batch of queries out across the pool. Results are returned in query order."""
+        query_name = query_name or get_query_name()
+        sql_queries = list(sql_queries)
+        if len(self.workers) == 1 or len(sql_queries) < 2:
+            return [self.run_query(sql_query, query_name, spool) for sql_query in sql_queries]
+        return list(self.executor.map(lambda sql_query: self.run_query(sql_query, query_name, spool), sql_queries))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        for worker in self.workers:
+            worker.close()
+        if query_recorder:
+            query_recorder.close()
+
+
+class BrokerDbQueryConnection(InteractiveDbQueryRunner):
+    """
+    A connection to db_runner_broker.py in place of a DbConnection.jar worker. The broker speaks
+    the same protocol as the jar (one SQL line in, one JSON line out) over a Unix socket and runs
+    each query on one of the workers it shares between all of the report processes. A query line
+    can start with BROKER_QUERY_NAME_PREFIX, the query name and a tab.
+    """
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.lock = threading.Lock()
+        self.connection = None
+        self.stderr_drain = None
+        self.deadline = None
+        self.timed_out = False
+        self.pipeline_queue = queue.Queue()
+        self.pipeline_lock = threading.Lock()
+        self.pipeline_thread = None
+        self._start()
+        query_watchdog.watch(self)
+
+    def _start(self):
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.connection.connect(self.socket_path)
+        except OSError:
+            self.connection.close()
+            self.connection = None
+            raise
+        self.input = self.connection.makefile("w", encoding="utf-8")
+        self.output = self.connection.makefile("rb")
+        self.encoding = "utf-8"
+
+    def _send_query(self, sql_query, query_name=None):
+        if self.connection is None:
+            raise DbRunnerError("Not connected to the DB runner broker")
+        if query_name:
+            # The broker keeps its query metrics under the name of the report function
+            sql_query = BROKER_QUERY_NAME_PREFIX + query_name + "\t" + sql_query
+        try:
+            self.input.write(sql_query + "\n")
+            self.input.flush()
+        except OSError as e:
+            raise DbRunnerError(f"Unable to send query to the DB runner broker: {e}") from e
+
+    def _stop(self):
+        if self.connection is not None:
+            for stream in (self.input, self.output, self.connection):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+            self.connection = None
+
+    def _restart(self):
+        logger.warning("Reconnecting to the DB runner broker")
+        self._stop()
+        self._start()
+
+    def abort_query(self):
+        logger.error(f"No response from the DB runner broker within {QUERY_INACTIVITY_TIMEOUT_SECONDS}s - dropping the connection")
+        self.timed_out = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except (OSError, AttributeError):
+            pass
+
+    def close(self):
+        self.deadline = None
+        self.pipeline_queue.put(None)
+        self._stop()
+
+
+def is_db_broker_running(socket_path):
+    """True if db_runner_broker.py is accepting connections on socket_path."""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return False
+    try:
+        BrokerDbQueryConnection(socket_path).close()
+        return True
+    except OSError:
+        # Left behind by a broker that has stopped
+        return False
+
+
+class LazyDbRunner:
+    """
+    Stands in for the database runner until it is first used, so importing this module (for
+    --help, invalid report options or an error report) doesn't start Java. Any attribute that
+    isn't on the proxy itself creates the runner with the factory and is passed through to it.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self.runner = None
+        self.start_seconds = None
+        self.startup_error = None
+        self.startup_thread = None
+        self.wait_seconds = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        wait_start_time = time.perf_counter()
+        if self.runner is None:
+            with self.lock:  # Waits for a background start that is already under way
+                if self.runner is None:
+                    if self.startup_error is not None:
+                        raise self.startup_error
+                    start_time = time.perf_counter()
+                    try:
+                        self.runner = self.factory()
+                    except BaseException as e:
+                        # Kept so the first query sees why a background start failed
+                        self.startup_error = e
+                        raise
+                    self.start_seconds = time.perf_counter() - start_time
+                    logger.info(f"Database runner started in {self.start_seconds:.3f}s")
+        if self.wait_seconds is None and threading.current_thread() is not self.startup_thread:
+            # How long the first query waited for the runner to be ready
+            self.wait_seconds = time.perf_counter() - wait_start_time
+            logger.info(f"First query waited {self.wait_seconds:.3f}s for the database runner")
+        return self.runner
+
+    def start_in_background(self):
+        """Start the runner on a separate thread so Java warms up while the caller carries on."""
+        if self.runner is None and self.startup_thread is None:
+            self.startup_thread = threading.Thread(target=self._background_start, name="db-runner-startup", daemon=True)
+            self.startup_thread.start()
+
+    def _background_start(self):
+        try:
+            self.start()
+        except BaseException:
+            pass  # Raised again by start() for the first query
+
+    def __getattr__(self, name):
+        return getattr(self.start(), name)
+
+    def close(self):
+        # Let a background start finish so its Java processes are shut down too
+        if self.startup_thread is not None:
+            self.startup_thread.join()
+        # Nothing to shut down if no query was ever run
+        if self.runner is not None:
+            self.runner.close()
+            self.runner = None
+
+
+def create_jvm_runner():
+    """Workers that run the queries through DbConnection.jar, or through the broker when one is running."""
+    if is_db_broker_running(DB_BROKER_SOCKET):
+        logger.info(f"Running queries through the DB runner broker at {DB_BROKER_SOCKET}")
+        return DbQueryRunnerPool(lambda: BrokerDbQueryConnection(DB_BROKER_SOCKET), DB_WORKER_COUNT)
+    check_java_environment()
+    return DbQueryRunnerPool(lambda: InteractiveDbQueryRunner(JAR_PATH, JAVA_PATH), DB_WORKER_COUNT)
+
+def create_dbapi_runner():
+    """Workers with their own Python DB-API connection to the database in core.db.properties."""
+    # Only imported when used so the JVM backend doesn't need any of the database drivers
+    import report_data_db_dbapi
+    return report_data_db_dbapi.create_dbapi_runner()
+
+DB_BACKENDS = {"jvm": create_jvm_runner, "dbapi": create_dbapi_runner}
+
+def create_db_runner():
+    global query_recorder
+    # The replay runner and the recorder are kept with the query cache
+    import report_data_db_cache
+    if DB_REPLAY_FILE:
+        return report_data_db_cache.ReplayDbQueryRunner(DB_REPLAY_FILE)
+    if DB_SQLITE_FILE:
+        import report_data_db_dbapi
+        return report_data_db_dbapi.create_sqlite_runner(DB_SQLITE_FILE)
+    if DB_BACKEND not in DB_BACKENDS:
+        raise RuntimeError(f"Unknown database backend {DB_BACKEND}. Valid backends are {', '.join(DB_BACKENDS)}")
+    if DB_RECORD_FILE:
+        query_recorder = report_data_db_cache.QueryRecorder(DB_RECORD_FILE)
+        atexit.register(query_recorder.close)
+    return DB_BACKENDS[DB_BACKEND]()
+
+db_runner = LazyDbRunner(create_db_runner)
+# Exit handlers run last in first, so the metrics are written once the runner has closed
+atexit.register(write_query_metrics)
+atexit.register(db_runner.close)
+db_vendor = None
+db_properties = None
+query_cache = None  # Set by report_data_db.open_query_cache when SPDX_QUERY_CACHE is set
+
+
+def get_db_vendor():
+    global db_vendor # Declare db_vendor as global variable
+    # The vendor can't change during a run so only read the properties file once
+    if db_vendor is not None:
+        return db_vendor
+    if LOCAL_DB_RUNNER:
+        # No need for core.db.properties when replaying or using a local database
+        db_vendor = db_runner.db_vendor
+        return db_vendor
+    properties = read_db_properties()
+    if properties:
+        vendor = properties.get('db.vendor')
+        if vendor is not None:
+            db_vendor = vendor.lower()
+            return db_vendor
+
+def read_db_properties():
+    """The settings in core.db.properties as a dict, None if the file doesn't exist. Read once per run."""
+    global db_properties
+    if db_properties is None and check_properties_file_exists():
+        logger.info("Reading core.db.properties file")
+        with open(properties_file, 'r') as file:
+            # Add a dummy section header to make it compatible with configparser
+            lines = ['[DEFAULT]\n']
+            for line in file:
+                # Skip comments starting with #
+                if not line.strip().startswith('#'):
+                    lines.append(line)
+
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_string(''.join(lines))
+        db_properties = dict(config['DEFAULT'])
+    return db_properties
+
+
+def check_properties_file_exists():
+    try:
+        with open(properties_file, 'r') as file:
+            return True
+    except FileNotFoundError:
+        print(f"Properties file {properties_file} not found.")
+        return False
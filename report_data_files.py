@@ -9,7 +9,7 @@ Modified By : sarthak
 Modified On: Mon 07 2025
 File : report_data_files.py
 '''
-import logging, unicodedata, re
+import logging, unicodedata, re, itertools
 import report_data_db
 import SPDX_license_mappings
 
@@ -18,11 +18,11 @@ logger = logging.getLogger(__name__)
 #-------------------------------------------------
 def manage_file_details(projectID, hasExtractedLicensingInfos, includeUnassociatedFiles, includeCopyrightsData):
 
-    filePathToID, fileDetails = get_scanned_file_details(projectID, includeUnassociatedFiles)
+    filePathToID, fileDetails, inventoryFiles = get_scanned_file_details(projectID, includeUnassociatedFiles)
 
     fileDetails, hasExtractedLicensingInfos = get_file_evidence(projectID, fileDetails, hasExtractedLicensingInfos, includeCopyrightsData)
 
-    return filePathToID, fileDetails, hasExtractedLicensingInfos
+    return filePathToID, fileDetails, inventoryFiles, hasExtractedLicensingInfos
 
 
 #-----------------------------
@@ -32,52 +32,47 @@ def get_scanned_file_details(projectID, includeUnassociatedFiles):
     filePathToID["inInventory"] = {}
     filePathToID["notInInventory"] = {}
     fileDetails = {}
+    inventoryFiles = {} # Inventory ID to the unique file IDs (and SHA1s) associated to it
 
-    # Collect a list of the scanned files
+    # Stream the scanned files rather than collecting the full result sets first. Each file is a
+    # tuple of report_data_db.SCANNED_FILE_COLUMNS along with whether it is a remote file
     print("                + Collect data for all scanned files.")
     logger.info("                Collect data for all scanned.")
-    scannedFiles = report_data_db.get_server_scanned_files(projectID, includeUnassociatedFiles)
-    for file in scannedFiles:
-        file["remote"] = False
-
-    remoteFiles = report_data_db.get_remote_scanned_files(projectID, includeUnassociatedFiles)
-    logger.info("                Collected remote scanned files data for %s files." %len(remoteFiles))
-    for file in remoteFiles:
-        file["remote"] = True
-    
-    allScannedFiles = scannedFiles + remoteFiles
+    scannedFiles = zip(itertools.repeat(False), report_data_db.iter_server_scanned_files(projectID, includeUnassociatedFiles, columnar=True))
+    remoteFiles = zip(itertools.repeat(True), report_data_db.iter_remote_scanned_files(projectID, includeUnassociatedFiles, columnar=True))
+    remoteFileCount = 0
 
     # Cycle through each scanned file
-    for scannedFile in allScannedFiles:
+    for remote, (scannedFileId, fileName, fileMD5, fileSHA1, inventoryID) in itertools.chain(scannedFiles, remoteFiles):
+        if remote:
+            remoteFileCount += 1
+
         scannedFileDetails = {}
 
-        scannedFileId = scannedFile["fileId"]
-        fileName = scannedFile["filePath"]  
-        
         # The custom query returns the inventory ID or None for inInventory
-        inInventory = scannedFile["inInventory"] != None
+        inInventory = inventoryID != None
 
         # Don't collect any data for the files we don't care about if the option is not set
         if not includeUnassociatedFiles and not inInventory:
             continue
 
-        file_type_suffix = "-r" if scannedFile["remote"] else "-s"
+        file_type_suffix = "-r" if remote else "-s"
         uniqueFileID = str(scannedFileId) + file_type_suffix
 
         scannedFileDetails["SPDXID"] = "SPDXRef-File-" + uniqueFileID
         scannedFileDetails["fileName"] = fileName
         scannedFileDetails["checksums"] = []
         
-        if scannedFile["fileMD5"] is not None:
+        if fileMD5 is not None:
             checksum = {}
             checksum["algorithm"] = "MD5"
-            checksum["checksumValue"] = scannedFile["fileMD5"]
+            checksum["checksumValue"] = fileMD5
             scannedFileDetails["checksums"].append(checksum)
 
-        if scannedFile["fileSHA1"] is not None:
+        if fileSHA1 is not None:
             checksum = {}
             checksum["algorithm"] = "SHA1"
-            checksum["checksumValue"] = scannedFile["fileSHA1"]
+            checksum["checksumValue"] = fileSHA1
             scannedFileDetails["checksums"].append(checksum)
             
         scannedFileDetails["licenseConcluded"] = "NOASSERTION"  # TODO - Requires custom fields at file level
@@ -88,14 +83,21 @@ def get_scanned_file_details(projectID, includeUnassociatedFiles):
 
         filePathDetails = {}
         filePathDetails["uniqueFileID"] = uniqueFileID
-        filePathDetails["fileSHA1"] = scannedFile["fileSHA1"]
+        filePathDetails["fileSHA1"] = fileSHA1
 
         if inInventory:
             filePathToID["inInventory"][fileName] = filePathDetails
+
+            # Index the files by inventory item so packages don't need to look up their own files.
+            # Like the package file lookup this replaces, only server scanned files are included
+            if not remote:
+                inventoryFiles.setdefault(inventoryID, {})[uniqueFileID] = fileSHA1
         else:
             filePathToID["notInInventory"][fileName] = filePathDetails
+
+    logger.info("                Collected remote scanned files data for %s files." %remoteFileCount)
       
-    return filePathToID, fileDetails
+    return filePathToID, fileDetails, inventoryFiles
 
 
 #-----------------------------
@@ -104,7 +106,7 @@ def get_file_evidence(projectID, fileDetails, hasExtractedLicensingInfos, includ
     # Collect the copyright/license data per file and create dict based on
     print("                + Collect file level evidence.")
     logger.info("            + Collect file level evidence")
-    projectEvidenceDetails = report_data_db.get_project_evidence(projectID)
+    projectEvidenceDetails = report_data_db.get_project_evidence(projectID, columnar=True)
     print("                - File level evidence has been collected.") 
     logger.info("               - File level evidence has been collected.") 
 
@@ -197,22 +199,31 @@ def get_file_evidence(projectID, fileDetails, hasExtractedLicensingInfos, includ
 #-----------------------------
 def structure_evidence_details(projectEvidenceDetails):
     """
-    Structure evidence details by ID, collecting non-None values for LICENSE, EMAILURL, COPYRIGHT, SEARCHSTRING into lists
+    Structure evidence details by ID, collecting non-None values for LICENSE, EMAILURL, COPYRIGHT, SEARCHSTRING into lists.
+    The evidence is a list of dicts or a report_data_db.ColumnarResult of tuples
     """
     structuredData = {}
+
+    # Read each value by its key in a dict or by its position in a tuple
+    if isinstance(projectEvidenceDetails, report_data_db.ColumnarResult):
+        column = projectEvidenceDetails.index
+    else:
+        column = {columnName: columnName for columnName in report_data_db.EVIDENCE_COLUMNS}
+    ID, PATH, ALIAS, DIGEST, MATCHES, REMOTE_ID = (column[columnName] for columnName in ("ID", "PATH", "ALIAS", "DIGEST", "MATCHES", "REMOTE_ID"))
+    LICENSE, COPYRIGHT, EMAILURL, SEARCHSTRING = (column[columnName] for columnName in ("LICENSE", "COPYRIGHT", "EMAILURL", "SEARCHSTRING"))
     
     for evidence in projectEvidenceDetails:
-        fileId = evidence["ID"]
+        fileId = evidence[ID]
         
         # Initialize the structure for this ID if it doesn't exist
         if fileId not in structuredData:
             structuredData[fileId] = {
                 "ID": fileId,
-                "PATH": evidence["PATH"],
-                "ALIAS": evidence["ALIAS"],
-                "DIGEST": evidence["DIGEST"],
-                "MATCHES": evidence["MATCHES"],
-                "REMOTE_ID": evidence["REMOTE_ID"],
+                "PATH": evidence[PATH],
+                "ALIAS": evidence[ALIAS],
+                "DIGEST": evidence[DIGEST],
+                "MATCHES": evidence[MATCHES],
+                "REMOTE_ID": evidence[REMOTE_ID],
                 "licenseMatches": [],
                 "copyRightMatches": [],
                 "emailUrlMatches": [],
@@ -220,20 +231,27 @@ def structure_evidence_details(projectEvidenceDetails):
             }
         
         # Collect non-None values for each category
-        if evidence["LICENSE"] is not None and evidence["LICENSE"] not in structuredData[fileId]["licenseMatches"]:
-            structuredData[fileId]["licenseMatches"].append(evidence["LICENSE"])
-            
-        if evidence["COPYRIGHT"] is not None and evidence["COPYRIGHT"] not in structuredData[fileId]["copyRightMatches"]:
-            structuredData[fileId]["copyRightMatches"].append(evidence["COPYRIGHT"])
-            
-        if evidence["EMAILURL"] is not None and evidence["EMAILURL"] not in structuredData[fileId]["emailUrlMatches"]:
-            structuredData[fileId]["emailUrlMatches"].append(evidence["EMAILURL"])
-            
-        if evidence["SEARCHSTRING"] is not None and evidence["SEARCHSTRING"] not in structuredData[fileId]["searchTextMatches"]:
-            structuredData[fileId]["searchTextMatches"].append(evidence["SEARCHSTRING"])
+        add_evidence_matches(structuredData[fileId]["licenseMatches"], evidence[LICENSE])
+        add_evidence_matches(structuredData[fileId]["copyRightMatches"], evidence[COPYRIGHT])
+        add_evidence_matches(structuredData[fileId]["emailUrlMatches"], evidence[EMAILURL])
+        add_evidence_matches(structuredData[fileId]["searchTextMatches"], evidence[SEARCHSTRING])
+
+    # The database gives the matches of a file in no set order, and in a different one for each
+    # evidence query mode, so they are sorted to keep the report the same from run to run
+    for fileEvidence in structuredData.values():
+        for matchType in ("licenseMatches", "copyRightMatches", "emailUrlMatches", "searchTextMatches"):
+            fileEvidence[matchType].sort()
     
     return structuredData
 
 
+#-----------------------------
+def add_evidence_matches(matches, evidence):
+    # A single match, or from the aggregated evidence query a tuple of all of the file's matches
+    for match in evidence if isinstance(evidence, tuple) else (evidence,):
+        if match is not None and match not in matches:
+            matches.append(match)
+
+
 if __name__ == "__main__":
     manage_file_details(20, {}, True, True)
\ No newline at end of file
@@ -0,0 +1,273 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : synthetic_db.py
+'''
+import os, logging, argparse, random, sqlite3, hashlib, time
+
+logger = logging.getLogger(__name__)
+
+#----------------------------------------------------------------------#
+# Builds a SQLite database with the Code Insight tables queried by report_data_db.py
+# and fills it with generated data of a given size. Point the report at it with the
+# SPDX_DB_SQLITE environment variable to see how the report scales, i.e.
+#
+#     python3 synthetic_db.py -o synthetic.db --projects 50 --inventory 20000 --files 2000000 --evidence 10000000
+#     SPDX_DB_SQLITE=synthetic.db python3 create_report.py -pid 1
+#
+# Project 1 is the top level project and the other projects are arranged below it.
+#----------------------------------------------------------------------#
+
+SCHEMA = """
+CREATE TABLE PAS_PROJECT (ID_ INTEGER PRIMARY KEY, NAME_ TEXT);
+CREATE TABLE PAS_PROJECT_HIERARCHY (PROJECT_ID_ INTEGER, SUBPROJECT_ID_ INTEGER);
+CREATE TABLE PAS_PROJECT_CUSTOM_FIELDS_METADATA (FIELD_NAME_ TEXT, FIELD_LABEL_ TEXT);
+CREATE TABLE PAS_PROJECT_CUSTOM_FIELDS (PROJECT_ID_ INTEGER, CUSTOM_FIELD_1_ TEXT, CUSTOM_FIELD_2_ TEXT, CUSTOM_FIELD_3_ TEXT);
+CREATE TABLE PAS_INVENTORY_FLEX_FIELDS_METADATA (FIELD_NAME_ TEXT, FIELD_LABEL_ TEXT);
+CREATE TABLE PAS_INVENTORY_FLEX_FIELDS (INVENTORY_ID_ INTEGER PRIMARY KEY, FLEX_FIELD_1_ TEXT, FLEX_FIELD_2_ TEXT, FLEX_FIELD_3_ TEXT);
+CREATE TABLE PAS_SCAN_SERVERS (ID_ INTEGER PRIMARY KEY, ALIAS_ TEXT);
+CREATE TABLE PAS_PROJECT_SCAN_ROOTS (ID_ INTEGER PRIMARY KEY, SERVER_ID_ INTEGER);
+CREATE TABLE PAS_REPOSITORY_ITEM (ID_ INTEGER PRIMARY KEY, ITEM_TYPE_ TEXT, COMPONENT_ID_ INTEGER, COMPONENT_VERSION_ID_ INTEGER, LICENSE_ID_ INTEGER);
+CREATE TABLE PAS_VEX_ANALYSIS (VULNERABILITY_ID_ INTEGER, PROJECT_ID_ INTEGER, VULNERABILITY_STATE_ TEXT, JUSTIFICATION_ TEXT, VULNERABILITY_RESPONSE_ TEXT, DETAIL_ TEXT, DETAIL TEXT);
+CREATE TABLE PDL_FORGE (ID_ INTEGER PRIMARY KEY, NAME_ TEXT);
+CREATE TABLE PDL_LICENSE (ID_ INTEGER PRIMARY KEY, NAME_ TEXT, SHORT_NAME_ TEXT, SPDX_LICENSE_IDENTIFIER_ TEXT, URL_ TEXT);
+CREATE TABLE PDL_COMPONENT (ID_ INTEGER PRIMARY KEY, NAME_ TEXT, TITLE_ TEXT, URL_ TEXT, FORGE_ID_ INTEGER);
+CREATE TABLE PDL_COMPONENT_VERSION (ID_ INTEGER PRIMARY KEY, COMPONENT_ID_ INTEGER, VERSION_NAME_ TEXT);
+CREATE TABLE PDL_COMPONENT_VERSION_CUSTOM (ID_ INTEGER PRIMARY KEY, COMPONENT_ID_ INTEGER, VERSION_NAME_ TEXT);
+CREATE TABLE PDL_COMPONENT_LICENSE (COMPONENT_ID_ INTEGER, LICENSE_ID_ INTEGER);
+CREATE TABLE PDL_COMP_VER_LICENSE (COMPONENT_VERSION_ID_ INTEGER, LICENSE_ID_ INTEGER);
+CREATE TABLE PDL_CUSTOM_COMP_VER_LICENSE (VERSION_ID_ INTEGER, LICENSE_ID_ INTEGER);
+CREATE TABLE PDL_COMP_VER_VULNERABILITY (COMPONENT_VERSION_ID_ INTEGER, VULNERABILITY_ID_ INTEGER);
+CREATE TABLE PDL_VULNERABILITY (ID_ INTEGER PRIMARY KEY, NAME_ TEXT, DESCRIPTION_ TEXT, REGISTRY_ID_ INTEGER, URL_ TEXT, ORIGINAL_RELEASE_DATE_ TEXT, LAST_REVISED_DATE_ TEXT, CVSSV3_SEVERITY_ TEXT, CVSSV3_SCORE_ REAL, SEVERITY_ TEXT, SCORE_ REAL, CVSS3_VECTOR_ TEXT, CVSS2_VECTOR_ TEXT);
+CREATE TABLE PDL_VULNERABILITY_REGISTRY (ID_ INTEGER PRIMARY KEY, NAME_ TEXT);
+CREATE TABLE PDL_VULNERABILITY_CWE_MAP (VULNERABILITY_ID_ INTEGER, CWE_NAME_ TEXT);
+CREATE TABLE PSE_SUPPRESSED_VULNERABILITY (VULNERABILITY_ID_ INTEGER);
+CREATE TABLE PSE_INVENTORY_GROUPS (ID_ INTEGER PRIMARY KEY, PROJECT_ID_ INTEGER, NAME_ TEXT, REPOSITORY_ITEM_ID_ INTEGER, LICENSE_ID_ INTEGER, USAGE_TEXT_ TEXT, PARENT_GROUP_ID_ INTEGER, PRIORITY_ID_ INTEGER, AUDITOR_REVIEW_NOTES_ TEXT, DISTRIBUTION_TYPE_ TEXT, COPYRIGHT_TEXT_ TEXT, DEPENDENCY_SCOPE_ TEXT, AS_FOUND_TEXT_ TEXT, NOTICE_TEXT_ TEXT, DESCRIPTION_ TEXT, PUBLISHED_ INTEGER);
+CREATE TABLE PSE_INVENTORY_GROUP_FILES (GROUP_ID_ INTEGER, FILE_ID_ INTEGER);
+CREATE TABLE PSE_SCAN_RESULT_NONSCF (ID_ INTEGER PRIMARY KEY);
+CREATE TABLE PSE_SCANNED_FILES (ID_ INTEGER PRIMARY KEY, PROJECT_ID_ INTEGER, PATH_ TEXT, MD5_ TEXT, SHA1_ TEXT, ROOT_ID_ INTEGER, NONSCF_RESULT_ID_ INTEGER);
+CREATE TABLE PSE_REMOTE_SCANNED_FILES (ID_ INTEGER PRIMARY KEY, PROJECT_ID_ INTEGER, PATH_ TEXT, MD5_ TEXT, SHA1_ TEXT);
+CREATE TABLE PSE_LICENSE_MATCH (RESULT_ID_ INTEGER, LICENSE_ID_ INTEGER);
+CREATE TABLE PSE_COPYRIGHT_TEXT (ID_ INTEGER PRIMARY KEY, TEXT_ TEXT);
+CREATE TABLE PSE_COPYRIGHT_MATCH (RESULT_ID_ INTEGER, TEXT_ID_ INTEGER);
+CREATE TABLE PSE_EMAILURL_TEXT (ID_ INTEGER PRIMARY KEY, TEXT_ TEXT);
+CREATE TABLE PSE_EMAILURL_MATCH (RESULT_ID_ INTEGER, TEXT_ID_ INTEGER);
+CREATE TABLE PSE_SEARCH_STRING (ID_ INTEGER PRIMARY KEY, SEARCH_STRING_ TEXT);
+CREATE TABLE PSE_SEARCH_STRING_MATCH (RESULT_ID_ INTEGER, SEARCH_STRING_ID_ INTEGER);
+"""
+
+# Created once the data is loaded, roughly matching the indexes of a Code Insight database
+INDEXES = """
+CREATE INDEX IDX_HIERARCHY_PROJECT ON PAS_PROJECT_HIERARCHY (PROJECT_ID_);
+CREATE INDEX IDX_INVENTORY_PROJECT ON PSE_INVENTORY_GROUPS (PROJECT_ID_);
+CREATE INDEX IDX_GROUP_FILES_GROUP ON PSE_INVENTORY_GROUP_FILES (GROUP_ID_);
+CREATE INDEX IDX_GROUP_FILES_FILE ON PSE_INVENTORY_GROUP_FILES (FILE_ID_);
+CREATE INDEX IDX_SCANNED_FILES_PROJECT ON PSE_SCANNED_FILES (PROJECT_ID_, ID_);
+CREATE INDEX IDX_REMOTE_FILES_PROJECT ON PSE_REMOTE_SCANNED_FILES (PROJECT_ID_, ID_);
+CREATE INDEX IDX_LICENSE_MATCH_RESULT ON PSE_LICENSE_MATCH (RESULT_ID_);
+CREATE INDEX IDX_COPYRIGHT_MATCH_RESULT ON PSE_COPYRIGHT_MATCH (RESULT_ID_);
+CREATE INDEX IDX_EMAILURL_MATCH_RESULT ON PSE_EMAILURL_MATCH (RESULT_ID_);
+CREATE INDEX IDX_SEARCH_STRING_MATCH_RESULT ON PSE_SEARCH_STRING_MATCH (RESULT_ID_);
+CREATE INDEX IDX_COMPONENT_LICENSE_COMPONENT ON PDL_COMPONENT_LICENSE (COMPONENT_ID_);
+CREATE INDEX IDX_COMPONENT_VERSION_COMPONENT ON PDL_COMPONENT_VERSION (COMPONENT_ID_);
+"""
+
+# Name, short name, SPDX identifier. A few of them have no SPDX identifier on purpose
+LICENSES = [
+    ("MIT License", "MIT", "MIT"),
+    ("Apache License 2.0", "Apache-2.0", "Apache-2.0"),
+    ("BSD 3-clause \"New\" or \"Revised\" License", "BSD-3-Clause", "BSD-3-Clause"),
+    ("BSD 2-clause \"Simplified\" License", "BSD-2-Clause", "BSD-2-Clause"),
+    ("GNU General Public License v2.0 only", "GPL-2.0", "GPL-2.0-only"),
+    ("GNU General Public License v3.0 or later", "GPL-3.0+", "GPL-3.0-or-later"),
+    ("GNU Lesser General Public License v2.1 only", "LGPL-2.1", "LGPL-2.1-only"),
+    ("Mozilla Public License 2.0", "MPL-2.0", "MPL-2.0"),
+    ("Eclipse Public License 2.0", "EPL-2.0", "EPL-2.0"),
+    ("ISC License", "ISC", "ISC"),
+    ("zlib License", "Zlib", "Zlib"),
+    ("Public Domain", "Public Domain", None),
+    ("Commercial License (Vendor)", "Commercial", None),
+    ("Oracle Binary Code License", "Oracle BCL", None),
+]
+FORGES = ["github", "maven-central", "npmjs", "pypi", "nuget", "other"]
+SEARCH_STRINGS = ["TODO", "FIXME", "password", "secret", "proprietary", "confidential"]
+
+
+#----------------------------------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description="Create a synthetic Code Insight database in SQLite for scale testing the SPDX report")
+    parser.add_argument("-o", "--output", default="synthetic.db", help="SQLite database file to create (replaced if it exists)")
+    parser.add_argument("--projects", type=int, default=50, help="Number of child projects below the top level project")
+    parser.add_argument("--fanout", type=int, default=10, help="Maximum number of direct children per project")
+    parser.add_argument("--inventory", type=int, default=20000, help="Total number of inventory items")
+    parser.add_argument("--files", type=int, default=2000000, help="Total number of scanned files")
+    parser.add_argument("--evidence", type=int, default=10000000, help="Total number of evidence (license/copyright/email/search string) matches")
+    parser.add_argument("--associated", type=float, default=0.6, help="Fraction of files associated to an inventory item")
+    parser.add_argument("--remote", type=float, default=0.01, help="Remote scanned files as a fraction of the scanned files")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed so a database can be recreated")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s  %(message)s", level=logging.INFO)
+    create_database(args.output, args.projects, args.fanout, args.inventory, args.files, args.evidence, args.associated, args.remote, args.seed)
+
+
+#----------------------------------------------------------------------#
+def create_database(db_path, projects=50, fanout=10, inventory=20000, files=2000000, evidence=10000000, associated=0.6, remote=0.01, seed=1):
+    startTime = time.time()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    rng = random.Random(seed)
+    connection = sqlite3.connect(db_path)
+    # Nothing to protect while the database is being built
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.executescript(SCHEMA)
+
+    projectIds = list(range(1, projects + 2))
+    create_projects(connection, projectIds, fanout)
+    componentCount = create_components(connection, rng, max(10, inventory // 2))
+    inventoryByProject = create_inventory(connection, rng, projectIds, inventory, componentCount)
+    create_files(connection, rng, projectIds, inventoryByProject, files, evidence, associated, remote)
+
+    logger.info("Creating indexes")
+    connection.executescript(INDEXES)
+    connection.commit()
+    connection.close()
+    logger.info("Created %s in %.1f seconds" %(db_path, time.time() - startTime))
+
+
+#----------------------------------------------------------------------#
+def create_projects(connection, projectIds, fanout):
+    logger.info("Creating %s projects" %len(projectIds))
+    connection.executemany("INSERT INTO PAS_PROJECT VALUES (?, ?)", [(projectId, "Synthetic Project %s" %projectId) for projectId in projectIds])
+
+    # Breadth first tree below project 1 with up to fanout children per project
+    connection.executemany("INSERT INTO PAS_PROJECT_HIERARCHY VALUES (?, ?)", [(1 + (projectId - 2) // fanout, projectId) for projectId in projectIds[1:]])
+
+    connection.executemany("INSERT INTO PAS_PROJECT_CUSTOM_FIELDS_METADATA VALUES (?, ?)", [("CUSTOM_FIELD_1_", "Application Name"), ("CUSTOM_FIELD_2_", "Application Version"), ("CUSTOM_FIELD_3_", "Application Publisher")])
+    connection.execute("INSERT INTO PAS_PROJECT_CUSTOM_FIELDS VALUES (1, 'Synthetic Application', '1.0', 'Synthetic Publisher')")
+    connection.executemany("INSERT INTO PAS_INVENTORY_FLEX_FIELDS_METADATA VALUES (?, ?)", [("FLEX_FIELD_1_", "Package Supplier"), ("FLEX_FIELD_2_", "Download Location"), ("FLEX_FIELD_3_", "Archive Property")])
+    connection.execute("INSERT INTO PAS_SCAN_SERVERS VALUES (1, 'scan-server-1')")
+    connection.execute("INSERT INTO PAS_PROJECT_SCAN_ROOTS VALUES (1, 1)")
+
+
+#----------------------------------------------------------------------#
+def create_components(connection, rng, componentCount):
+    logger.info("Creating %s components" %componentCount)
+    connection.executemany("INSERT INTO PDL_FORGE VALUES (?, ?)", [(forgeId, name) for forgeId, name in enumerate(FORGES, 1)])
+    connection.executemany("INSERT INTO PDL_LICENSE VALUES (?, ?, ?, ?, ?)", [(licenseId, name, shortName, spdxId, "https://licenses.example.com/%s" %licenseId) for licenseId, (name, shortName, spdxId) in enumerate(LICENSES, 1)])
+
+    connection.executemany("INSERT INTO PDL_COMPONENT VALUES (?, ?, ?, ?, ?)",
+        ((componentId, "component-%s" %componentId, "Component %s" %componentId, "https://components.example.com/%s" %componentId, rng.randint(1, len(FORGES))) for componentId in range(1, componentCount + 1)))
+    # One version per component with the same ID, every 20th component also has a custom version
+    connection.executemany("INSERT INTO PDL_COMPONENT_VERSION VALUES (?, ?, ?)",
+        ((componentId, componentId, "%s.%s.%s" %(rng.randint(0, 9), rng.randint(0, 20), rng.randint(0, 50))) for componentId in range(1, componentCount + 1)))
+    connection.executemany("INSERT INTO PDL_COMPONENT_VERSION_CUSTOM VALUES (?, ?, ?)",
+        ((componentCount + componentId, componentId, "%s-custom" %componentId) for componentId in range(1, componentCount + 1, 20)))
+    connection.executemany("INSERT INTO PDL_COMPONENT_LICENSE VALUES (?, ?)",
+        ((componentId, licenseId) for componentId in range(1, componentCount + 1) for licenseId in rng.sample(range(1, len(LICENSES) + 1), rng.randint(1, 3))))
+    return componentCount
+
+
+#----------------------------------------------------------------------#
+def create_inventory(connection, rng, projectIds, inventory, componentCount):
+    logger.info("Creating %s inventory items" %inventory)
+    inventoryByProject = {projectId: [] for projectId in projectIds}
+    inventoryItems = []
+    repositoryItems = []
+    flexFields = []
+
+    for inventoryId in range(1, inventory + 1):
+        projectId = projectIds[(inventoryId - 1) % len(projectIds)]
+        inventoryByProject[projectId].append(inventoryId)
+        licenseId = rng.randint(1, len(LICENSES))
+        if inventoryId % 10 == 0:
+            # License only inventory without a repository item
+            inventoryItems.append((inventoryId, projectId, "License Only %s" %inventoryId, None, licenseId, "Usage", None, rng.randint(1, 4), None, "INTERNAL", "Copyright %s" %inventoryId, None, None, None, "License only item", 1))
+        else:
+            componentId = rng.randint(1, componentCount)
+            versionId = componentCount + componentId if componentId % 20 == 1 and rng.random() < 0.5 else componentId
+            repositoryItems.append((inventoryId, "Component", componentId, versionId, licenseId))
+            inventoryItems.append((inventoryId, projectId, "component-%s" %componentId, inventoryId, None, "Usage", None, rng.randint(1, 4), None, "EXTERNAL", "(c) %s" %inventoryId, rng.choice([None, "0", "1"]), None, None, "Component %s" %componentId, 1))
+        if inventoryId % 3 == 0:
+            flexFields.append((inventoryId, "Supplier %s" %inventoryId, "https://downloads.example.com/%s" %inventoryId if inventoryId % 2 else None, None))
+
+    connection.executemany("INSERT INTO PAS_REPOSITORY_ITEM VALUES (?, ?, ?, ?, ?)", repositoryItems)
+    connection.executemany("INSERT INTO PSE_INVENTORY_GROUPS VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", inventoryItems)
+    connection.executemany("INSERT INTO PAS_INVENTORY_FLEX_FIELDS VALUES (?, ?, ?, ?)", flexFields)
+    return inventoryByProject
+
+
+#----------------------------------------------------------------------#
+def create_files(connection, rng, projectIds, inventoryByProject, files, evidence, associated, remote):
+    logger.info("Creating %s scanned files with %s evidence matches" %(files, evidence))
+    copyrightCount = max(100, files // 40)
+    emailUrlCount = max(100, files // 100)
+    connection.executemany("INSERT INTO PSE_COPYRIGHT_TEXT VALUES (?, ?)", ((textId, "Copyright (c) %s Author %s" %(1990 + textId % 35, textId)) for textId in range(1, copyrightCount + 1)))
+    connection.executemany("INSERT INTO PSE_EMAILURL_TEXT VALUES (?, ?)", ((textId, "https://project%s.example.com" %textId if textId % 2 else "dev%s@example.com" %textId) for textId in range(1, emailUrlCount + 1)))
+    connection.executemany("INSERT INTO PSE_SEARCH_STRING VALUES (?, ?)", list(enumerate(SEARCH_STRINGS, 1)))
+
+    evidencePerFile = evidence / files if files else 0
+    fileId = 0
+    for projectIndex, projectId in enumerate(projectIds):
+        projectFiles = files // len(projectIds) + (1 if projectIndex < files % len(projectIds) else 0)
+        firstFileId = fileId + 1
+        fileId += projectFiles
+
+        scannedFiles = []
+        groupFiles = []
+        licenseMatches = []
+        copyrightMatches = []
+        emailUrlMatches = []
+        searchStringMatches = []
+        inventoryIds = inventoryByProject[projectId]
+
+        for scannedFileId in range(firstFileId, fileId + 1):
+            digest = hashlib.sha1(str(scannedFileId).encode()).hexdigest()
+            scannedFiles.append((scannedFileId, projectId, "src/module%s/dir%s/file%s.c" %(projectId, scannedFileId % 500, scannedFileId), digest[:32], digest, 1, scannedFileId))
+            if inventoryIds and rng.random() < associated:
+                groupFiles.append((rng.choice(inventoryIds), scannedFileId))
+
+            # Spread the evidence unevenly over the files, mostly licenses and copyrights
+            matchCount = int(evidencePerFile * rng.expovariate(1.0) + 0.5)
+            for _ in range(matchCount):
+                evidenceType = rng.random()
+                if evidenceType < 0.45:
+                    licenseMatches.append((scannedFileId, rng.randint(1, len(LICENSES))))
+                elif evidenceType < 0.85:
+                    copyrightMatches.append((scannedFileId, rng.randint(1, copyrightCount)))
+                elif evidenceType < 0.97:
+                    emailUrlMatches.append((scannedFileId, rng.randint(1, emailUrlCount)))
+                else:
+                    searchStringMatches.append((scannedFileId, rng.randint(1, len(SEARCH_STRINGS))))
+
+        connection.executemany("INSERT INTO PSE_SCAN_RESULT_NONSCF VALUES (?)", ((scannedFileId,) for scannedFileId in range(firstFileId, fileId + 1)))
+        connection.executemany("INSERT INTO PSE_SCANNED_FILES VALUES (?, ?, ?, ?, ?, ?, ?)", scannedFiles)
+        connection.executemany("INSERT INTO PSE_INVENTORY_GROUP_FILES VALUES (?, ?)", groupFiles)
+        connection.executemany("INSERT INTO PSE_LICENSE_MATCH VALUES (?, ?)", licenseMatches)
+        connection.executemany("INSERT INTO PSE_COPYRIGHT_MATCH VALUES (?, ?)", copyrightMatches)
+        connection.executemany("INSERT INTO PSE_EMAILURL_MATCH VALUES (?, ?)", emailUrlMatches)
+        connection.executemany("INSERT INTO PSE_SEARCH_STRING_MATCH VALUES (?, ?)", searchStringMatches)
+
+        # Remote files share the ID sequence of the scanned files
+        remoteFiles = []
+        remoteGroupFiles = []
+        for _ in range(int(projectFiles * remote)):
+            fileId += 1
+            digest = hashlib.sha1(("remote-%s" %fileId).encode()).hexdigest()
+            remoteFiles.append((fileId, projectId, "remote/module%s/file%s.jar" %(projectId, fileId), None, digest))
+            if inventoryIds:
+                remoteGroupFiles.append((rng.choice(inventoryIds), fileId))
+        connection.executemany("INSERT INTO PSE_REMOTE_SCANNED_FILES VALUES (?, ?, ?, ?, ?)", remoteFiles)
+        connection.executemany("INSERT INTO PSE_INVENTORY_GROUP_FILES VALUES (?, ?)", remoteGroupFiles)
+        connection.commit()
+        logger.info("    Project %s: %s files, %s evidence matches" %(projectId, projectFiles, len(licenseMatches) + len(copyrightMatches) + len(emailUrlMatches) + len(searchStringMatches)))
+
+
+if __name__ == "__main__":
+    main()
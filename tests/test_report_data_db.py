@@ -0,0 +1,94 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : test_report_data_db.py
+'''
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import report_data
+import report_data_db
+import report_data_db_dbapi
+import report_data_db_runner
+import synthetic_db
+
+REPORT_OPTIONS = {"includeChildProjects": True, "includeNonRuntimeInventory": False, "includeFileDetails": True,
+                  "includeUnassociatedFiles": True, "createOtherFilesPackage": False, "includeCopyrightsData": True}
+# The evidence query of each mode, and the fallbacks that must not be needed when it works
+EVIDENCE_QUERIES = {
+    "aggregate": "get_evidence_batch_aggregated",
+    "union": "get_evidence_batch_combined",
+    "separate": "get_evidence_batch_by_type",
+}
+
+
+class EvidenceQueryModeTest(unittest.TestCase):
+    """The report from a synthetic database (see synthetic_db.py) through the SQLite backend in each evidence query mode."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.temp_dir.name, "synthetic.db")
+        # Small enough to run quickly, with enough files in the top level project for several evidence batches
+        synthetic_db.create_database(cls.db_path, projects=3, fanout=2, inventory=40, files=10000, evidence=30000)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def setUp(self):
+        db_runner = report_data_db_runner.LazyDbRunner(lambda: report_data_db_dbapi.create_sqlite_runner(self.db_path))
+        self.addCleanup(db_runner.close)
+        patchers = [
+            mock.patch.object(report_data_db_runner, "db_runner", db_runner),
+            mock.patch.object(report_data_db, "db_runner", db_runner),
+            # The vendor comes from the runner rather than core.db.properties
+            mock.patch.object(report_data_db_runner, "LOCAL_DB_RUNNER", True),
+            mock.patch.object(report_data_db_runner, "db_vendor", None),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_report(self, query_mode):
+        patchers = [mock.patch.object(report_data_db, "EVIDENCE_QUERY_MODE", query_mode)]
+        for mode, function_name in EVIDENCE_QUERIES.items():
+            if mode != query_mode:
+                # A fallback would compare the mode it fell back to instead of this one
+                patchers.append(mock.patch.object(report_data_db, function_name, side_effect=AssertionError(f"{query_mode} evidence query fell back to {mode}")))
+        for patcher in patchers:
+            patcher.start()
+        try:
+            reportData = report_data.gather_data_for_report(1, {"reportOptions": dict(REPORT_OPTIONS), "spdxTimeStamp": "2026-10-18T00:00:00Z"})
+        finally:
+            for patcher in reversed(patchers):
+                patcher.stop()
+        reportDetails = reportData["reportDetails"]
+        reportDetails.pop("documentNamespace")  # Unique to each run
+        return reportDetails
+
+    def test_report_is_the_same_in_every_mode(self):
+        reports = {query_mode: self.create_report(query_mode) for query_mode in EVIDENCE_QUERIES}
+
+        files = reports["aggregate"]["files"]
+        self.assertTrue(any(file["copyrightText"] not in ("NONE", "NOASSERTION") for file in files))
+        self.assertTrue(any(file["licenseInfoInFiles"] not in (["NONE"], ["NOASSERTION"]) for file in files))
+        expected = json.dumps(reports["aggregate"], sort_keys=True, indent=1)
+        for query_mode in ("union", "separate"):
+            with self.subTest(query_mode=query_mode):
+                self.assertEqual(json.dumps(reports[query_mode], sort_keys=True, indent=1), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : test_report_data_db_cache.py
+'''
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import report_data_db_cache
+import report_data_db_runner
+
+STAMP = {"projects": [1, 2], "parts": [
+    {"stampPart": "SCANNED_FILES", "rowCount": 1500, "maxId": 1500, "checksum": 98765},
+    {"stampPart": "INVENTORY", "rowCount": 40, "maxId": 40, "checksum": 12345},
+]}
+ROWS = [{"ID_": 1, "NAME_": "openssl"}, {"ID_": 2, "NAME_": "zlib"}]
+
+
+class CountingWorker:
+    """Answers every query with ROWS and counts the queries that reached it."""
+    def __init__(self):
+        self.queries = []
+
+    def run_query(self, sql_query, query_name=None, spool=False, params=None):
+        self.queries.append(sql_query)
+        return copy.deepcopy(ROWS)
+
+    def iter_query(self, sql_query, query_name=None, spool=False, params=None):
+        self.queries.append(sql_query)
+        yield from copy.deepcopy(ROWS)
+
+    def close(self):
+        pass
+
+
+class QueryResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache_dir = os.path.join(temp_dir.name, "project_1")
+
+    def cache_results(self, stamp):
+        cache = report_data_db_cache.QueryResultCache(self.cache_dir, stamp)
+        cache.put("get_components", "SELECT ID_, NAME_ FROM PDL_COMPONENT;", ROWS)
+        cache.close()
+
+    def test_results_kept_for_the_same_stamp(self):
+        self.cache_results(STAMP)
+        cache = report_data_db_cache.QueryResultCache(self.cache_dir, copy.deepcopy(STAMP))
+        self.assertEqual(cache.get("get_components", "SELECT ID_, NAME_ FROM PDL_COMPONENT;"), ROWS)
+        self.assertIsNone(cache.get("get_components", "SELECT ID_ FROM PDL_COMPONENT;"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_changed_stamp_discards_results(self):
+        self.cache_results(STAMP)
+        changed_stamp = copy.deepcopy(STAMP)
+        changed_stamp["parts"][1]["checksum"] += 1  # An inventory item was edited
+        cache = report_data_db_cache.QueryResultCache(self.cache_dir, changed_stamp)
+        self.assertIsNone(cache.get("get_components", "SELECT ID_, NAME_ FROM PDL_COMPONENT;"))
+        self.assertEqual(os.listdir(self.cache_dir), ["stamp.json"])
+        # Nothing comes back once the project data is as it was either, the results were thrown away
+        cache = report_data_db_cache.QueryResultCache(self.cache_dir, STAMP)
+        self.assertIsNone(cache.get("get_components", "SELECT ID_, NAME_ FROM PDL_COMPONENT;"))
+
+    def test_old_cache_discards_results(self):
+        self.cache_results(STAMP)
+        stamp_path = os.path.join(self.cache_dir, "stamp.json")
+        with open(stamp_path, "w", encoding="utf-8") as stamp_file:
+            json.dump({"stamp": STAMP, "createdOn": time.time() - (report_data_db_cache.user_query_cache_max_age_hours + 1) * 3600}, stamp_file)
+        cache = report_data_db_cache.QueryResultCache(self.cache_dir, STAMP)
+        self.assertIsNone(cache.get("get_components", "SELECT ID_, NAME_ FROM PDL_COMPONENT;"))
+
+    def test_unfinished_result_is_not_kept(self):
+        cache = report_data_db_cache.QueryResultCache(self.cache_dir, STAMP)
+        writer = cache.writer("get_components", "SELECT ID_, NAME_ FROM PDL_COMPONENT;")
+        writer.add(ROWS[0])
+        writer.discard()
+        self.assertIsNone(cache.get("get_components", "SELECT ID_, NAME_ FROM PDL_COMPONENT;"))
+        self.assertEqual(os.listdir(self.cache_dir), ["stamp.json"])
+
+    def test_pool_answers_cached_queries(self):
+        worker = CountingWorker()
+        pool = report_data_db_runner.DbQueryRunnerPool(lambda: worker, 1)
+        self.addCleanup(pool.close)
+        cache = report_data_db_cache.QueryResultCache(self.cache_dir, STAMP)
+        with mock.patch.object(report_data_db_runner, "query_cache", cache):
+            for _ in range(2):
+                self.assertEqual(pool.run_query("SELECT ID_, NAME_ FROM PDL_COMPONENT WHERE ID_ IN (?, ?);", "get_components", params=[1, 2]), ROWS)
+                self.assertEqual(list(pool.iter_query("SELECT ID_, NAME_ FROM PDL_COMPONENT;", "iter_components")), ROWS)
+                # Vulnerabilities aren't covered by the stamp so they always come from the database
+                pool.run_query("SELECT ID_ FROM PDL_VULNERABILITY;", "get_vulnerabilities")
+        self.assertEqual(worker.queries, ["SELECT ID_, NAME_ FROM PDL_COMPONENT WHERE ID_ IN (?, ?);", "SELECT ID_, NAME_ FROM PDL_COMPONENT;",
+                                          "SELECT ID_ FROM PDL_VULNERABILITY;", "SELECT ID_ FROM PDL_VULNERABILITY;"])
+
+
+class ReplayDbQueryRunnerTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.record_path = os.path.join(temp_dir.name, "recording.jsonl.gz")
+        with mock.patch.object(report_data_db_cache, "get_db_vendor", return_value="mysql"):
+            recorder = report_data_db_cache.QueryRecorder(self.record_path)
+            recorder.record("SELECT NAME_ FROM PAS_PROJECT WHERE ID_ = 1;", [{"NAME_": "Top"}])
+            recorder.record("SELECT COUNT(*) AS n FROM PSE_SCANNED_FILES;", [{"n": 10}])
+            recorder.record("SELECT COUNT(*) AS n FROM PSE_SCANNED_FILES;", [{"n": 11}])
+            recorder.record("SELECT BAD;", {"error": "syntax error"})
+            recorder.record_batch_size(1, 250)
+            recorder.close()
+        self.runner = report_data_db_cache.ReplayDbQueryRunner(self.record_path)
+
+    def test_recorded_queries_are_answered(self):
+        self.assertEqual(self.runner.db_vendor, "mysql")
+        self.assertEqual(self.runner.run_query("SELECT NAME_ FROM PAS_PROJECT WHERE ID_ = ?;", "get_projects_data", params=[1]), [{"NAME_": "Top"}])
+        # A query run more than once gets its results in order, then the last one again
+        counts = [self.runner.run_query("SELECT COUNT(*) AS n FROM PSE_SCANNED_FILES;", "count") for _ in range(3)]
+        self.assertEqual(counts, [[{"n": 10}], [{"n": 11}], [{"n": 11}]])
+        self.assertEqual(list(self.runner.recorded_batch_sizes(1)), [250])
+
+    def test_recorded_error_is_returned(self):
+        rows = self.runner.iter_query("SELECT BAD;", "bad_query")
+        with self.assertRaises(StopIteration) as finished:
+            next(rows)
+        self.assertEqual(finished.exception.value, {"error": "syntax error"})
+
+    def test_query_missing_from_recording_raises(self):
+        sql_query = "SELECT NAME_ FROM PAS_PROJECT WHERE ID_ = 2;"
+        with self.assertRaises(report_data_db_cache.QueryNotRecordedError):
+            self.runner.run_query(sql_query, "get_projects_data")
+        with self.assertRaises(report_data_db_cache.QueryNotRecordedError):
+            list(self.runner.iter_query(sql_query, "get_projects_data"))
+        with self.assertRaises(report_data_db_cache.QueryNotRecordedError):
+            self.runner.run_many([sql_query], "get_projects_data")
+        with self.assertRaises(report_data_db_cache.QueryNotRecordedError):
+            self.runner.submit(sql_query, "get_projects_data").result()
+
+
+if __name__ == "__main__":
+    unittest.main()
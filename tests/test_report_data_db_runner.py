@@ -0,0 +1,201 @@
+'''
+Copyright 2026 Flexera Software LLC
+See LICENSE.TXT for full license text
+SPDX-License-Identifier: MIT
+
+Author : sarthak
+Created On : Sun Oct 18 2026
+File : test_report_data_db_runner.py
+'''
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import report_data_db_runner
+
+# Stands in for DbConnection.jar: answers each line of SQL with a line of JSON. The first query
+# with STALL in it never gets an answer, the marker file tells the restarted process to answer it
+FAKE_JAVA = '''#!{python}
+import json, os, sys, time
+marker = os.environ["FAKE_JAVA_STALL_MARKER"]
+for line in sys.stdin:
+    sql = line.strip()
+    if sql == "exit":
+        break
+    if "STALL" in sql and not os.path.exists(marker):
+        open(marker, "w").close()
+        time.sleep(60)
+    rows = [{{"answer": 42}}] if sql.startswith("SELECT") else []
+    sys.stdout.write(json.dumps(rows) + "\\n")
+    sys.stdout.flush()
+'''
+
+
+class QueryResultReaderTest(unittest.TestCase):
+    # Multi byte characters and JSON punctuation inside the values
+    ROWS = [{"id": index, "path": "src/ünïcode/" + "é" * index, "text": "a ] } , \" b", "none": None} for index in range(40)]
+
+    def read(self, data, chunk_size):
+        stream = io.BytesIO(data)
+        reader = report_data_db_runner.QueryResultReader(stream, "utf-8")
+        reader.chunk_size = chunk_size
+        rows = list(reader.rows())
+        return rows, reader.value, stream.read()
+
+    def response(self):
+        return json.dumps(self.ROWS, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def test_rows_across_chunk_boundaries(self):
+        # Every size up to the length of a few rows, so rows and characters are split at every position
+        for chunk_size in list(range(1, 80)) + [65536]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.read(self.response() + b"NEXT\n", chunk_size), (self.ROWS, None, b"NEXT\n"))
+
+    def test_blank_lines_before_the_response(self):
+        for chunk_size in (1, 3, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.read(b"\n\n" + self.response(), chunk_size), (self.ROWS, None, b""))
+
+    def test_error_response(self):
+        for chunk_size in (1, 3, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.read(b'{"error": "bad query"}\nNEXT\n', chunk_size), ([], {"error": "bad query"}, b"NEXT\n"))
+
+    def test_response_cut_off(self):
+        for chunk_size in (1, 3, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                stream = io.BytesIO(b'[{"a": 1}, {"a": 2}, {"a":')
+                reader = report_data_db_runner.QueryResultReader(stream, "utf-8")
+                reader.chunk_size = chunk_size
+                self.assertEqual(list(reader.rows()), [{"a": 1}, {"a": 2}])
+                self.assertEqual(reader.value, [])
+                self.assertTrue(reader.eof)
+
+    def test_stopping_early_drains_the_response(self):
+        stream = io.BytesIO(self.response() + b"NEXT\n")
+        reader = report_data_db_runner.QueryResultReader(stream, "utf-8")
+        reader.chunk_size = 5
+        rows = reader.rows()
+        self.assertEqual(next(rows), self.ROWS[0])
+        rows.close()
+        reader.drain()
+        self.assertEqual(stream.read(), b"NEXT\n")
+
+    def test_spooled_rows_across_chunk_boundaries(self):
+        for chunk_size in (1, 2, 7, 64, report_data_db_runner.SPOOL_CHUNK_SIZE):
+            with self.subTest(chunk_size=chunk_size):
+                spool_file = tempfile.TemporaryFile()
+                spool_file.write(self.response())
+                spool_file.flush()
+                reader = report_data_db_runner.MappedResultReader(spool_file, "utf-8")
+                reader.chunk_size = chunk_size
+                try:
+                    self.assertEqual(list(reader.rows()), self.ROWS)
+                    self.assertIsNone(reader.value)
+                finally:
+                    reader.close()
+
+
+class FakeWorker:
+    """Answers SELECT <n> after a delay that is shorter for higher n, so later queries finish first."""
+    def __init__(self, completed):
+        self.completed = completed
+
+    def run_query(self, sql_query, query_name=None, spool=False, params=None):
+        index = int(sql_query.split()[1])
+        time.sleep(0.02 * (10 - index))
+        self.completed.append(index)
+        return [{"index": index, "worker": id(self)}]
+
+    def close(self):
+        pass
+
+
+class DbQueryRunnerPoolTest(unittest.TestCase):
+    def test_run_many_keeps_query_order(self):
+        completed = []
+        pool = report_data_db_runner.DbQueryRunnerPool(lambda: FakeWorker(completed), 4)
+        self.addCleanup(pool.close)
+        sql_queries = [f"SELECT {index}" for index in range(10)]
+
+        results = pool.run_many(sql_queries, "run_many_test")
+
+        self.assertEqual([result[0]["index"] for result in results], list(range(10)))
+        # The queries did run side by side and finished out of order
+        self.assertGreater(len({result[0]["worker"] for result in results}), 1)
+        self.assertNotEqual(completed, list(range(10)))
+
+    def test_run_many_on_a_single_worker(self):
+        completed = []
+        pool = report_data_db_runner.DbQueryRunnerPool(lambda: FakeWorker(completed), 1)
+        self.addCleanup(pool.close)
+        results = pool.run_many([f"SELECT {index}" for index in range(5)], "run_many_test")
+        self.assertEqual([result[0]["index"] for result in results], list(range(5)))
+
+
+@unittest.skipIf(os.name == "nt", "The stand-in for Java is a script run through its #! line")
+class QueryRetryTest(unittest.TestCase):
+    timeout_seconds = 0.5
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        java_path = os.path.join(temp_dir.name, "java")
+        with open(java_path, "w") as java_file:
+            java_file.write(FAKE_JAVA.format(python=sys.executable))
+        os.chmod(java_path, 0o755)
+
+        self.metrics = report_data_db_runner.QueryMetrics()
+        patchers = [
+            mock.patch.dict(os.environ, {"FAKE_JAVA_STALL_MARKER": os.path.join(temp_dir.name, "stalled")}),
+            mock.patch.object(report_data_db_runner, "QUERY_INACTIVITY_TIMEOUT_SECONDS", self.timeout_seconds),
+            mock.patch.object(report_data_db_runner, "query_watchdog", report_data_db_runner.QueryWatchdog(self.timeout_seconds)),
+            mock.patch.object(report_data_db_runner, "query_metrics", self.metrics),
+            # No core.db.properties, so no MySQL session setup
+            mock.patch.object(report_data_db_runner, "properties_file", os.path.join(temp_dir.name, "core.db.properties")),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.runner = report_data_db_runner.InteractiveDbQueryRunner(os.path.join(temp_dir.name, "DbConnection.jar"), java_path)
+        self.addCleanup(self.runner.close)
+
+    def events(self, query_name):
+        summary = self.metrics.summary()[query_name]
+        return {event: summary.get(event, 0) for event in ("timeouts", "restarts", "retries")}
+
+    def test_select_is_run_again_after_a_timeout(self):
+        self.assertEqual(self.runner.run_query("SELECT answer FROM STALL", "stalled_select"), [{"answer": 42}])
+        self.assertEqual(self.events("stalled_select"), {"timeouts": 1, "restarts": 1, "retries": 1})
+        # The restarted process answers the next query straight away
+        self.assertEqual(self.runner.run_query("SELECT answer FROM ANSWERS", "next_select"), [{"answer": 42}])
+
+    def test_streamed_select_is_run_again_after_a_timeout(self):
+        rows = list(self.runner.iter_query("SELECT answer FROM STALL", "stalled_iter"))
+        self.assertEqual(rows, [{"answer": 42}])
+        self.assertEqual(self.events("stalled_iter"), {"timeouts": 1, "restarts": 1, "retries": 1})
+
+    def test_pipelined_select_is_run_again_after_a_timeout(self):
+        stalled = self.runner.submit("SELECT answer FROM STALL", "stalled_submit")
+        behind = self.runner.submit("SELECT answer FROM ANSWERS", "behind_submit")
+        self.assertEqual(stalled.result(timeout=30), [{"answer": 42}])
+        # Whether it was written ahead or still queued, the query behind the stalled one is answered too
+        self.assertEqual(behind.result(timeout=30), [{"answer": 42}])
+        self.assertEqual(self.events("stalled_submit"), {"timeouts": 1, "restarts": 1, "retries": 1})
+
+    def test_update_is_not_run_again(self):
+        with self.assertRaises(report_data_db_runner.QueryTimeoutError):
+            self.runner.run_query("UPDATE STALL SET answer = 42", "stalled_update")
+        self.assertEqual(self.events("stalled_update"), {"timeouts": 1, "restarts": 1, "retries": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()